@@ -0,0 +1,85 @@
+"""
+Benchmark: FAQ search
+Compares the original linear substring scan with the BM25 FAQIndex on
+synthetic knowledge bases. Recall@k counts queries whose target article
+appears in the first k results. Run from the project root:
+
+    python benchmarks/bench_faq_search.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.faq_index import FAQIndex
+
+KB_SIZES = [1_000, 10_000, 50_000]
+QUERY_COUNT = 100
+TOP_K = 5
+VOCABULARY_SIZE = 20_000
+FILLER = ["the", "a", "and", "to", "of", "our", "your", "is"]
+
+
+def make_kb(size: int, rng: random.Random) -> dict:
+    vocabulary = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                  for _ in range(VOCABULARY_SIZE)]
+    kb = {}
+    for i in range(size):
+        topic = rng.sample(vocabulary, 2)
+        words = rng.sample(vocabulary, 25) + rng.choices(FILLER, k=10)
+        rng.shuffle(words)
+        kb[f"{topic[0]}_{topic[1]}_{i}"] = " ".join(words) + "."
+    return kb
+
+
+def make_queries(kb: dict, rng: random.Random) -> list:
+    keys = list(kb)
+    queries = []
+    for _ in range(QUERY_COUNT):
+        key = rng.choice(keys)
+        words = [w for w in kb[key].rstrip(".").split() if w not in FILLER]
+        queries.append((key, " ".join(["what", "is", "the"] + rng.sample(words, 3))))
+    return queries
+
+
+def linear_scan(kb: dict, query: str) -> list:
+    """The original search_faq loop"""
+    query_lower = query.lower()
+    results = []
+    for key, answer in kb.items():
+        if any(word in key for word in query_lower.split()) or any(word in answer.lower() for word in query_lower.split()):
+            results.append(key)
+    return results
+
+
+def run(search, queries) -> tuple:
+    hits = 0
+    start = time.perf_counter()
+    for target, query in queries:
+        if target in search(query)[:TOP_K]:
+            hits += 1
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return elapsed_ms, hits / len(queries)
+
+
+def main():
+    rng = random.Random(3)
+    print(f"{'articles':>9} {'build s':>8} {'scan ms':>9} {'scan R@5':>9} {'index ms':>9} {'index R@5':>10}")
+    for size in KB_SIZES:
+        kb = make_kb(size, rng)
+        queries = make_queries(kb, rng)
+
+        start = time.perf_counter()
+        index = FAQIndex(kb)
+        build_s = time.perf_counter() - start
+
+        scan_ms, scan_recall = run(lambda q: linear_scan(kb, q), queries)
+        index_ms, index_recall = run(lambda q: [key for key, _ in index.search(q, TOP_K)], queries)
+        print(f"{size:>9} {build_s:>8.2f} {scan_ms:>9.2f} {scan_recall:>9.2f} {index_ms:>9.3f} {index_recall:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
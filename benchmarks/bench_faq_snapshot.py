@@ -0,0 +1,47 @@
+"""
+Benchmark: FAQ index cold start
+Time-to-first-query when building the index in memory versus mapping a
+prebuilt snapshot. Run from the project root:
+
+    python benchmarks/bench_faq_snapshot.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_faq_search import make_kb, make_queries
+from tools.faq_index import FAQIndex
+from tools.faq_snapshot import MappedFAQIndex, faq_fingerprint, save_snapshot
+
+KB_SIZES = [10_000, 50_000]
+
+
+def first_query_ms(factory, query: str) -> float:
+    start = time.perf_counter()
+    factory().search(query)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    rng = random.Random(11)
+    print(f"{'articles':>9} {'snapshot MB':>12} {'build ms':>10} {'mmap+crc ms':>12} {'mmap ms':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in KB_SIZES:
+            kb = make_kb(size, rng)
+            query = make_queries(kb, rng)[0][1]
+            path = os.path.join(directory, f"faq_{size}.idx")
+            save_snapshot(FAQIndex(kb), path, faq_fingerprint(kb))
+
+            build_ms = first_query_ms(lambda: FAQIndex(kb), query)
+            checked_ms = first_query_ms(lambda: MappedFAQIndex(path), query)
+            mapped_ms = first_query_ms(lambda: MappedFAQIndex(path, verify_checksum=False), query)
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{size:>9} {size_mb:>12.1f} {build_ms:>10.1f} {checked_ms:>12.2f} {mapped_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
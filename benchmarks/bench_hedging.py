@@ -0,0 +1,95 @@
+"""
+Benchmark: hedged requests and deadlines
+Drives process_customer_query against the local mock server with a
+latency tail (a small fraction of requests take SLOW_LATENCY seconds)
+and reports end-to-end percentiles with and without hedging, then the
+fallbacks taken when a deadline is shorter than the tail.
+
+    python benchmarks/bench_hedging.py [queries]
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_model_server import start_mock_server
+
+LATENCY = 0.05
+SLOW_RATE = 0.05
+SLOW_LATENCY = 1.5
+DEADLINE = 0.5
+CONCURRENCY = 20
+
+server, settings, url = start_mock_server(latency=LATENCY, jitter=0.01, slow_rate=SLOW_RATE,
+                                          slow_latency=SLOW_LATENCY, seed=3)
+os.environ.update({
+    "GEMINI_API_KEY": "mock", "GEMINI_BASE_PATH": url, "GEMINI_MODEL_NAME": "mock",
+    "GEMINI_REQUESTS_PER_MINUTE": "1000000", "GEMINI_TOKENS_PER_MINUTE": "1000000000",
+    "GEMINI_INITIAL_CONCURRENCY": "64",
+    "RESPONSE_CACHE_SIZE": "0", "SEMANTIC_CACHE_SIZE": "0",
+})
+
+import main  # noqa: E402  (reads the environment above at import time)
+from runtime.hedging import HedgePolicy  # noqa: E402
+
+if main.model_clients.base_url != url:
+    sys.exit(f"Model client points at {main.model_clients.base_url}, not the mock server")
+
+logging.disable(logging.CRITICAL)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def drive(queries: int, deadline=None):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, outcomes = [], {}
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            # Distinct messages so the singleflight does not coalesce them
+            data = await main.process_customer_query(f"What payment methods do you accept? #{i}", deadline=deadline)
+            latencies.append(time.perf_counter() - started)
+            outcomes[data["agent_used"]] = outcomes.get(data["agent_used"], 0) + 1
+
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    return latencies, outcomes
+
+
+def report(name: str, latencies, outcomes):
+    print(f"{name:18}: p50={percentile(latencies, 0.5) * 1000:6.0f}ms  p95={percentile(latencies, 0.95) * 1000:6.0f}ms  "
+          f"p99={percentile(latencies, 0.99) * 1000:6.0f}ms  max={max(latencies) * 1000:6.0f}ms  {outcomes}")
+
+
+async def run(queries: int):
+    await main.model_clients.startup()
+    try:
+        main.Runner.hedge_policy = None
+        report("no hedging", *await drive(queries))
+
+        policy = HedgePolicy(percentile=0.95, min_samples=50, max_hedge_ratio=0.1)
+        main.Runner.configure(hedge_policy=policy)
+        await drive(100)  # warm the latency window
+        report("hedged at p95", *await drive(queries))
+        print(f"{'':18}  {policy.stats()}")
+
+        main.Runner.hedge_policy = None
+        report(f"deadline {DEADLINE}s", *await drive(queries, deadline=DEADLINE))
+    finally:
+        await main.model_clients.shutdown()
+        server.shutdown()
+
+
+def main_():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    asyncio.run(run(queries))
+
+
+if __name__ == "__main__":
+    main_()
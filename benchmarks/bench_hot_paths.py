@@ -0,0 +1,234 @@
+"""
+Benchmark: deterministic hot paths with stored baselines
+Times the non-LLM functions that run on every message. Each one runs
+against synthetic corpora that scale in message length, term-list size
+and order/FAQ database size. The functions covered are
+route_message and the content_filter_guardrail, analyze_sentiment,
+should_handoff and enable_order_tool views over it, plus search_faq and
+get_order_status. Routing memoization is off, so every call pays for
+the full routing pass. Every case is timed as the best and median of
+several repeats, in microseconds per call. A case counts as a
+regression only when both numbers exceed the threshold.
+
+Baselines are machine-specific: save one on the machine that runs the
+comparison, then compare later runs against it.
+
+    python benchmarks/bench_hot_paths.py --save          # record the baseline
+    python benchmarks/bench_hot_paths.py                 # compare, exit 1 on regression
+    python benchmarks/bench_hot_paths.py --threshold 0.1 --filter guardrail
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import string
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.update({
+    "GEMINI_API_KEY": "bench", "GEMINI_BASE_PATH": "http://127.0.0.1:9/v1", "GEMINI_MODEL_NAME": "bench",
+    "EVENT_LOG_PATH": "", "ROUTING_CACHE_SIZE": "0",
+})
+
+import main  # noqa: E402  (reads the environment above at import time)
+from tools.order_cache import CachedOrderStore  # noqa: E402
+from tools.order_store import InMemoryOrderStore  # noqa: E402
+
+# Log calls are a no-op here so the numbers track the matching logic itself
+logging.disable(logging.CRITICAL)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hot_paths.json")
+MESSAGE_WORDS = {"short": 8, "medium": 60, "long": 400}
+TERM_COUNTS = [1_000, 50_000]
+ORDER_COUNTS = [5, 10_000, 1_000_000]
+FAQ_COUNTS = [6, 1_000, 10_000]
+INPUTS = 200
+
+FILLER = ("the my order package was is it when can you please help with shipping return "
+          "arrived yesterday week payment card store account delivery status thanks").split()
+TRIGGERS = ["refund", "frustrated", "terrible", "manager", "stupid", "cancel order", "worst service", "track"]
+STATUSES = ["delivered", "shipped", "processing", "pending", "cancelled"]
+
+
+class Context:
+    """Minimal stand-in for RunContextWrapper as enable_order_tool sees it"""
+
+    def __init__(self, current_input: str):
+        self.current_input = current_input
+
+
+def make_messages(words: int, rng: random.Random) -> List[str]:
+    """Mostly clean messages (full scans); every fourth one carries a trigger term"""
+    messages = []
+    for i in range(INPUTS):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        if i % 4 == 0:
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(TRIGGERS))
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def make_terms(count: int, rng: random.Random) -> List[str]:
+    terms = set()
+    while len(terms) < count:
+        terms.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))))
+    return sorted(terms)
+
+
+def make_faqs(count: int, vocabulary: List[str], rng: random.Random) -> Dict[str, str]:
+    faqs = dict(main.FAQ_DB)
+    while len(faqs) < count:
+        topic = "_".join(rng.choice(vocabulary) for _ in range(2)) + f"_{len(faqs)}"
+        faqs[topic] = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 30))) + "."
+    return faqs
+
+
+def make_orders(count: int) -> Dict[str, Dict[str, str]]:
+    orders = dict(main.ORDERS_DB)
+    for i in range(len(orders), count):
+        status = STATUSES[i % len(STATUSES)]
+        orders[f"ORD{i:09d}"] = {"status": status, "tracking": None, "date": "2025-08-25", "amount": "$89.99"}
+    return orders
+
+
+def per_call_us(func: Callable, inputs: List, repeats: int) -> Tuple[float, float]:
+    """Best and median microseconds per call over repeats, each repeat running at least ~50 ms"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            for value in inputs:
+                func(value)
+        if time.perf_counter() - started >= 0.05:
+            break
+        loops *= 2
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            for value in inputs:
+                func(value)
+        samples.append((time.perf_counter() - started) * 1e6 / (loops * len(inputs)))
+    samples.sort()
+    return samples[0], samples[len(samples) // 2]
+
+
+def cases(rng: random.Random):
+    """Yield (case name, function, inputs, restore callback) for every benchmark case"""
+    messages = {label: make_messages(words, rng) for label, words in MESSAGE_WORDS.items()}
+    contexts = {label: [Context(message) for message in values] for label, values in messages.items()}
+    noop = lambda: None
+
+    for label, values in messages.items():
+        yield f"route_message[len={label}]", main.route_message, values, noop
+        yield f"content_filter_guardrail[len={label}]", main.content_filter_guardrail, values, noop
+        yield f"analyze_sentiment[len={label}]", main.analyze_sentiment, values, noop
+        yield f"should_handoff[len={label}]", main.should_handoff, values, noop
+        yield f"enable_order_tool[len={label}]", lambda ctx: main.enable_order_tool(ctx, None), contexts[label], noop
+
+    offensive, phrases = list(main.OFFENSIVE_WORDS), list(main.NEGATIVE_PHRASES)
+    for count in TERM_COUNTS:
+        main.reload_guardrail_terms(offensive_words=offensive + make_terms(count, rng))
+        yield (f"route_message[terms={count}]", main.route_message, messages["medium"],
+               lambda: main.reload_guardrail_terms(offensive, phrases))
+
+    faq_db = main.FAQ_DB
+    # A wide vocabulary keeps postings lists realistic; queries mix common and rare words
+    vocabulary = FILLER + make_terms(20_000, rng)
+    queries = [" ".join(rng.choice(FILLER if i % 2 else vocabulary) for i in range(rng.randint(3, 10)))
+               for _ in range(INPUTS)]
+    for count in FAQ_COUNTS:
+        main.FAQ_DB = make_faqs(count, vocabulary, rng)
+        main.rebuild_faq_index()
+
+        def restore_faqs():
+            main.FAQ_DB = faq_db
+            main.rebuild_faq_index()
+        yield f"search_faq[faqs={count}]", main.search_faq, queries, restore_faqs
+
+    order_store = main.order_store
+    for count in ORDER_COUNTS:
+        orders = make_orders(count)
+        ids = [rng.choice(list(orders)) for _ in range(INPUTS)] if count < 10_000 else \
+              [f"ORD{rng.randrange(len(main.ORDERS_DB), count):09d}" for _ in range(INPUTS)]
+        main.order_store = CachedOrderStore(InMemoryOrderStore(orders))
+
+        def restore_orders():
+            main.order_store = order_store
+        yield f"get_order_status[orders={count}]", main.get_order_status, ids, restore_orders
+        del orders
+
+
+def run(repeats: int, name_filter: str) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func, inputs, restore in cases(random.Random(11)):
+        try:
+            if name_filter in name:
+                best, median = per_call_us(func, inputs, repeats)
+                results[name] = {"best_us": round(best, 3), "median_us": round(median, 3)}
+                print(f"{name:42} {best:10.2f} {median:10.2f}")
+        finally:
+            restore()
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict, threshold: float) -> List[str]:
+    """Print the change per case against the baseline and return the names that regressed"""
+    regressions = []
+    print(f"\n{'case':42} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, row in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:42} {'-':>10} {row['best_us']:>10.2f} {'new':>8}")
+            continue
+        change = row["best_us"] / before["best_us"] - 1
+        median_change = row["median_us"] / before["median_us"] - 1
+        flag = ""
+        # Both best and median must be slower, so one noisy repeat cannot fail the run
+        if change > threshold and median_change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:42} {before['best_us']:>10.2f} {row['best_us']:>10.2f} {change * 100:>+7.1f}%{flag}")
+    return regressions
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a case is this fraction slower than its baseline (default 0.25)")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    args = parser.parse_args()
+
+    print(f"{'case':42} {'best us':>10} {'median us':>10}")
+    results = run(args.repeats, args.filter)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; run with --save first")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,91 @@
+"""
+Benchmark: logging cost on the request path
+Emits the log lines of a typical order lookup (query received, guardrail
+check, tool invocation, tool result, response) for many requests and
+compares the time spent in the calling thread:
+- sync:    FileHandler + StreamHandler, f-strings with the result dict
+- queued:  configure_logging() (queue + background writer), lazy %-args
+- sampled: queued, with tool INFO lines sampled at 10%
+
+Console output goes to /dev/null so terminal speed does not skew the result.
+
+    python benchmarks/bench_logging.py [requests]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runtime.logging_setup import LOG_FORMAT, SamplingFilter, configure_logging, stop_logging
+
+RESULT = {"order_id": "ORD001", "status": "delivered", "tracking_number": "TRK123456",
+          "order_date": "2025-08-25", "amount": "$89.99", "found": True}
+MESSAGE = "Hi, can you tell me where my order ORD001 is? It was supposed to arrive yesterday."
+
+
+def eager_request(logger, tool_logger):
+    logger.info(f"📥 Processing query from customer {'CUST001'}: '{MESSAGE[:100]}...'")
+    logger.info(f"🛡️ Guardrail check for message: '{MESSAGE[:50]}...'")
+    tool_logger.info(f"🔧 Tool invocation: get_order_status for order_id={'ORD001'}")
+    tool_logger.info(f"[SUCCESS] Order found: {RESULT}")
+    logger.info(f"[SUCCESS] Response generated successfully by {'Customer Support Bot'}")
+
+
+def lazy_request(logger, tool_logger):
+    logger.info("📥 Processing query from customer %s: '%.100s...'", "CUST001", MESSAGE)
+    logger.info("🛡️ Guardrail check for message: '%.50s...'", MESSAGE)
+    tool_logger.info("🔧 Tool invocation: get_order_status for order_id=%s", "ORD001")
+    tool_logger.info("[SUCCESS] Order found: %s (%s)", "ORD001", RESULT["status"])
+    logger.info("[SUCCESS] Response generated successfully by %s", "Customer Support Bot")
+
+
+def sync_setup(log_file: str):
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT,
+                        handlers=[logging.FileHandler(log_file), logging.StreamHandler()])
+
+
+def sync_teardown():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(name: str, requests: int, setup, teardown, emit, sample_rate: float = 1.0):
+    with tempfile.TemporaryDirectory() as directory:
+        setup(os.path.join(directory, "bench.log"))
+        logger = logging.getLogger("bench")
+        tool_logger = logging.getLogger("bench.tools")
+        sampler = SamplingFilter(sample_rate)
+        tool_logger.addFilter(sampler)
+        started = time.perf_counter()
+        for _ in range(requests):
+            emit(logger, tool_logger)
+        caller = time.perf_counter() - started
+        teardown()
+        total = time.perf_counter() - started
+        tool_logger.removeFilter(sampler)
+    print(f"{name:8}: {requests / caller:9.0f} req/s on the request path "
+          f"({caller / requests * 1e6:5.1f} us/request), {total:.2f}s until written")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    sys.stderr = open(os.devnull, "w")
+    try:
+        measure("sync", requests, sync_setup, sync_teardown, eager_request)
+        measure("queued", requests, configure_logging, stop_logging, lazy_request)
+        measure("sampled", requests, configure_logging, stop_logging, lazy_request, sample_rate=0.1)
+    finally:
+        sys.stderr.close()
+        sys.stderr = sys.__stderr__
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: connection reuse for model calls
+Runs the same concurrent load against the local mock server three ways:
+a new client per request, a shared client with keep-alive disabled, and
+the shared pooled client from runtime/model_client.py. Reports latency
+percentiles and how many TCP connections the server accepted.
+
+    python benchmarks/bench_model_client.py [calls] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import AsyncOpenAI
+
+from benchmarks.mock_model_server import start_mock_server
+from runtime.model_client import ModelClientFactory
+
+REQUEST = {"model": "mock", "messages": [{"role": "user", "content": "What is your return policy?"}]}
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def load(get_client, calls: int, concurrency: int, per_request_client: bool = False):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            client = get_client()
+            started = time.perf_counter()
+            try:
+                await client.chat.completions.create(**REQUEST)
+            finally:
+                if per_request_client:
+                    await client.close()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, time.perf_counter() - started
+
+
+async def run(calls: int, concurrency: int):
+    scenarios = [
+        ("client per request", lambda url: ModelClientFactory("mock", url, http2=False)._build, True),
+        ("shared, no keep-alive", lambda url: ModelClientFactory(
+            "mock", url, max_keepalive_connections=0, http2=False).get, False),
+        ("shared pooled client", lambda url: ModelClientFactory(
+            "mock", url, max_keepalive_connections=concurrency, http2=False).get, False),
+    ]
+    for name, make, per_request in scenarios:
+        server, settings, url = start_mock_server(latency=0.02)
+        get_client = make(url)
+        latencies, elapsed = await load(get_client, calls, concurrency, per_request)
+        owner = getattr(get_client, "__self__", None)
+        if not per_request and owner is not None:
+            await owner.shutdown()
+        print(f"{name:22}: {calls / elapsed:7.1f} req/s  p50={percentile(latencies, 0.5) * 1000:6.1f}ms  "
+              f"p99={percentile(latencies, 0.99) * 1000:6.1f}ms  connections={settings.connections}")
+        server.shutdown()
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    asyncio.run(run(calls, concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: order store backends
+Lookup latency and peak RSS for the dict store versus SQLite. Each backend
+runs in its own subprocess so the RSS numbers do not mix. Run from the
+project root (the order count defaults to 10M):
+
+    python benchmarks/bench_order_store.py [order_count]
+"""
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.order_store import InMemoryOrderStore, SQLiteOrderStore
+
+LOOKUPS = 100_000
+STATUSES = ["delivered", "shipped", "processing", "pending", "cancelled"]
+
+
+def generate_orders(count: int):
+    for i in range(count):
+        status = STATUSES[i % len(STATUSES)]
+        tracking = f"TRK{i:09d}" if status in ("delivered", "shipped") else None
+        yield f"ORD{i:09d}", {"status": status, "tracking": tracking, "date": "2025-08-25", "amount": "$89.99"}
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(store, count: int) -> dict:
+    rng = random.Random(5)
+    ids = [f"ORD{rng.randrange(count):09d}" for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for order_id in ids:
+        store.get(order_id)
+    lookup_us = (time.perf_counter() - start) * 1e6 / LOOKUPS
+    return {"lookup_us": lookup_us, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_backend(backend: str, count: int, db_path: str) -> dict:
+    if backend == "memory":
+        start = time.perf_counter()
+        store = InMemoryOrderStore(dict(generate_orders(count)))
+        load_s = time.perf_counter() - start
+    else:
+        store = SQLiteOrderStore(db_path)
+        load_s = 0.0
+    result = measure(store, count)
+    result["load_s"] = load_s
+    return result
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(run_backend(sys.argv[2], int(sys.argv[3]), sys.argv[4])))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "orders.db")
+        start = time.perf_counter()
+        loader = SQLiteOrderStore(db_path)
+        loader.load(generate_orders(count))
+        loader.close()
+        print(f"SQLite load of {count} orders: {time.perf_counter() - start:.1f}s, "
+              f"{os.path.getsize(db_path) / 1e6:.0f} MB on disk")
+
+        print(f"{'backend':>8} {'load s':>8} {'lookup us':>10} {'peak RSS MB':>12}")
+        for backend in ("memory", "sqlite"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", backend, str(count), db_path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{backend:>8} {result['load_s']:>8.1f} {result['lookup_us']:>10.2f} {result['peak_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
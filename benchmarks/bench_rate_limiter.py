@@ -0,0 +1,71 @@
+"""
+Benchmark: client-side rate limiting against a throttling endpoint
+Fires a burst of chat completions at the local mock server, once through
+the bare AsyncOpenAI client (SDK retries on) and once through
+RateLimitedClient. The mock rejects requests beyond CAPACITY concurrent
+ones plus a random `rate_429` fraction. Compares how many requests hit
+the server, how many were throttled and how many calls ultimately failed.
+
+    python benchmarks/bench_rate_limiter.py [calls] [rate_429]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import AsyncOpenAI
+
+from benchmarks.mock_model_server import start_mock_server
+from runtime.rate_limiter import AdaptiveLimiter, RateLimitedClient
+
+CAPACITY = 10
+REQUEST = {"model": "mock", "messages": [{"role": "user", "content": "What is your return policy?"}]}
+
+
+async def burst(client, calls: int) -> tuple:
+    async def one():
+        try:
+            await client.chat.completions.create(**REQUEST)
+            return True
+        except Exception:
+            return False
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(calls)))
+    return sum(results), time.perf_counter() - started
+
+
+async def run(calls: int, rate_429: float):
+    server, settings, url = start_mock_server(latency=0.05, rate_429=rate_429, retry_after=0.2,
+                                               capacity=CAPACITY, seed=1)
+    raw = AsyncOpenAI(api_key="mock", base_url=url, max_retries=2)
+    ok, elapsed = await burst(raw, calls)
+    print(f"bare client    : {ok}/{calls} ok in {elapsed:.2f}s, server saw {settings.requests} requests, "
+          f"{settings.throttled} throttled")
+
+    server.shutdown()
+    server, settings, url = start_mock_server(latency=0.05, rate_429=rate_429, retry_after=0.2,
+                                               capacity=CAPACITY, seed=1)
+    limiter = AdaptiveLimiter(requests_per_minute=6000, tokens_per_minute=10_000_000,
+                              initial_concurrency=16, max_concurrency=64, latency_target=1.0)
+    limited = RateLimitedClient(AsyncOpenAI(api_key="mock", base_url=url, max_retries=0), limiter, max_retries=5)
+    ok, elapsed = await burst(limited, calls)
+    print(f"limited client : {ok}/{calls} ok in {elapsed:.2f}s, server saw {settings.requests} requests, "
+          f"{settings.throttled} throttled")
+    snapshot = limiter.snapshot()
+    print(f"limiter        : limit={snapshot['concurrency_limit']} decreases={snapshot['decreases']} "
+          f"max_queue_depth={snapshot['max_queue_depth']} avg_wait={snapshot['wait_seconds_avg'] * 1000:.0f}ms "
+          f"max_wait={snapshot['wait_seconds_max'] * 1000:.0f}ms")
+    server.shutdown()
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rate_429 = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    asyncio.run(run(calls, rate_429))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark: replay a request corpus through process_customer_query
+Open-loop load: queries are started at the arrival rate whether or not
+earlier ones have finished, against the local mock model server. Reports
+throughput and p50/p95/p99 latency overall, per stage and per agent, and
+writes everything to a JSON file for comparing runs.
+
+The corpus is JSON lines. Each line needs a "message" (falls back to
+"body", then "title"). "customer_id" is optional, with "request_id" as
+the fallback.
+
+    python benchmarks/bench_replay.py --rate 50 --requests 1000 --latency 0.2 \\
+        --output replay.json --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_model_server import start_mock_server
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "support_queries.jsonl")
+
+
+def load_corpus(path: str) -> List[Dict[str, Optional[str]]]:
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            message = record.get("message") or record.get("body") or record.get("title")
+            if message:
+                corpus.append({"message": message,
+                               "customer_id": record.get("customer_id") or record.get("request_id")})
+    if not corpus:
+        raise SystemExit(f"No messages found in {path}")
+    return corpus
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    pick = lambda fraction: round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+    return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(ordered[-1], 3)}
+
+
+class EventCollector:
+    """Stands in for main.event_log and keeps the structured events in memory"""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+
+
+async def replay(main, corpus, args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    collector = EventCollector()
+    main.event_log = collector
+    latencies: List[float] = []
+    lag: List[float] = []
+    tasks = []
+
+    async def one(item, scheduled: float):
+        lag.append((time.perf_counter() - scheduled) * 1000)
+        await main.process_customer_query(item["message"], customer_id=item["customer_id"])
+        # Measured from the scheduled arrival, so event-loop backlog counts as latency
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+
+    await main.model_clients.startup()
+    started = time.perf_counter()
+    next_arrival = started
+    try:
+        for i in range(args.requests):
+            item = corpus[i % len(corpus)] if not args.shuffle else rng.choice(corpus)
+            gap = rng.expovariate(args.rate) if args.poisson else 1.0 / args.rate
+            next_arrival += gap
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one(item, next_arrival)))
+        await asyncio.gather(*tasks)
+    finally:
+        await main.model_clients.shutdown()
+    elapsed = time.perf_counter() - started
+
+    stages: Dict[str, List[float]] = {}
+    agents: Dict[str, List[float]] = {}
+    for event in collector.events:
+        for stage, value in event["timings"].items():
+            stages.setdefault(stage[:-3] if stage.endswith("_ms") else stage, []).append(value)
+        agents.setdefault(event["agent_used"], []).append(event["timings"]["total_ms"])
+
+    events = collector.events
+    return {
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "completed": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "latency_ms": percentiles(latencies),
+        "scheduling_lag_ms": percentiles(lag),
+        "stages_ms": {stage: percentiles(values) for stage, values in sorted(stages.items())},
+        "agents_ms": {agent: percentiles(values) for agent, values in sorted(agents.items())},
+        "outcomes": {
+            "errors": sum(not event["success"] for event in events),
+            "filtered": sum(bool(event["filtered"]) for event in events),
+            "handoffs": sum(bool(event["handoff"]) for event in events),
+            "cache_hits": sum(bool(event["cache_hit"]) for event in events),
+            "deadline_exceeded": sum(bool(event["deadline_exceeded"]) for event in events),
+            "degraded": sum(bool(event["degraded"]) for event in events),
+        },
+        "runtime": main.runtime_metrics(),
+    }
+
+
+def print_report(results: Dict[str, Any]):
+    latency = results["latency_ms"]
+    print(f"completed {results['completed']} in {results['elapsed_s']}s -> {results['throughput_rps']} req/s")
+    print(f"latency ms: p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+    print(f"outcomes: {results['outcomes']}")
+    for title, rows in (("stage", results["stages_ms"]), ("agent", results["agents_ms"])):
+        print(f"\n{title:30} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for name, row in rows.items():
+            print(f"{name:30} {row['count']:>6} {row['p50']:>9} {row['p95']:>9} {row['p99']:>9}")
+
+
+def print_comparison(results: Dict[str, Any], baseline: Dict[str, Any]):
+    print("\nchange vs baseline (p95):")
+    rows = [("throughput_rps", baseline["throughput_rps"], results["throughput_rps"])]
+    rows.append(("latency", baseline["latency_ms"].get("p95"), results["latency_ms"].get("p95")))
+    for group in ("stages_ms", "agents_ms"):
+        for name, row in results[group].items():
+            before = baseline.get(group, {}).get(name, {}).get("p95")
+            rows.append((f"{group[:-3]}:{name}", before, row.get("p95")))
+    for name, before, after in rows:
+        if before:
+            print(f"  {name:36} {before:>10} -> {after:<10} ({(after - before) / before * 100:+.1f}%)")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--rate", type=float, default=50.0, help="arrivals per second")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival gaps")
+    parser.add_argument("--shuffle", action="store_true", help="sample the corpus instead of cycling it")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--no-cache", action="store_true", help="disable the response caches")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="replay_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    server, settings, url = start_mock_server(latency=args.latency, jitter=args.jitter, slow_rate=args.slow_rate,
+                                              slow_latency=args.slow_latency, rate_429=args.rate_429, seed=args.seed)
+    os.environ.update({
+        "GEMINI_API_KEY": "mock", "GEMINI_BASE_PATH": url, "GEMINI_MODEL_NAME": "mock",
+        "EVENT_LOG_PATH": "", "TOOL_LOG_SAMPLE_RATE": "0",
+    })
+    if args.no_cache:
+        os.environ.update({"RESPONSE_CACHE_SIZE": "0", "SEMANTIC_CACHE_SIZE": "0"})
+
+    import main  # reads the environment above at import time
+    if main.model_clients.base_url != url:
+        sys.exit(f"Model client points at {main.model_clients.base_url}, not the mock server")
+    logging.getLogger().setLevel(logging.WARNING)
+
+    corpus = load_corpus(args.corpus)
+    results = asyncio.run(replay(main, corpus, args))
+    results["config"] = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    results["mock_server"] = {"requests": settings.requests, "throttled": settings.throttled,
+                              "connections": settings.connections}
+    server.shutdown()
+
+    print_report(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nresults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main_()
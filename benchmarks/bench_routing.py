@@ -0,0 +1,170 @@
+"""
+Benchmark: routing engine versus the separate per-message checks
+Before the routing engine, each message went through three functions:
+should_handoff (which also called analyze_sentiment),
+content_filter_guardrail and enable_order_tool. Each one lowercased the
+message and scanned its own keyword list. This compares those separate
+checks, kept here as reference implementations, with a single
+RoutingEngine.route() call. Every decision is first checked to be
+identical over a randomized corpus plus the replay corpus. Then messages
+per second are reported on the replay corpus and on mostly clean
+synthetic messages at three lengths. route() is timed uncached and as a
+memo hit, which is what the order-tool gate gets during a run.
+
+    python benchmarks/bench_routing.py [messages]
+"""
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guardrails.routing import NEGATIVE_PHRASE, OFFENSIVE, ORDER_LOOKUP_HINT, RoutingEngine
+
+os.environ.update({
+    "GEMINI_API_KEY": "bench", "GEMINI_BASE_PATH": "http://127.0.0.1:9/v1", "GEMINI_MODEL_NAME": "bench",
+    "EVENT_LOG_PATH": "",
+})
+
+import main  # noqa: E402  (reads the environment above at import time)
+
+logging.disable(logging.CRITICAL)
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "support_queries.jsonl")
+MESSAGE_WORDS = {"short": 8, "medium": 60, "long": 400}
+FILLER = ("the my package was is it when can you please help with shipping return arrived "
+          "yesterday week payment card store account thanks").split()
+# Verification filler also carries substring traps and mixed case
+TRICKY_FILLER = FILLER + "Record ORDER hated Worst".split()
+# Substring indicator list analyze_sentiment used before the lexicon scorer; the engine
+# still supports it when built without a scorer, which is the mode compared here
+NEGATIVE_INDICATORS = [
+    "frustrated", "angry", "upset", "disappointed", "terrible", "awful",
+    "worst", "horrible", "unacceptable", "ridiculous", "stupid", "useless",
+    "refund", "cancel", "complaint", "manager"
+]
+TRIGGERS = ["refund", "frustrated", "terrible", "manager", "stupid", "cancel order", "worst service", "track"]
+
+
+def legacy_filter(message: str):
+    if not message:
+        return None
+    message_lower = message.lower()
+    for index, term in enumerate(main.OFFENSIVE_WORDS + main.NEGATIVE_PHRASES):
+        if term in message_lower:
+            return (OFFENSIVE if index < len(main.OFFENSIVE_WORDS) else NEGATIVE_PHRASE), term
+    return None
+
+
+def legacy_sentiment(message: str) -> str:
+    message_lower = message.lower()
+    negative_count = sum(1 for word in NEGATIVE_INDICATORS if word in message_lower)
+    return "very_negative" if negative_count >= 2 else "negative" if negative_count >= 1 else "neutral"
+
+
+def legacy_handoff(message: str):
+    message_lower = message.lower()
+    for keyword in main.COMPLEX_KEYWORDS:
+        if keyword in message_lower:
+            return True, f"Complex query detected: {keyword}"
+    sentiment = legacy_sentiment(message)
+    if sentiment in ["negative", "very_negative"]:
+        return True, f"Negative sentiment detected: {sentiment}"
+    if len(message) > 300:
+        return True, "Long complex message requiring human attention"
+    return False, ""
+
+
+def legacy_order_tool(message: str) -> bool:
+    return bool(message) and any(keyword in message.lower() for keyword in main.ORDER_KEYWORDS)
+
+
+def legacy(message: str):
+    return legacy_handoff(message), legacy_filter(message), legacy_order_tool(message)
+
+
+def make_tricky_messages(count: int, words: int, rng: random.Random):
+    """Messages with 0-3 terms from any family inserted, some upper-cased"""
+    terms = (main.OFFENSIVE_WORDS + main.NEGATIVE_PHRASES + main.COMPLEX_KEYWORDS
+             + NEGATIVE_INDICATORS + main.ORDER_KEYWORDS)
+    messages = []
+    for i in range(count):
+        tokens = [rng.choice(TRICKY_FILLER) for _ in range(words)]
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            term = rng.choice(terms)
+            tokens.insert(rng.randrange(len(tokens) + 1), term.upper() if i % 7 == 0 else term)
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def make_messages(count: int, words: int, rng: random.Random):
+    """Mostly clean messages; every fourth one carries a trigger term"""
+    messages = []
+    for i in range(count):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        if i % 4 == 0:
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(TRIGGERS))
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def load_corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        return [json.loads(line)["message"] for line in f if line.strip()]
+
+
+def verify(engine: RoutingEngine, rng: random.Random) -> int:
+    messages = load_corpus() + ["", "ORD", "record", "İstanbul order", "x" * 301]
+    for words in (1, 3, 8, 60, 400):
+        messages += make_tricky_messages(2_000, words, rng)
+    for message in messages:
+        decision = engine.route(message)
+        got = ((decision.needs_handoff, decision.handoff_reason),
+               (decision.filter_kind, decision.filter_term) if decision.filtered else None,
+               ORDER_LOOKUP_HINT in decision.tool_hints)
+        assert got == legacy(message), (message, got, legacy(message))
+        assert decision.sentiment == legacy_sentiment(message), message
+    return len(messages)
+
+
+def rate(func, messages) -> float:
+    started = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def main_():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(3)
+    lists = (main.OFFENSIVE_WORDS, main.NEGATIVE_PHRASES, main.COMPLEX_KEYWORDS, main.ORDER_KEYWORDS)
+    uncached = RoutingEngine(*lists, negative_indicators=NEGATIVE_INDICATORS, cache_size=0)
+    cached = RoutingEngine(*lists, negative_indicators=NEGATIVE_INDICATORS, cache_size=count)
+    print(f"verified identical decisions on {verify(uncached, rng)} messages ({len(uncached)} distinct terms)")
+    # A long moderation list switches the engine to the automaton; check that path too
+    offensive = list(main.OFFENSIVE_WORDS)
+    main.reload_guardrail_terms(offensive_words=offensive + [f"badword{i}" for i in range(200)])
+    try:
+        large = RoutingEngine(main.OFFENSIVE_WORDS, *lists[1:], negative_indicators=NEGATIVE_INDICATORS,
+                              cache_size=0)
+        print(f"verified identical decisions on {verify(large, rng)} messages ({len(large)} distinct terms)")
+    finally:
+        main.reload_guardrail_terms(offensive_words=offensive)
+
+    corpora = [("replay", (load_corpus() * (count // 30 + 1))[:count])]
+    corpora += [(label, make_messages(count, words, rng)) for label, words in MESSAGE_WORDS.items()]
+    print(f"{'corpus':>8} {'separate msg/s':>15} {'route msg/s':>12} {'speedup':>8} {'memo hit msg/s':>15}")
+    for label, messages in corpora:
+        separate = rate(legacy, messages)
+        routed = rate(uncached.route, messages)
+        for message in messages:
+            cached.route(message)
+        memo = rate(cached.route, messages)
+        print(f"{label:>8} {separate:>15,.0f} {routed:>12,.0f} {routed / separate:>7.1f}x {memo:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,55 @@
+"""
+Benchmark: semantic cache lookup
+Embedding and nearest-neighbour lookup latency with 100k cached entries.
+Run from the project root:
+
+    python benchmarks/bench_semantic_cache.py [entries]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runtime.semantic_cache import SemanticCache
+
+LOOKUPS = 200
+
+
+def random_query(rng: random.Random) -> str:
+    return " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+                    for _ in range(rng.randint(3, 8)))
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(9)
+    cache = SemanticCache(max_entries=entries)
+    if not cache.available:
+        print("NumPy is not installed; the semantic cache is disabled")
+        return
+
+    queries = [random_query(rng) for _ in range(entries)]
+    start = time.perf_counter()
+    for query in queries:
+        cache.add(query, {"response": query})
+    fill_s = time.perf_counter() - start
+
+    probes = [rng.choice(queries) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    vectors = [cache.embed(probe) for probe in probes]
+    embed_us = (time.perf_counter() - start) * 1e6 / LOOKUPS
+
+    start = time.perf_counter()
+    hits = sum(cache.lookup(probe, vector) is not None for probe, vector in zip(probes, vectors))
+    lookup_ms = (time.perf_counter() - start) * 1000 / LOOKUPS
+
+    matrix_mb = entries * cache.vectorizer.dim * 4 / 1e6
+    print(f"entries={entries} dim={cache.vectorizer.dim} matrix={matrix_mb:.0f} MB fill={fill_s:.1f}s")
+    print(f"embed: {embed_us:.0f} us/query, lookup: {lookup_ms:.2f} ms/query, self-hit rate: {hits / LOOKUPS:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: lexicon sentiment scorer versus substring indicator counts
+1. Labels on hand-written messages. Some are substring traps
+   ("cancellation policy"), negations and plain complaints. The table
+   shows which of them each method would hand off to a human.
+2. Sentiment-driven handoffs over the replay corpus.
+3. Microseconds per message at three message lengths.
+4. Batch scoring of archived transcripts: score() in a loop versus the
+   vectorized score_batch(). The two are checked to agree first.
+
+    python benchmarks/bench_sentiment.py [transcripts]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guardrails.sentiment import DEFAULT_LEXICON, SentimentScorer
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "support_queries.jsonl")
+
+# analyze_sentiment's indicator list before the lexicon scorer
+NEGATIVE_INDICATORS = [
+    "frustrated", "angry", "upset", "disappointed", "terrible", "awful",
+    "worst", "horrible", "unacceptable", "ridiculous", "stupid", "useless",
+    "refund", "cancel", "complaint", "manager"
+]
+
+# (message, label a support lead would give it)
+LABELLED = [
+    ("What is your cancellation policy for subscriptions?", "neutral"),
+    ("Can I cancel my newsletter signup?", "neutral"),
+    ("Who is the store manager at the Chicago location?", "neutral"),
+    ("How long does a refund take to reach my card?", "neutral"),
+    ("I'm not upset, just checking where order ORD002 is", "neutral"),
+    ("The delivery was not bad at all, thanks!", "neutral"),
+    ("Is the warranty useless if I open the box?", "neutral"),
+    ("I am not happy with this order at all", "negative"),
+    ("This is unacceptable, my package is two weeks late", "very_negative"),
+    ("I'm frustrated and angry, nobody answers my emails", "very_negative"),
+    ("Really disappointed with the quality", "negative"),
+    ("Your service is horrible", "very_negative"),
+    ("Great service, thank you so much!", "neutral"),
+]
+
+FILLER = ("the my package was is it when can you please help with shipping return arrived "
+          "yesterday week payment card store account thanks order status").split()
+TRIGGERS = list(DEFAULT_LEXICON) + ["not", "never", "don't"]
+
+
+def legacy_sentiment(message: str) -> str:
+    message_lower = message.lower()
+    negative_count = sum(1 for word in NEGATIVE_INDICATORS if word in message_lower)
+    return "very_negative" if negative_count >= 2 else "negative" if negative_count >= 1 else "neutral"
+
+
+def make_messages(count: int, words: int, rng: random.Random):
+    messages = []
+    for i in range(count):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        for _ in range(rng.choice((0, 0, 1, 2))):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(TRIGGERS))
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def per_message_us(func, messages) -> float:
+    started = time.perf_counter()
+    for message in messages:
+        func(message)
+    return (time.perf_counter() - started) * 1e6 / len(messages)
+
+
+def main():
+    transcripts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scorer = SentimentScorer()
+    rng = random.Random(5)
+
+    print(f"{'message':56} {'expected':>13} {'substring':>13} {'lexicon':>13}")
+    wrong = {"substring": 0, "lexicon": 0}
+    for message, expected in LABELLED:
+        old, new = legacy_sentiment(message), scorer.classify(message)[0]
+        wrong["substring"] += old != expected
+        wrong["lexicon"] += new != expected
+        print(f"{message[:56]:56} {expected:>13} {old:>13} {new:>13}")
+    print(f"mislabelled: substring {wrong['substring']}/{len(LABELLED)}, lexicon {wrong['lexicon']}/{len(LABELLED)}")
+
+    with open(CORPUS, encoding="utf-8") as f:
+        replay = [json.loads(line)["message"] for line in f if line.strip()]
+    old = sum(legacy_sentiment(message) != "neutral" for message in replay)
+    new = sum(scorer.classify(message)[0] != "neutral" for message in replay)
+    print(f"\nreplay corpus: {old} -> {new} of {len(replay)} messages flagged negative")
+
+    print(f"\n{'words':>6} {'substring us':>13} {'lexicon us':>11}")
+    for words in (8, 60, 400):
+        messages = make_messages(5_000, words, rng)
+        print(f"{words:>6} {per_message_us(legacy_sentiment, messages):>13.2f} "
+              f"{per_message_us(scorer.score, messages):>11.2f}")
+
+    archive = make_messages(transcripts, 60, rng)
+    started = time.perf_counter()
+    looped = [scorer.score(message) for message in archive]
+    loop_s = time.perf_counter() - started
+    started = time.perf_counter()
+    batch = scorer.score_batch(archive)
+    batch_s = time.perf_counter() - started
+    assert np.allclose(batch, looped), "score_batch disagrees with score"
+    labels = scorer.sentiment_batch(archive)
+    print(f"\n{transcripts} archived messages: score() loop {loop_s:.2f}s, score_batch {batch_s:.2f}s "
+          f"({loop_s / batch_s:.1f}x); {int((labels != 'neutral').sum())} flagged negative")
+
+
+if __name__ == "__main__":
+    main()
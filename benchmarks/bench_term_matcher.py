@@ -0,0 +1,72 @@
+"""
+Benchmark: guardrail term matching
+Compares the per-term `in` loop against the compiled TermMatcher at
+10, 1k and 50k terms. Run from the project root:
+
+    python benchmarks/bench_term_matcher.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guardrails.term_matcher import TermMatcher
+
+TERM_COUNTS = [10, 1_000, 50_000]
+MESSAGE_COUNT = 200
+
+
+def make_terms(count: int, rng: random.Random) -> list:
+    terms = set()
+    while len(terms) < count:
+        length = rng.randint(4, 12)
+        terms.add("".join(rng.choice(string.ascii_lowercase) for _ in range(length)))
+    return sorted(terms)
+
+
+def make_messages(terms: list, rng: random.Random) -> list:
+    messages = []
+    for i in range(MESSAGE_COUNT):
+        words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 8)))
+                 for _ in range(rng.randint(10, 40))]
+        if i % 4 == 0:
+            words.insert(rng.randrange(len(words)), rng.choice(terms))
+        messages.append(" ".join(words))
+    return messages
+
+
+def loop_scan(terms: list, message: str) -> list:
+    return [index for index, term in enumerate(terms) if term in message]
+
+
+def timed(func, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return (time.perf_counter() - start) / len(messages)
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'terms':>8} {'build ms':>10} {'loop us/msg':>12} {'matcher us/msg':>15} {'speedup':>8}")
+    for count in TERM_COUNTS:
+        terms = make_terms(count, rng)
+        messages = make_messages(terms, rng)
+
+        start = time.perf_counter()
+        matcher = TermMatcher(terms)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for message in messages:
+            assert loop_scan(terms, message) == matcher.matched_indexes(message)
+
+        loop_us = timed(lambda m: loop_scan(terms, m), messages) * 1e6
+        matcher_us = timed(matcher.matched_indexes, messages) * 1e6
+        print(f"{count:>8} {build_ms:>10.1f} {loop_us:>12.1f} {matcher_us:>15.1f} {loop_us / matcher_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
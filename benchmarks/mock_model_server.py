@@ -0,0 +1,209 @@
+"""
+Local mock of the OpenAI-compatible chat-completions endpoint
+Used by the benchmarks to exercise the model client without a real API key.
+
+    python benchmarks/mock_model_server.py --port 8765 --latency 0.2 --rate-429 0.1
+
+Point GEMINI_BASE_PATH at http://127.0.0.1:<port>/v1 to use it. Behaviour:
+- waits `latency` seconds (+/- `jitter`) before answering, or `slow_latency`
+  seconds for a `slow_rate` fraction of requests (a latency tail)
+- answers 429 with a Retry-After header for a `rate_429` fraction of requests,
+  and for every request beyond `capacity` concurrent ones (0 = unlimited)
+- calls get_order_status once when the user message names an ORD id and
+  the tool is offered, then echoes the tool result
+- supports stream=True with server-sent events, ending with a usage chunk
+  when stream_options.include_usage is set
+"""
+import argparse
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+ORDER_ID = re.compile(r"ORD\d+", re.IGNORECASE)
+
+
+class MockSettings:
+    def __init__(self, latency: float = 0.1, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: float = 0.5, capacity: int = 0, slow_rate: float = 0.0,
+                 slow_latency: float = 2.0, seed: int = 0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.capacity = capacity
+        self.active = 0
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.connections = 0
+
+    def delay(self) -> float:
+        with self.lock:
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                return self.slow_latency
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def should_throttle(self) -> bool:
+        """Count the request and decide whether to reject it; admitted requests must call done()"""
+        with self.lock:
+            self.requests += 1
+            over_capacity = self.capacity and self.active >= self.capacity
+            if over_capacity or self.random.random() < self.rate_429:
+                self.throttled += 1
+                return True
+            self.active += 1
+            return False
+
+    def done(self) -> None:
+        with self.lock:
+            self.active -= 1
+
+
+def build_reply(body: Dict[str, Any]) -> Dict[str, Any]:
+    messages = body.get("messages", [])
+    user = next((m.get("content") or "" for m in messages if m.get("role") == "user"), "")
+    offered = {tool["function"]["name"] for tool in body.get("tools", [])}
+    tool_results = [m for m in messages if m.get("role") == "tool"]
+    match = ORDER_ID.search(user)
+    if match and "get_order_status" in offered and not tool_results:
+        return {"role": "assistant", "content": None, "tool_calls": [{
+            "id": "call_1", "type": "function",
+            "function": {"name": "get_order_status", "arguments": json.dumps({"order_id": match.group()})},
+        }]}
+    if tool_results:
+        return {"role": "assistant", "content": f"Here is what I found: {tool_results[-1]['content']}"}
+    return {"role": "assistant", "content": f"Thanks for reaching out! You asked: {user}"}
+
+
+def make_handler(settings: MockSettings):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; without this Nagle stalls keep-alive replies
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with settings.lock:
+                settings.connections += 1
+
+        def _send_json(self, status: int, payload: Dict[str, Any], headers: Tuple = ()):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_event(self, payload: str):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if settings.should_throttle():
+                self._send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                                (("Retry-After", str(settings.retry_after)),))
+                return
+            try:
+                self._respond(body)
+            finally:
+                settings.done()
+
+        def _respond(self, body: Dict[str, Any]):
+            time.sleep(settings.delay())
+            reply = build_reply(body)
+            base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": body.get("model", "mock")}
+            prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+            usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": 20,
+                     "total_tokens": prompt_chars // 4 + 20}
+
+            if not body.get("stream"):
+                self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                    {"index": 0, "message": reply, "finish_reason": "tool_calls" if reply.get("tool_calls") else "stop"}
+                ]})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunk = {**base, "object": "chat.completion.chunk"}
+            if reply.get("tool_calls"):
+                call = reply["tool_calls"][0]
+                self._send_event(json.dumps({**chunk, "choices": [{"index": 0, "delta": {"role": "assistant", "tool_calls": [
+                    {"index": 0, "id": call["id"], "type": "function",
+                     "function": {"name": call["function"]["name"], "arguments": call["function"]["arguments"]}}
+                ]}}]}))
+            else:
+                words = reply["content"].split(" ")
+                for position, word in enumerate(words):
+                    text = word if position == 0 else " " + word
+                    self._send_event(json.dumps({**chunk, "choices": [{"index": 0, "delta": {"content": text}}]}))
+            self._send_event(json.dumps({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._send_event(json.dumps({**chunk, "choices": [], "usage": usage}))
+            self._send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections under benchmark bursts
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients cancelling hedged or timed-out calls hang up mid-reply; that is expected here
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_mock_server(port: int = 0, **settings_kwargs) -> Tuple[MockServer, MockSettings, str]:
+    """Start the mock in a daemon thread; returns (server, settings, base_url)"""
+    settings = MockSettings(**settings_kwargs)
+    server = MockServer(("127.0.0.1", port), make_handler(settings))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, settings, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--capacity", type=int, default=0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    args = parser.parse_args()
+    server, _, url = start_mock_server(args.port, latency=args.latency, jitter=args.jitter,
+                                       rate_429=args.rate_429, retry_after=args.retry_after,
+                                       capacity=args.capacity, slow_rate=args.slow_rate,
+                                       slow_latency=args.slow_latency)
+    print(f"Mock model server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Chainlit front end for the Smart Customer Support Bot
+Streams the agent's response token by token
+
+Run with: chainlit run chainlit_app.py
+"""
+import chainlit as cl
+
+from main import process_customer_query_stream
+
+
+@cl.on_message
+async def on_message(message: cl.Message):
+    """Relay each streamed chunk to the browser as soon as it arrives"""
+    reply = cl.Message(content="")
+    customer_id = cl.user_session.get("id")
+
+    async for event in process_customer_query_stream(message.content, customer_id=customer_id):
+        if event["type"] == "delta":
+            await reply.stream_token(event["text"])
+        elif event["type"] == "replace":
+            # Output guardrail rejected the response mid-stream
+            reply.content = event["text"]
+            await reply.update()
+        else:
+            data = event["data"]
+            if not reply.content:
+                reply.content = data["response"]
+            if data.get("handoff_occurred"):
+                reply.author = data["agent_used"]
+
+    await reply.send()
@@ -0,0 +1,36 @@
+"""
+Process-wide model clients
+The pooled HTTP client and the rate limiter in front of it are built here
+once, from the GEMINI_* and MODEL_* environment variables. main.py and
+gemini_config.py both import them, so every agent in the process shares
+one connection pool and one request/token budget.
+"""
+from dotenv import load_dotenv, find_dotenv
+import os
+
+from runtime.model_client import ModelClientFactory, SharedModelClient
+from runtime.rate_limiter import AdaptiveLimiter, RateLimitedClient
+
+# Variables already set in the environment win over .env, so benchmarks and
+# deployments can point the clients elsewhere without editing the file
+load_dotenv(find_dotenv())
+
+gemini_api_key = os.getenv("GEMINI_API_KEY")
+gemini_base_url = os.getenv("GEMINI_BASE_PATH")
+gemini_model_name = os.getenv("GEMINI_MODEL_NAME")
+
+# Client-side throttling: request/token budgets plus adaptive concurrency.
+# The SDK's own retries are off so 429s are retried by the limiter after a shared pause.
+MODEL_LIMITER = AdaptiveLimiter(
+    requests_per_minute=float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "600")),
+    tokens_per_minute=float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000")),
+    initial_concurrency=int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "8")),
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "64")),
+    latency_target=float(os.getenv("GEMINI_LATENCY_TARGET", "10"))
+)
+
+# One pooled HTTP client per process; call MODEL_CLIENTS.startup()/shutdown() around the app's lifetime
+MODEL_CLIENTS = ModelClientFactory.from_env(gemini_api_key, gemini_base_url, max_retries=0)
+
+# What the agents' models are given: the shared client behind the shared limiter
+MODEL_CLIENT = RateLimitedClient(SharedModelClient(MODEL_CLIENTS), MODEL_LIMITER)
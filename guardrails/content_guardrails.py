@@ -2,10 +2,14 @@
 Guardrails for Customer Support Bot
 Following teacher's pattern for input/output guardrails
 """
-from typing import Optional, Any, Callable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Optional, Any, Callable, Iterable, Iterator, List, Tuple
 import logging
 import re
 
+from guardrails.term_matcher import TermMatch, TermMatcher
+
 # Simple guardrail decorator to replace the missing import
 def guardrail(description: str = "") -> Callable:
     """Simple decorator to mark functions as guardrails"""
@@ -34,43 +38,87 @@ NEGATIVE_PHRASES = [
     "hate this company", "worst experience"
 ]
 
+# Single automaton over both lists, rebuilt by reload_filter_terms()
+_filter_matcher = TermMatcher(OFFENSIVE_WORDS + NEGATIVE_PHRASES)
+
+def reload_filter_terms(offensive_words: Optional[List[str]] = None,
+                        negative_phrases: Optional[List[str]] = None,
+                        quiet: bool = False) -> None:
+    """Swap in new moderation lists and recompile the matcher"""
+    global OFFENSIVE_WORDS, NEGATIVE_PHRASES, _filter_matcher
+    if offensive_words is not None:
+        OFFENSIVE_WORDS = list(offensive_words)
+    if negative_phrases is not None:
+        NEGATIVE_PHRASES = list(negative_phrases)
+    _filter_matcher = TermMatcher(OFFENSIVE_WORDS + NEGATIVE_PHRASES)
+    if not quiet:
+        logger.info("Guardrail matcher rebuilt with %s terms", len(_filter_matcher))
+
+def find_filter_terms(message: str) -> List[TermMatch]:
+    """Return every offensive word / negative phrase hit and its position"""
+    return _filter_matcher.find_all(message.lower())
+
+OFFENSIVE_RESPONSE = "I understand you might be frustrated, but let's keep our conversation respectful. How can I help you resolve your issue today?"
+NEGATIVE_RESPONSE = "I'm sorry to hear you're having a difficult experience. Let me connect you with someone who can help make this right for you."
+SHOUTING_RESPONSE = "I can see this is important to you. Let me help you resolve this issue. Could you please provide more details about your concern?"
+OUTPUT_REWRITE_RESPONSE = "I want to help you with your request. Let me check what options are available or connect you with someone who can better assist you."
+
+# Responses that should never reach a customer
+INAPPROPRIATE_RESPONSES = [
+    "i don't know", "i can't help", "that's not my job",
+    "figure it out yourself", "not my problem"
+]
+
+def _input_verdict(user_message: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Pure input check shared by the single and batch guardrails.
+    Returns (response, reason) where reason is only used for logging.
+    """
+    if not user_message:
+        return None, None
+    
+    # One pass over the message finds hits from both lists; the lowest index
+    # wins so offensive words still take priority over negative phrases
+    matcher = _filter_matcher
+    hits = matcher.matched_indexes(user_message.lower())
+    if hits:
+        term = matcher.terms[hits[0]]
+        if hits[0] < len(OFFENSIVE_WORDS):
+            return OFFENSIVE_RESPONSE, f"Offensive language detected: '{term}'"
+        return NEGATIVE_RESPONSE, f"Negative phrase detected: '{term}'"
+    
+    # Check for excessive caps (might indicate shouting/anger)
+    caps_ratio = sum(1 for c in user_message if c.isupper()) / len(user_message)
+    if caps_ratio > 0.6 and len(user_message) > 10:
+        return SHOUTING_RESPONSE, "Excessive capitals detected (possible shouting)"
+    
+    return None, None
+
+def _output_verdict(response: str) -> Tuple[Optional[str], Optional[str]]:
+    """Pure output check shared by the single and batch guardrails"""
+    response_lower = response.lower()
+    for inappropriate in INAPPROPRIATE_RESPONSES:
+        if inappropriate in response_lower:
+            return OUTPUT_REWRITE_RESPONSE, f"Inappropriate response detected: '{inappropriate}'"
+    return None, None
+
 @guardrail(description="Block or rephrase negative/offensive user input")
 def content_filter_guardrail(ctx: RunContextWrapper) -> Optional[str]:
     """
     Input guardrail to check for offensive or overly negative language
     Following teacher's guardrail pattern
     """
-    # Get user message from context
-    user_message = ""
-    if hasattr(ctx, 'context') and ctx.context:
-        user_message = ctx.context.get("user_message", "")
+    user_message = _context_message(ctx)
     
     if not user_message:
         return None
         
-    logger.info(f"Guardrail check for message: '{user_message[:50]}...'")
-    
-    message_lower = user_message.lower()
-    
-    # Check for offensive words
-    for word in OFFENSIVE_WORDS:
-        if word in message_lower:
-            logger.warning(f"Offensive language detected: '{word}'")
-            return f"I understand you might be frustrated, but let's keep our conversation respectful. How can I help you resolve your issue today?"
-    
-    # Check for negative phrases
-    for phrase in NEGATIVE_PHRASES:
-        if phrase in message_lower:
-            logger.warning(f"Negative phrase detected: '{phrase}'")
-            return f"I'm sorry to hear you're having a difficult experience. Let me connect you with someone who can help make this right for you."
-    
-    # Check for excessive caps (might indicate shouting/anger)
-    caps_ratio = sum(1 for c in user_message if c.isupper()) / len(user_message) if user_message else 0
-    if caps_ratio > 0.6 and len(user_message) > 10:
-        logger.warning("Excessive capitals detected (possible shouting)")
-        return "I can see this is important to you. Let me help you resolve this issue. Could you please provide more details about your concern?"
+    logger.info("Guardrail check for message: '%.50s...'", user_message)
     
-    return None
+    verdict, reason = _input_verdict(user_message)
+    if verdict:
+        logger.warning(reason)
+    return verdict
 
 @guardrail(description="Filter output to ensure professional responses")  
 def output_filter_guardrail(ctx: RunContextWrapper, response: str) -> Optional[str]:
@@ -80,18 +128,10 @@ def output_filter_guardrail(ctx: RunContextWrapper, response: str) -> Optional[s
     """
     logger.info("Output guardrail check")
     
-    response_lower = response.lower()
-    
-    # Check if response contains any inappropriate content
-    inappropriate_responses = [
-        "i don't know", "i can't help", "that's not my job",
-        "figure it out yourself", "not my problem"
-    ]
-    
-    for inappropriate in inappropriate_responses:
-        if inappropriate in response_lower:
-            logger.warning(f"Inappropriate response detected: '{inappropriate}'")
-            return "I want to help you with your request. Let me check what options are available or connect you with someone who can better assist you."
+    verdict, reason = _output_verdict(response)
+    if verdict:
+        logger.warning(reason)
+        return verdict
     
     # Ensure response doesn't sound too robotic
     if response.count("I am") > 3 or response.count("I can") > 3:
@@ -99,3 +139,104 @@ def output_filter_guardrail(ctx: RunContextWrapper, response: str) -> Optional[s
         # Could implement response rewriting here
     
     return None  # Allow response to proceed
+
+class StreamingOutputFilter:
+    """
+    Incremental output_filter_guardrail for streamed responses.
+
+    feed() checks each new chunk together with a lookback window one
+    character shorter than the longest inappropriate phrase, so a phrase
+    split across chunks is still caught. The same window is held back
+    from the caller until more text arrives, which means no part of a
+    blocked phrase is ever emitted. Once a phrase is seen every later
+    call returns the replacement verdict.
+    """
+
+    def __init__(self, phrases: Optional[List[str]] = None):
+        self.phrases = [phrase.lower() for phrase in (phrases or INAPPROPRIATE_RESPONSES)]
+        self.lookback = max((len(phrase) for phrase in self.phrases), default=1) - 1
+        self.verdict: Optional[str] = None
+        self._held = ""
+        self._tail_lower = ""
+
+    def feed(self, chunk: str) -> Tuple[str, Optional[str]]:
+        """Return (text safe to emit now, verdict); verdict is set once the stream must be replaced"""
+        if self.verdict:
+            return "", self.verdict
+        window = self._tail_lower + chunk.lower()
+        for phrase in self.phrases:
+            if phrase in window:
+                logger.warning("Inappropriate response detected in stream: '%s'", phrase)
+                self.verdict = OUTPUT_REWRITE_RESPONSE
+                self._held = ""
+                return "", self.verdict
+        self._tail_lower = window[-self.lookback:] if self.lookback else ""
+        text = self._held + chunk
+        cut = max(0, len(text) - self.lookback)
+        self._held = text[cut:]
+        return text[:cut], None
+
+    def finish(self) -> Tuple[str, Optional[str]]:
+        """Flush the held-back window at the end of the stream"""
+        if self.verdict:
+            return "", self.verdict
+        text, self._held = self._held, ""
+        return text, None
+
+def _context_message(ctx: Any) -> str:
+    """Get the user message from a RunContextWrapper (or pass a plain string through)"""
+    if isinstance(ctx, str):
+        return ctx
+    if hasattr(ctx, 'context') and ctx.context:
+        return ctx.context.get("user_message", "")
+    return ""
+
+def _screen_chunk(chunk: List[str], output: bool = False) -> List[Optional[str]]:
+    """Screen one chunk without logging; runs in the caller or a pool worker"""
+    check = _output_verdict if output else _input_verdict
+    return [check(item)[0] for item in chunk]
+
+def _init_screen_worker(offensive_words: List[str], negative_phrases: List[str]) -> None:
+    """Give each pool worker the parent's current term lists"""
+    reload_filter_terms(offensive_words, negative_phrases, quiet=True)
+
+def _chunked(items: Iterable[Any], chunk_size: int, output: bool) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk if output else [_context_message(item) for item in chunk]
+
+def screen_batch(messages: Iterable[Any], output: bool = False, chunk_size: int = 2000,
+                 workers: Optional[int] = None) -> Iterator[Optional[str]]:
+    """
+    Screen many messages in one call, yielding one verdict per message in input order.
+
+    Verdicts are exactly what content_filter_guardrail (or output_filter_guardrail
+    with output=True) would return, minus the per-message logging. `messages`
+    may be any iterable of strings or RunContextWrapper objects; it is consumed
+    chunk by chunk so memory stays bounded. With workers > 1, chunks are spread
+    over a process pool with at most 2 * workers chunks in flight.
+    """
+    chunks = _chunked(messages, chunk_size, output)
+    screened = 0
+    
+    if not workers or workers <= 1:
+        for chunk in chunks:
+            screened += len(chunk)
+            yield from _screen_chunk(chunk, output)
+        logger.info("Batch guardrail screened %s messages", screened)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_screen_worker,
+                             initargs=(OFFENSIVE_WORDS, NEGATIVE_PHRASES)) as pool:
+        pending = [pool.submit(_screen_chunk, chunk, output)
+                   for chunk in islice(chunks, workers * 2)]
+        while pending:
+            verdicts = pending.pop(0).result()
+            screened += len(verdicts)
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(_screen_chunk, chunk, output))
+            yield from verdicts
+    logger.info("Batch guardrail screened %s messages across %s workers", screened, workers)
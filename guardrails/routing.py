@@ -0,0 +1,215 @@
+"""
+Routing engine for incoming messages
+Folds the content filter, the handoff rules, the sentiment check and the
+order-tool gate into one compiled pass: the message is lowercased once,
+every term shared between keyword families is searched once, and the
+outcome comes back as a single RoutingDecision. Sentiment comes from a
+SentimentScorer when one is given, else from negative indicator hits; the
+scorer only runs once a caller reads the sentiment or the handoff.
+"""
+import functools
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from guardrails.sentiment import SentimentScorer
+from guardrails.term_matcher import TermMatcher
+
+OFFENSIVE = "offensive"
+NEGATIVE_PHRASE = "negative_phrase"
+COMPLEX = "complex"
+NEGATIVE_INDICATOR = "negative_indicator"
+ORDER = "order"
+
+ORDER_LOOKUP_HINT = "order_lookup"
+
+# Up to this many distinct terms, C-level `in` scans beat walking the
+# Aho-Corasick automaton character by character in Python
+SCAN_TERM_LIMIT = 128
+
+
+# needs_handoff, handoff_reason, sentiment, sentiment_score
+Outcome = Tuple[bool, str, str, float]
+
+
+class RoutingDecision:
+    """
+    Everything the pipeline needs to know about a message before the agent runs.
+
+    The filter verdict and tool hints come straight from the term scan. The
+    sentiment and the handoff that depends on it can be left to a `pending`
+    callable, run the first time one of them is read, so the content filter
+    and the order-tool gate never pay for sentiment scoring.
+    """
+
+    __slots__ = ("filter_kind", "filter_term", "tool_hints", "_outcome", "_pending")
+
+    def __init__(self, filter_kind: Optional[str], filter_term: Optional[str], needs_handoff: bool,
+                 handoff_reason: str, sentiment: str, sentiment_score: float, tool_hints: Tuple[str, ...],
+                 pending: Optional[Callable[[], Outcome]] = None):
+        self.filter_kind = filter_kind      # OFFENSIVE or NEGATIVE_PHRASE when the content filter blocks it
+        self.filter_term = filter_term
+        self.tool_hints = tool_hints
+        self._outcome: Optional[Outcome] = (
+            None if pending is not None else (needs_handoff, handoff_reason, sentiment, sentiment_score))
+        self._pending = pending
+
+    def _resolve(self) -> Outcome:
+        outcome = self._outcome
+        if outcome is None:
+            # Computing it twice from two threads is harmless: both get the same answer
+            outcome = self._outcome = self._pending()
+        return outcome
+
+    @property
+    def needs_handoff(self) -> bool:
+        return self._resolve()[0]
+
+    @property
+    def handoff_reason(self) -> str:
+        return self._resolve()[1]
+
+    @property
+    def sentiment(self) -> str:
+        """neutral / negative / very_negative"""
+        return self._resolve()[2]
+
+    @property
+    def sentiment_score(self) -> float:
+        """Below zero is negative; minus one per indicator without a scorer"""
+        return self._resolve()[3]
+
+    @property
+    def filtered(self) -> bool:
+        return self.filter_kind is not None
+
+    def _fields(self) -> tuple:
+        return (self.filter_kind, self.filter_term, *self._resolve(), self.tool_hints)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RoutingDecision):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self) -> str:
+        names = ("filter_kind", "filter_term", "needs_handoff", "handoff_reason", "sentiment",
+                 "sentiment_score", "tool_hints")
+        return "RoutingDecision(%s)" % ", ".join(f"{name}={value!r}" for name, value in zip(names, self._fields()))
+
+
+class RoutingEngine:
+    """
+    Compiled keyword families with the exact semantics of the per-function
+    checks they replace: raw substring matches on the lowercased message,
+    the first listed offensive word (then negative phrase) and the first
+    listed complex keyword win. Without a scorer, every listed negative
+    indicator that is present takes one off the sentiment score (two or
+    more is very_negative); with one, negative_indicators is ignored and
+    the scorer's whole-word lexicon decides, and it only runs when the
+    decision's sentiment or handoff is first read.
+
+    Terms are deduplicated across families, and a term is only searched
+    when the shorter term it contains was found ("cancel order" is skipped
+    when "cancel" is absent). Past SCAN_TERM_LIMIT terms
+    (e.g. a large moderation list) a TermMatcher automaton is used instead.
+    route() memoizes recent decisions, so the tool gate asking about the
+    same message again is free.
+    """
+
+    def __init__(self, offensive_words: Sequence[str], negative_phrases: Sequence[str],
+                 complex_keywords: Sequence[str], order_keywords: Sequence[str],
+                 negative_indicators: Sequence[str] = (), scorer: Optional[SentimentScorer] = None,
+                 long_message_chars: int = 300, cache_size: int = 1024):
+        self.offensive_count = len(offensive_words)
+        self.long_message_chars = long_message_chars
+        self.scorer = scorer
+        if scorer is not None:
+            negative_indicators = ()
+        families = ((OFFENSIVE, offensive_words), (NEGATIVE_PHRASE, negative_phrases),
+                    (COMPLEX, complex_keywords), (NEGATIVE_INDICATOR, negative_indicators), (ORDER, order_keywords))
+
+        # Filter positions run across offensive words then phrases, like the combined guardrail list
+        targets: Dict[str, List[Tuple[str, int]]] = {}
+        offsets = {OFFENSIVE: 0, NEGATIVE_PHRASE: len(offensive_words)}
+        for family, terms in families:
+            for position, term in enumerate(terms):
+                if term:
+                    targets.setdefault(term, []).append((family, offsets.get(family, 0) + position))
+        self._terms = sorted(targets, key=len)
+        self._targets = [tuple(targets[term]) for term in self._terms]
+        self._matcher = TermMatcher(self._terms) if len(self._terms) > SCAN_TERM_LIMIT else None
+        # Terms containing a shorter term are only searched once that term is found
+        # ("cancel order" only after "cancel"), so a clean message costs one scan per root term
+        self._roots: List[Tuple[int, str]] = []
+        self._children: List[List[Tuple[int, str]]] = [[] for _ in self._terms]
+        if self._matcher is None:
+            for i, term in enumerate(self._terms):
+                parents = [j for j in range(i) if self._terms[j] in term]
+                if parents:
+                    self._children[max(parents, key=lambda j: len(self._terms[j]))].append((i, term))
+                else:
+                    self._roots.append((i, term))
+        self._neutral = RoutingDecision(None, None, False, "", "neutral", 0.0, ())
+        self.route = functools.lru_cache(maxsize=cache_size)(self._route) if cache_size else self._route
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def matched_terms(self, text: str) -> List[int]:
+        """Indexes (into the deduplicated term list) of the terms present in lowercased text"""
+        if self._matcher is not None:
+            return self._matcher.matched_indexes(text)
+        hits = [i for i, term in self._roots if term in text]
+        children = self._children
+        for i in hits:
+            # hits grows while iterating, so children of children are visited too
+            hits.extend([j for j, term in children[i] if term in text])
+        return hits
+
+    def _route(self, message: str) -> RoutingDecision:
+        text = message.lower() if message else ""
+        hits = self.matched_terms(text) if text else ()
+        if not hits and self.scorer is None and len(message) <= self.long_message_chars:
+            return self._neutral
+        score = 0.0
+
+        filter_position = complex_position = None
+        filter_term = complex_term = None
+        order = False
+        for i in hits:
+            for family, position in self._targets[i]:
+                if family == NEGATIVE_INDICATOR:
+                    score -= 1.0
+                elif family == OFFENSIVE or family == NEGATIVE_PHRASE:
+                    if filter_position is None or position < filter_position:
+                        filter_position, filter_term = position, self._terms[i]
+                elif family == COMPLEX:
+                    if complex_position is None or position < complex_position:
+                        complex_position, complex_term = position, self._terms[i]
+                else:
+                    order = True
+
+        filter_kind = None
+        if filter_position is not None:
+            filter_kind = OFFENSIVE if filter_position < self.offensive_count else NEGATIVE_PHRASE
+        tool_hints = (ORDER_LOOKUP_HINT,) if order else ()
+        if self.scorer is not None:
+            return RoutingDecision(filter_kind, filter_term, False, "", "neutral", 0.0, tool_hints,
+                                   pending=functools.partial(self._score, text, complex_term, len(message)))
+        sentiment = "very_negative" if score <= -2 else "negative" if score else "neutral"
+        return RoutingDecision(filter_kind, filter_term, *self._outcome(sentiment, score, complex_term, len(message)),
+                               tool_hints)
+
+    def _score(self, text: str, complex_term: Optional[str], length: int) -> Outcome:
+        score = self.scorer.score_normalized(text) if text else 0.0
+        return self._outcome(self.scorer.label(score), score, complex_term, length)
+
+    def _outcome(self, sentiment: str, score: float, complex_term: Optional[str], length: int) -> Outcome:
+        if complex_term is not None:
+            reason = f"Complex query detected: {complex_term}"
+        elif sentiment != "neutral":
+            reason = f"Negative sentiment detected: {sentiment}"
+        elif length > self.long_message_chars:
+            reason = "Long complex message requiring human attention"
+        else:
+            reason = ""
+        return bool(reason), reason, sentiment, score
+
@@ -0,0 +1,181 @@
+"""
+Lexicon sentiment scorer
+Whole-word, weighted replacement for counting negative substrings: the
+message is tokenized once and each token is looked up in a precomputed
+weight table, with negation words flipping the terms that follow them.
+
+NumPy is optional and only needed for score_batch()/sentiment_batch(),
+the vectorized mode for scoring archived transcripts.
+"""
+import itertools
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# Everything that is not a letter separates words; apostrophes are dropped so
+# "don't" and "dont" are the same token
+_SEPARATORS = {code: " " for code in range(128) if not chr(code).isalpha()}
+_SEPARATORS.update({ord("'"): None, ord("’"): None})
+_SEPARATORS.update({ord(char): " " for char in "‘“”–—…«»¡¿"})
+
+# score_batch() joins messages with a NUL token (str.split() would treat the ASCII
+# separators 0x1c-0x1f as whitespace), so its table keeps NUL
+_RECORD_SEPARATOR = "\x00"
+_BATCH_SEPARATORS = {code: value for code, value in _SEPARATORS.items() if code != ord(_RECORD_SEPARATOR)}
+
+# Negative weights push towards a handoff. Intent words that are not
+# complaints on their own ("cancel", "refund", "manager") weigh little, so
+# a neutral question about them no longer reads as a negative message.
+DEFAULT_LEXICON: Dict[str, float] = {
+    "horrible": -2.5, "unacceptable": -2.5, "furious": -2.5, "worst": -2.5, "disgusting": -2.5,
+    "terrible": -2.0, "awful": -2.0, "ridiculous": -2.0, "useless": -2.0, "stupid": -2.0,
+    "angry": -2.0, "pathetic": -2.0, "scam": -2.0, "incompetent": -2.0,
+    "frustrated": -1.5, "frustrating": -1.5, "upset": -1.5, "disappointed": -1.5,
+    "disappointing": -1.5, "annoyed": -1.5, "unhappy": -1.5, "bad": -1.5, "poor": -1.5,
+    "complaint": -1.0, "wrong": -1.0, "delayed": -0.5, "late": -0.5, "missing": -0.5,
+    "refund": -0.5, "cancel": -0.5, "manager": -0.5,
+    "happy": 1.5, "great": 1.5, "excellent": 2.0, "love": 2.0, "perfect": 1.5, "helpful": 1.5,
+    "good": 1.0, "appreciate": 1.0, "thanks": 0.5, "thank": 0.5,
+}
+
+NEGATIONS: FrozenSet[str] = frozenset("""
+not no never nothing none nobody nor neither without hardly cannot
+dont doesnt didnt isnt wasnt arent werent wont wouldnt cant couldnt
+shouldnt havent hasnt hadnt aint
+""".split())
+
+# A negation scales the weights of this many following tokens by NEGATION_SCALE
+NEGATION_WINDOW = 3
+NEGATION_SCALE = -0.8
+
+NEGATIVE_THRESHOLD = -1.0
+VERY_NEGATIVE_THRESHOLD = -2.5
+
+
+class SentimentScorer:
+    """
+    Sums lexicon weights over the tokens of a message.
+
+    A term within NEGATION_WINDOW tokens after a negation word has its
+    weight scaled by NEGATION_SCALE, so "not happy" scores negative and
+    "not bad" does not. Scores at or below the thresholds map to the same
+    labels analyze_sentiment has always returned: neutral, negative and
+    very_negative.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, negations: Iterable[str] = NEGATIONS,
+                 negation_window: int = NEGATION_WINDOW, negation_scale: float = NEGATION_SCALE,
+                 negative_threshold: float = NEGATIVE_THRESHOLD,
+                 very_negative_threshold: float = VERY_NEGATIVE_THRESHOLD):
+        self.weights = dict(DEFAULT_LEXICON if lexicon is None else lexicon)
+        self.negations = frozenset(negations)
+        self.negation_window = negation_window
+        self.negation_scale = negation_scale
+        self.negative_threshold = negative_threshold
+        self.very_negative_threshold = very_negative_threshold
+        # One table answers "does this token matter" for both weights and negations
+        self._relevant = frozenset(self.weights) | self.negations
+
+        # Batch mode codes: 0 for other words, -1 for the message boundary, 1.. for relevant tokens
+        vocabulary = sorted(self._relevant)
+        self._codes = {token: code for code, token in enumerate(vocabulary, start=1)}
+        self._codes[_RECORD_SEPARATOR] = -1
+        if np is not None:
+            self._code_weights = np.array([0.0] + [0.0 if token in self.negations else self.weights[token]
+                                                   for token in vocabulary])
+            self._code_negation = np.array([False] + [token in self.negations for token in vocabulary])
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @staticmethod
+    def tokens(text: str) -> List[str]:
+        """Words of already lowercased text"""
+        return text.translate(_SEPARATORS).split()
+
+    def score_normalized(self, text: str) -> float:
+        """Score already lowercased text"""
+        # Look for lexicon words among the distinct words first, so a message
+        # without any is never fully tokenized
+        words = text.split()
+        distinct = set(words)
+        if "".join(distinct).isalpha():
+            # Nothing to split on or drop: every word is a token already
+            tokens = words
+            present = self._relevant.intersection(distinct)
+            if not present:
+                return 0.0
+        else:
+            present = self._relevant.intersection(self.tokens(" ".join(distinct)))
+            if not present:
+                return 0.0
+            tokens = self.tokens(text)
+        weights = self.weights
+        if self.negations.isdisjoint(present):
+            # Without negations word order does not matter, so count in C
+            return sum(weights[token] * tokens.count(token) for token in present)
+
+        total = 0.0
+        negated_until = -1
+        for position in [position for position, token in enumerate(tokens) if token in present]:
+            token = tokens[position]
+            if token in self.negations:
+                negated_until = position + self.negation_window
+                continue
+            weight = weights[token]
+            total += weight * self.negation_scale if position <= negated_until else weight
+        return total
+
+    def score(self, message: str) -> float:
+        return self.score_normalized(message.lower())
+
+    def label(self, score: float) -> str:
+        if score <= self.very_negative_threshold:
+            return "very_negative"
+        if score <= self.negative_threshold:
+            return "negative"
+        return "neutral"
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        score = self.score(message)
+        return self.label(score), score
+
+    def score_batch(self, messages: Sequence[str]) -> "np.ndarray":
+        """
+        Scores for many messages as a float64 array, matching score().
+        All messages are lowercased and split in one go, with a NUL token
+        marking message boundaries; vocabulary lookup,
+        negation windows and per-message sums are then vectorized.
+        """
+        if np is None:
+            raise RuntimeError("SentimentScorer.score_batch requires numpy")
+        if not messages:
+            return np.zeros(0)
+        boundary = f" {_RECORD_SEPARATOR} "
+        text = boundary.join(message.replace(_RECORD_SEPARATOR, " ") for message in messages)
+        words = text.lower().translate(_BATCH_SEPARATORS).split()
+        codes = np.fromiter(map(self._codes.get, words, itertools.repeat(0)), dtype=np.int32, count=len(words))
+
+        boundaries = np.flatnonzero(codes == -1)
+        starts = np.concatenate(([0], boundaries + 1))
+        positions = np.flatnonzero(codes > 0)
+        token_ids = codes[positions]
+        message_index = np.searchsorted(boundaries, positions)
+
+        is_negation = self._code_negation[token_ids]
+        # Position of the latest negation at or before each token; positions run across the
+        # whole batch, so one from an earlier message is ruled out by the message start
+        last_negation = np.maximum.accumulate(np.where(is_negation, positions, -1))
+        negated = ((last_negation >= starts[message_index])
+                   & (positions - last_negation <= self.negation_window) & ~is_negation)
+        contributions = self._code_weights[token_ids] * np.where(negated, self.negation_scale, 1.0)
+        return np.bincount(message_index, weights=contributions, minlength=len(starts))
+
+    def sentiment_batch(self, messages: Sequence[str]) -> "np.ndarray":
+        """Labels for many messages, as an array of strings"""
+        scores = self.score_batch(messages)
+        return np.select([scores <= self.very_negative_threshold, scores <= self.negative_threshold],
+                         ["very_negative", "negative"], "neutral")
@@ -0,0 +1,116 @@
+"""
+Multi-pattern term matcher for guardrails
+Aho-Corasick automaton that finds every word and phrase hit in one pass
+"""
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+# Below this many terms a handful of C-level `in` scans beats a Python
+# character loop, so the matcher skips the automaton walk entirely
+SMALL_LIST_THRESHOLD = 24
+
+
+class TermMatch(NamedTuple):
+    """A single term hit inside a message"""
+    index: int   # position of the term in the list the matcher was built from
+    term: str
+    start: int
+    end: int
+
+
+class TermMatcher:
+    """
+    Compiled Aho-Corasick automaton over a fixed term list.
+
+    Build once (at import or when the term lists are reloaded) and call
+    find_all() per message: the scan is a single pass over the text no
+    matter how many terms are loaded. Terms are matched as raw substrings,
+    exactly like `term in text`, so callers should lowercase both sides.
+    Very short lists fall back to plain substring scans, which are faster.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        self._unique: List[Tuple[int, str]] = []
+        seen = set()
+        for term in terms:
+            if not term or term in seen:
+                # An empty term would match everywhere; duplicates keep the first index
+                self.terms.append(term)
+                continue
+            seen.add(term)
+            self._unique.append((len(self.terms), term))
+            self._insert(term, len(self.terms))
+            self.terms.append(term)
+
+        self._build_failure_links()
+        self._use_scan = len(self._unique) <= SMALL_LIST_THRESHOLD
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _insert(self, term: str, index: int) -> None:
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] = self._output[node] + (index,)
+
+    def _build_failure_links(self) -> None:
+        goto, fail, output = self._goto, self._fail, self._output
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                # Merge outputs so every node reports all terms ending here
+                output[child] = output[child] + output[fail[child]]
+
+    def find_all(self, text: str) -> List[TermMatch]:
+        """Return every (possibly overlapping) term occurrence, ordered by end position"""
+        if self._use_scan:
+            return self._scan_all(text)
+        goto, fail, output, terms = self._goto, self._fail, self._output, self.terms
+        matches: List[TermMatch] = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                end = position + 1
+                for index in output[node]:
+                    term = terms[index]
+                    matches.append(TermMatch(index, term, end - len(term), end))
+        return matches
+
+    def _scan_all(self, text: str) -> List[TermMatch]:
+        matches: List[TermMatch] = []
+        for index, term in self._unique:
+            start = text.find(term)
+            while start != -1:
+                matches.append(TermMatch(index, term, start, start + len(term)))
+                start = text.find(term, start + 1)
+        matches.sort(key=lambda match: (match.end, match.start))
+        return matches
+
+    def matched_indexes(self, text: str) -> List[int]:
+        """Return the sorted list indexes of the terms present in text"""
+        if self._use_scan:
+            return [index for index, term in self._unique if term in text]
+        return sorted({match.index for match in self.find_all(text)})
@@ -14,13 +14,24 @@ Based on teacher's patterns from: bilalmk/agenticai_thursday_classcode
 """
 
 import asyncio
+import contextlib
+import contextvars
 import logging
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 
 from openai import OpenAI, AsyncOpenAI
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Tuple
+import inspect
 import json
+import os
+import re
+import typing
+
+from runtime.event_log import EventLog, RequestTrace, current_trace, trace_stage
+from runtime.hedging import Deadline, DeadlineExceeded, HedgePolicy, hedged
+from runtime.session_store import Session, SessionStore
 
 class Agent:
     def __init__(self, name: str, instructions: str, model, tools: Optional[List] = None, handoffs: Optional[List] = None):
@@ -35,20 +46,259 @@ class OpenAIChatCompletionsModel:
         self.client = openai_client
         self.model = model
 
+class RunResult:
+    def __init__(self, final_output: str, last_agent, tool_calls: Optional[List[str]] = None):
+        self.final_output = final_output
+        self.last_agent = last_agent
+        self.tool_calls = tool_calls or []
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+def _tool_schema(func) -> Dict[str, Any]:
+    """Build the chat-completions tool definition from a decorated function's signature"""
+    hints = typing.get_type_hints(func)
+    properties = {}
+    for param in inspect.signature(func).parameters:
+        hint = hints.get(param, str)
+        if typing.get_origin(hint) in (list, List):
+            item_type = (typing.get_args(hint) or (str,))[0]
+            properties[param] = {"type": "array", "items": {"type": _JSON_TYPES.get(item_type, "string")}}
+        else:
+            properties[param] = {"type": _JSON_TYPES.get(hint, "string")}
+    return {
+        "type": "function",
+        "function": {
+            "name": func._tool_name,
+            "description": (func._tool_description or "").strip(),
+            "parameters": {"type": "object", "properties": properties, "required": list(properties)},
+        },
+    }
+
 class Runner:
+    """
+    Drives an agent against its chat-completions model.
+
+    Runner.run awaits the AsyncOpenAI client held by the agent's model, so one
+    event loop can keep many conversations in flight. At most max_concurrency
+    model calls run at once; the rest wait on the semaphore. A deadline bounds
+    every model call of the run, and with a hedge_policy a call slower than
+    the recent p95 is duplicated and the first answer wins.
+    """
+    # None: read RUNNER_MAX_CONCURRENCY when the first semaphore is made, after .env is loaded
+    max_concurrency: Optional[int] = None
+    max_turns = 10
+    hedge_policy: Optional[HedgePolicy] = None
+    model_latency = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _semaphore_loop = None
+
+    @classmethod
+    def configure(cls, max_concurrency: Optional[int] = None, max_turns: Optional[int] = None,
+                  hedge_policy: Optional[HedgePolicy] = None, model_latency=None):
+        """model_latency: a histogram that observes the duration of every model call"""
+        if hedge_policy is not None:
+            cls.hedge_policy = hedge_policy
+        if model_latency is not None:
+            cls.model_latency = model_latency
+        if max_concurrency is not None:
+            cls.max_concurrency = max_concurrency
+            cls._semaphore = None
+        if max_turns is not None:
+            cls.max_turns = max_turns
+
+    @classmethod
+    def _limiter(cls) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop, so make a fresh one per loop
+        loop = asyncio.get_running_loop()
+        if cls._semaphore is None or cls._semaphore_loop is not loop:
+            if cls.max_concurrency is None:
+                cls.max_concurrency = int(os.getenv("RUNNER_MAX_CONCURRENCY", "100"))
+            cls._semaphore = asyncio.Semaphore(cls.max_concurrency)
+            cls._semaphore_loop = loop
+        return cls._semaphore
+
     @staticmethod
-    def run_sync(agent, message: str):
-        
-        class Result:
-            def __init__(self, output):
-                self.final_output = output
-                self.tool_calls = []
-        
-        return Result(f"Response from {agent.name}: {message}")
+    def _available_tools(agent, context) -> Dict[str, Any]:
+        tools = {}
+        for tool in agent.tools:
+            enabled = getattr(tool, "_is_enabled", None)
+            if enabled is None or enabled(context, agent):
+                tools[tool._tool_name] = tool
+        for transfer in agent.handoffs:
+            tools[transfer._tool_name] = transfer
+        return tools
+
+    @staticmethod
+    def _call_tool(tool, arguments: str, context) -> str:
+        # Tools only get their arguments; the run's context travels in a context variable
+        token = current_run_context.set(context)
+        try:
+            result = tool(**json.loads(arguments or "{}"))
+            on_handoff = getattr(tool, "_on_handoff", None)
+            if on_handoff:
+                on_handoff(context)
+        except Exception as e:
+            error_function = getattr(tool, "_error_function", None)
+            if error_function:
+                return error_function(context, e)
+            return f"Error running {tool._tool_name}: {e}"
+        finally:
+            current_run_context.reset(token)
+        return result if isinstance(result, str) else json.dumps(result)
+
+    @classmethod
+    def _start(cls, message: str, context: Optional["RunContextWrapper"] = None):
+        """Run context and opening messages: the session's recent turns, then the new message"""
+        context = context or RunContextWrapper()
+        context.current_input = message
+        history = context.session.history() if context.session is not None else []
+        return context, history + [{"role": "user", "content": message}]
+
+    @classmethod
+    def _request(cls, agent, messages: List[Dict[str, Any]], context, **extra) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        tools = cls._available_tools(agent, context)
+        request = {"model": agent.model.model,
+                   "messages": [{"role": "system", "content": agent.instructions}] + messages, **extra}
+        if tools:
+            request["tools"] = [_tool_schema(tool) for tool in tools.values()]
+            request["tool_choice"] = "auto"
+        return tools, request
+
+    @classmethod
+    def _apply_tool_calls(cls, agent, tools, content: Optional[str], calls: List[Tuple[str, str, str]],
+                          messages: List[Dict[str, Any]], tool_calls: List[str], context):
+        """Run (id, name, arguments) tool calls, append the results and return the agent that continues"""
+        messages.append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [{"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+                           for call_id, name, arguments in calls],
+        })
+        next_agent = agent
+        for call_id, name, arguments in calls:
+            tool_calls.append(name)
+            tool = tools.get(name)
+            with trace_stage("tools"):
+                output = cls._call_tool(tool, arguments, context) if tool else f"Unknown tool: {name}"
+            messages.append({"role": "tool", "tool_call_id": call_id, "content": output})
+            if tool is not None and getattr(tool, "_target_agent", None) is not None:
+                # Handoff: the target agent continues the conversation under its own instructions
+                next_agent = tool._target_agent
+        return next_agent
+
+    @classmethod
+    async def _complete(cls, agent, request: Dict[str, Any], deadline: Optional[Deadline]):
+        def create():
+            return agent.model.client.chat.completions.create(**request)
+
+        async with cls._limiter():
+            call = hedged(create, cls.hedge_policy) if cls.hedge_policy else create()
+            started = time.perf_counter()
+            try:
+                with trace_stage("model"):
+                    if deadline is None:
+                        return await call
+                    return await deadline.run(call)
+            finally:
+                if cls.model_latency is not None:
+                    cls.model_latency.observe(time.perf_counter() - started)
+
+    @classmethod
+    async def run(cls, agent, message: str, deadline: Optional[Deadline] = None,
+                  context: Optional["RunContextWrapper"] = None) -> RunResult:
+        context, messages = cls._start(message, context)
+        tool_calls: List[str] = []
+
+        for _ in range(cls.max_turns):
+            tools, request = cls._request(agent, messages, context)
+            completion = await cls._complete(agent, request, deadline)
+
+            reply = completion.choices[0].message
+            if not reply.tool_calls:
+                return RunResult(reply.content or "", agent, tool_calls)
+
+            calls = [(call.id, call.function.name, call.function.arguments) for call in reply.tool_calls]
+            agent = cls._apply_tool_calls(agent, tools, reply.content, calls, messages, tool_calls, context)
+
+        raise RuntimeError(f"Agent {agent.name} exceeded {cls.max_turns} turns")
+
+    @classmethod
+    def run_streamed(cls, agent, message: str, context: Optional["RunContextWrapper"] = None) -> "RunResultStreaming":
+        """Start a streaming run; iterate result.stream_text() to drive it"""
+        return RunResultStreaming(agent, message, context)
+
+    @classmethod
+    async def _stream(cls, result: "RunResultStreaming") -> AsyncIterator[str]:
+        agent = result.last_agent
+        context, messages = cls._start(result.input, result.context)
+        output: List[str] = []
+
+        for _ in range(cls.max_turns):
+            tools, request = cls._request(agent, messages, context, stream=True)
+            text: List[str] = []
+            partial_calls: Dict[int, List[str]] = {}
+            async with cls._limiter():
+                stream = await agent.model.client.chat.completions.create(**request)
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta
+                        if delta.content:
+                            text.append(delta.content)
+                            yield delta.content
+                        for call in delta.tool_calls or []:
+                            # Tool calls arrive as fragments keyed by index: id, name, then argument pieces
+                            entry = partial_calls.setdefault(call.index, ["", "", ""])
+                            if call.id:
+                                entry[0] = call.id
+                            if call.function and call.function.name:
+                                entry[1] += call.function.name
+                            if call.function and call.function.arguments:
+                                entry[2] += call.function.arguments
+                finally:
+                    # Hands the stream's rate-limiter slot back even if we stop reading early
+                    await stream.close()
+
+            output.extend(text)
+            if not partial_calls:
+                result.final_output = "".join(output)
+                result.last_agent = agent
+                result.is_complete = True
+                return
+
+            calls = [tuple(partial_calls[index]) for index in sorted(partial_calls)]
+            agent = cls._apply_tool_calls(agent, tools, "".join(text) or None, calls, messages,
+                                          result.tool_calls, context)
+            result.last_agent = agent
+
+        raise RuntimeError(f"Agent {agent.name} exceeded {cls.max_turns} turns")
+
+    @classmethod
+    def run_sync(cls, agent, message: str) -> RunResult:
+        return asyncio.run(cls.run(agent, message))
+
+class RunResultStreaming(RunResult):
+    """Result of Runner.run_streamed; fields are filled in as stream_text() is consumed"""
+    def __init__(self, agent, message: str, context: Optional["RunContextWrapper"] = None):
+        super().__init__("", agent)
+        self.input = message
+        self.context = context
+        self.is_complete = False
+
+    def stream_text(self) -> AsyncIterator[str]:
+        return Runner._stream(self)
 
 class RunContextWrapper:
-    def __init__(self):
+    def __init__(self, customer_id: Optional[str] = None, session: Optional[Session] = None):
         self.current_input = ""
+        self.customer_id = customer_id
+        self.session = session          # supplies the conversation history, if any
+        self.orders: List[Dict[str, Any]] = []  # order lookups made by tools during the run
+
+# Context of the run whose tool call is executing, so tools can record into it
+current_run_context: contextvars.ContextVar[Optional[RunContextWrapper]] = contextvars.ContextVar(
+    "current_run_context", default=None)
 
 def function_tool(name_override: Optional[str] = None, description_override: Optional[str] = None, 
                  is_enabled: Optional[Callable] = None, failure_error_function: Optional[Callable] = None):
@@ -62,11 +312,13 @@ def function_tool(name_override: Optional[str] = None, description_override: Opt
 
 def handoff(agent, tool_name_override: Optional[str] = None, on_handoff: Optional[Callable] = None):
     def transfer_function():
-        if on_handoff:
-            on_handoff(RunContextWrapper())
         return f"Transferred to {agent.name}"
     
+    # Runner calls on_handoff with the run's context after the transfer
+    transfer_function._on_handoff = on_handoff
     transfer_function._tool_name = tool_name_override or f"transfer_to_{agent.name.lower().replace(' ', '_')}"
+    transfer_function._tool_description = f"Transfer the conversation to {agent.name}"
+    transfer_function._target_agent = agent
     return transfer_function
 
 def set_tracing_disabled(disabled: bool):
@@ -78,31 +330,74 @@ from openai import AsyncOpenAI
 from dotenv import load_dotenv, find_dotenv
 import os
 
-load_dotenv(find_dotenv(), override=True)
+from guardrails.content_guardrails import StreamingOutputFilter
+from guardrails.routing import NEGATIVE_PHRASE, OFFENSIVE, ORDER_LOOKUP_HINT, RoutingDecision, RoutingEngine
+from guardrails.sentiment import SentimentScorer
+from runtime.circuit_breaker import CircuitBreaker
+from runtime.logging_setup import SamplingFilter, configure_logging
+from runtime.metrics import MetricsRegistry, start_metrics_server, timed
+from runtime.response_cache import ORDER_ID_PATTERN, ResponseCache, is_order_specific, normalize_query
+from runtime.semantic_cache import SemanticCache
+from config.model_clients import MODEL_CLIENT, MODEL_CLIENTS, MODEL_LIMITER, gemini_api_key
+from runtime.singleflight import SingleFlight
+from tools.faq_index import FAQIndex
+from tools.order_cache import CachedOrderStore
+from tools.order_store import OrderStore, create_order_store
+from tools.faq_snapshot import faq_fingerprint, load_faq_index, save_snapshot
+
+load_dotenv(find_dotenv())
 
 try:
     set_tracing_disabled(True)
 except:
     pass
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('customer_support_bot.log'),
-        logging.StreamHandler()
-    ]
+# Log records are queued and written by a background thread; the file rotates by size
+configure_logging(
+    'customer_support_bot.log',
+    max_bytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backup_count=int(os.getenv("LOG_BACKUP_COUNT", "5"))
 )
 logger = logging.getLogger(__name__)
 
+# Per-tool INFO lines can be sampled (TOOL_LOG_SAMPLE_RATE=0.1 keeps 10%); warnings always pass
+tool_logger = logging.getLogger(f"{__name__}.tools")
+tool_logger.addFilter(SamplingFilter(float(os.getenv("TOOL_LOG_SAMPLE_RATE", "1"))))
+
+# Prometheus-style metrics; set METRICS_PORT to serve them at http://127.0.0.1:<port>/metrics
+metrics = MetricsRegistry()
+QUERY_SECONDS = metrics.histogram("support_query_seconds", "End-to-end process_customer_query latency")
+STAGE_SECONDS = metrics.histogram("support_stage_seconds", "Latency of individual pipeline stages", ("stage",))
+MODEL_CALL_SECONDS = metrics.histogram("support_model_call_seconds", "Latency of single model calls")
+QUERIES = metrics.counter("support_queries_total", "Queries answered, by agent", ("agent",))
+HANDOFFS = metrics.counter("support_handoffs_total", "Queries handed off to a human agent")
+FILTERED = metrics.counter("support_filtered_total", "Messages blocked by the content filter")
+ERRORS = metrics.counter("support_errors_total", "Queries answered with the error response")
+CACHE_HITS = metrics.counter("support_cache_hits_total", "Queries answered from the response caches")
+IN_FLIGHT = metrics.gauge("support_in_flight_requests", "Queries currently being processed")
+Runner.configure(model_latency=MODEL_CALL_SECONDS)
+
 set_tracing_disabled(True)
 
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-gemini_base_url = os.getenv("GEMINI_BASE_PATH")
 gemini_model_name = os.getenv("GEMINI_MODEL_NAME")
 
-gemini_client = AsyncOpenAI(api_key=gemini_api_key, base_url=gemini_base_url)
-model = OpenAIChatCompletionsModel(openai_client=gemini_client, model=str(gemini_model_name))
+# One pooled HTTP client and one rate limiter per process, built in config/model_clients.py and
+# shared by both agents (and by config/gemini_config.py). Retries are left to the rate limiter
+# so a 429 pauses everyone instead of retry-storming.
+model_clients = MODEL_CLIENTS
+model_limiter = MODEL_LIMITER
+model = OpenAIChatCompletionsModel(openai_client=MODEL_CLIENT, model=str(gemini_model_name))
+
+# Hedged model calls are opt-in: MODEL_HEDGE_PERCENTILE=0.95 duplicates calls slower than the recent p95
+hedge_percentile = float(os.getenv("MODEL_HEDGE_PERCENTILE", "0"))
+if hedge_percentile > 0:
+    Runner.configure(hedge_policy=HedgePolicy(
+        percentile=hedge_percentile,
+        max_hedge_ratio=float(os.getenv("MODEL_HEDGE_MAX_RATIO", "0.1"))
+    ))
+
+# Default time budget per query in seconds (unset or 0 means no deadline)
+QUERY_DEADLINE = float(os.getenv("QUERY_DEADLINE", "0")) or None
 
 ORDERS_DB = {
     "ORD001": {"status": "delivered", "tracking": "TRK123456", "date": "2025-08-25", "amount": "$89.99"},
@@ -112,6 +407,20 @@ ORDERS_DB = {
     "ORD005": {"status": "cancelled", "tracking": None, "date": "2025-08-29", "amount": "$123.75"}
 }
 
+# ORDERS_DB stays the default backend; point ORDER_DB_PATH at a SQLite file for real data.
+# Lookups go through a read-through cache sized by ORDER_CACHE_SIZE (0 disables it).
+order_store: OrderStore = CachedOrderStore(
+    create_order_store(ORDERS_DB, os.getenv("ORDER_DB_PATH")),
+    max_entries=int(os.getenv("ORDER_CACHE_SIZE", "10000"))
+)
+
+def invalidate_order(order_id: Optional[str] = None) -> None:
+    """Drop a changed order (or every order when no ID is given) from the lookup cache"""
+    if order_id is None:
+        order_store.clear()
+    else:
+        order_store.invalidate(order_id.upper().strip())
+
 FAQ_DB = {
     "return_policy": "Our return policy allows returns within 30 days of purchase with original receipt.",
     "shipping_time": "Standard shipping takes 3-5 business days, express shipping takes 1-2 business days.",
@@ -121,6 +430,46 @@ FAQ_DB = {
     "store_locations": "We have stores in New York, Los Angeles, Chicago, and Miami."
 }
 
+FAQ_TOP_K = 3
+FAQ_INDEX_SNAPSHOT = os.getenv("FAQ_INDEX_SNAPSHOT")
+faq_index = load_faq_index(FAQ_DB, FAQ_INDEX_SNAPSHOT)
+
+def rebuild_faq_index() -> None:
+    """Re-index FAQ_DB after it has been edited"""
+    global faq_index
+    faq_index = FAQIndex(FAQ_DB)
+
+def save_faq_snapshot(path: Optional[str] = None) -> None:
+    """Write the current FAQ index to disk so other workers can mmap it at startup"""
+    path = path or FAQ_INDEX_SNAPSHOT
+    if not path:
+        raise ValueError("No snapshot path given and FAQ_INDEX_SNAPSHOT is not set")
+    save_snapshot(FAQIndex(FAQ_DB), path, faq_fingerprint(FAQ_DB))
+
+# Per-customer conversation state: recent turns, active agent, looked-up orders and handoff.
+# Bounded by SESSION_MAX_SESSIONS and an idle SESSION_TTL; SESSION_SPILL_PATH keeps evicted
+# sessions in a SQLite file instead of dropping them.
+session_store = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "100000")),
+    ttl=float(os.getenv("SESSION_TTL", "1800")),
+    max_turns=int(os.getenv("SESSION_MAX_TURNS", "10")),
+    spill_path=os.getenv("SESSION_SPILL_PATH") or None
+)
+
+def _note_orders(orders: List[Dict[str, Any]]) -> None:
+    """Record order lookups on the agent run that made them"""
+    context = current_run_context.get()
+    if context is not None:
+        context.orders.extend(orders)
+
+def _remember_orders(session: Optional[Session], orders: List[Dict[str, Any]]) -> None:
+    """Keep a run's order lookups in a customer's session"""
+    if session is not None:
+        for order in orders:
+            session_store.remember_order(session, order)
+
+ORDER_KEYWORDS = ["order", "track", "status", "shipped", "delivery", "ord"]
+
 def enable_order_tool(ctx: RunContextWrapper, agent) -> bool:
     """Enable order tool only when user mentions order-related keywords"""
     try:
@@ -128,64 +477,144 @@ def enable_order_tool(ctx: RunContextWrapper, agent) -> bool:
         if not message:
             return False
         
-        order_keywords = ["order", "track", "status", "shipped", "delivery", "ord"]
-        return any(keyword in message.lower() for keyword in order_keywords)
+        return ORDER_LOOKUP_HINT in routing_engine.route(message).tool_hints
     except:
         return True  
 
+def format_order(order_id: str, order_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape an order store record into the tool result returned to the agent"""
+    return {
+        "order_id": order_id,
+        "status": order_info["status"],
+        "tracking_number": order_info.get("tracking"),
+        "order_date": order_info["date"],
+        "amount": order_info["amount"],
+        "found": True
+    }
+
 @function_tool(
     name_override="get_order_status",
     description_override="Get order status and tracking information for a given order ID",
     is_enabled=enable_order_tool,
     failure_error_function=lambda ctx, error: f"I'm sorry, but I couldn't find that order. Please check the order ID and try again. Order IDs typically start with 'ORD' followed by numbers (e.g., ORD001)."
 )
+@timed(STAGE_SECONDS.labels("get_order_status"))
 def get_order_status(order_id: str) -> Dict[str, Any]:
     """
     Fetch order status from mock database
     Showcases @function_tool with is_enabled parameter
     """
-    logger.info(f"🔧 Tool invocation: get_order_status for order_id={order_id}")
+    tool_logger.info("🔧 Tool invocation: get_order_status for order_id=%s", order_id)
     
     order_id = order_id.upper().strip()
     
-    if order_id in ORDERS_DB:
-        order_info = ORDERS_DB[order_id]
-        result = {
-            "order_id": order_id,
-            "status": order_info["status"],
-            "tracking_number": order_info.get("tracking"),
-            "order_date": order_info["date"],
-            "amount": order_info["amount"],
-            "found": True
-        }
-        logger.info(f"[SUCCESS] Order found: {result}")
+    order_info = order_store.get(order_id)
+    if order_info is not None:
+        result = format_order(order_id, order_info)
+        tool_logger.info("[SUCCESS] Order found: %s (%s)", order_id, result["status"])
+        _note_orders([result])
         return result
     else:
-        logger.warning(f"❌ Order {order_id} not found")
+        tool_logger.warning("❌ Order %s not found", order_id)
         raise ValueError(f"Order {order_id} not found in our system")
 
+@function_tool(
+    name_override="get_order_statuses",
+    description_override="Get status and tracking information for several order IDs in one call",
+    is_enabled=enable_order_tool
+)
+@timed(STAGE_SECONDS.labels("get_order_statuses"))
+def get_order_statuses(order_ids: List[str]) -> Dict[str, Any]:
+    """
+    Look up several orders with one batched store query
+    Unknown IDs are reported in not_found instead of raising
+    """
+    tool_logger.info("🔧 Tool invocation: get_order_statuses for %s order IDs", len(order_ids))
+    
+    normalized = list(dict.fromkeys(order_id.upper().strip() for order_id in order_ids))
+    records = order_store.get_many(normalized)
+    
+    orders = [format_order(order_id, records[order_id]) for order_id in normalized if order_id in records]
+    not_found = [order_id for order_id in normalized if order_id not in records]
+    _note_orders(orders)
+    
+    tool_logger.info("[SUCCESS] Orders found: %s, not found: %s", len(orders), len(not_found))
+    return {"orders": orders, "not_found": not_found, "found": bool(orders)}
+
 @function_tool(
     name_override="search_faq",
     description_override="Search FAQ database for answers to common customer questions"
 )
+@timed(STAGE_SECONDS.labels("search_faq"))
 def search_faq(query: str) -> Dict[str, Any]:
     """Search FAQ database for relevant information"""
-    logger.info(f"🔧 Tool invocation: search_faq for query='{query}'")
-    
-    query_lower = query.lower()
-    results = []
+    tool_logger.info("🔧 Tool invocation: search_faq for query='%s'", query)
     
-    for key, answer in FAQ_DB.items():
-        if any(word in key for word in query_lower.split()) or any(word in answer.lower() for word in query_lower.split()):
-            results.append({"topic": key.replace("_", " ").title(), "answer": answer})
+    results = [
+        {"topic": key.replace("_", " ").title(), "answer": FAQ_DB[key], "score": round(score, 3)}
+        for key, score in faq_index.search(query, top_k=FAQ_TOP_K)
+    ]
     
     if results:
-        logger.info(f"[SUCCESS] FAQ results found: {len(results)} matches")
+        tool_logger.info("[SUCCESS] FAQ results found: %s matches", len(results))
         return {"found": True, "results": results}
     else:
-        logger.info("❌ No FAQ results found")
+        tool_logger.info("❌ No FAQ results found")
         return {"found": False, "message": "No relevant FAQ found for your query."}
 
+OFFENSIVE_WORDS = ["stupid", "idiot", "hate", "terrible", "worst", "awful", "useless", "garbage"]
+NEGATIVE_PHRASES = ["i hate", "you suck", "this is terrible", "worst service", "complete garbage"]
+
+COMPLEX_KEYWORDS = [
+    "refund", "cancel order", "change order", "billing issue",
+    "account problem", "technical support", "complaint", "manager",
+    "legal", "lawsuit", "fraud", "dispute", "damaged", "broken"
+]
+
+# Weighted whole-word lexicon with negation handling (see guardrails/sentiment.py)
+sentiment_scorer = SentimentScorer()
+
+def build_routing_engine() -> RoutingEngine:
+    """Compile the current keyword lists; ROUTING_CACHE_SIZE recent decisions are memoized"""
+    return RoutingEngine(OFFENSIVE_WORDS, NEGATIVE_PHRASES, COMPLEX_KEYWORDS, ORDER_KEYWORDS,
+                         scorer=sentiment_scorer, cache_size=int(os.getenv("ROUTING_CACHE_SIZE", "1024")))
+
+# Content filter, handoff rules, sentiment and the order-tool gate share one pass per message
+routing_engine = build_routing_engine()
+
+def reload_guardrail_terms(offensive_words: Optional[List[str]] = None,
+                           negative_phrases: Optional[List[str]] = None) -> None:
+    """Replace the moderation lists and recompile the routing engine"""
+    global OFFENSIVE_WORDS, NEGATIVE_PHRASES, routing_engine
+    if offensive_words is not None:
+        OFFENSIVE_WORDS = list(offensive_words)
+    if negative_phrases is not None:
+        NEGATIVE_PHRASES = list(negative_phrases)
+    routing_engine = build_routing_engine()
+    logger.info("🛡️ Routing engine rebuilt with %s terms", len(routing_engine))
+
+FILTER_RESPONSES = {
+    OFFENSIVE: "I understand you might be frustrated, but let's keep our conversation respectful. How can I help you resolve your issue today?",
+    NEGATIVE_PHRASE: "I'm sorry to hear you're having a difficult experience. Let me connect you with someone who can help make this right for you."
+}
+
+def _filter_verdict(decision: RoutingDecision) -> Optional[str]:
+    # The engine reports the lowest list index, so offensive words keep priority over phrases
+    if not decision.filtered:
+        return None
+    if decision.filter_kind == NEGATIVE_PHRASE:
+        logger.warning("🚨 Negative phrase detected: '%s'", decision.filter_term)
+    else:
+        logger.warning("🚨 Offensive language detected: '%s'", decision.filter_term)
+    return FILTER_RESPONSES[decision.filter_kind]
+
+@timed(STAGE_SECONDS.labels("routing"))
+def route_message(message: str) -> RoutingDecision:
+    """Content filter, handoff decision, sentiment and tool hints for a message in one pass"""
+    logger.info("🛡️ Guardrail check for message: '%.50s...'", message)
+    return routing_engine.route(message)
+
+@timed(STAGE_SECONDS.labels("content_filter_guardrail"))
 def content_filter_guardrail(message: str) -> Optional[str]:
     """
     Input filter to check for offensive or overly negative language
@@ -194,23 +623,9 @@ def content_filter_guardrail(message: str) -> Optional[str]:
     if not message:
         return None
         
-    logger.info(f"🛡️ Guardrail check for message: '{message[:50]}...'")
-    
-    message_lower = message.lower()
-    
-    offensive_words = ["stupid", "idiot", "hate", "terrible", "worst", "awful", "useless", "garbage"]
-    for word in offensive_words:
-        if word in message_lower:
-            logger.warning(f"🚨 Offensive language detected: '{word}'")
-            return f"I understand you might be frustrated, but let's keep our conversation respectful. How can I help you resolve your issue today?"
+    logger.info("🛡️ Guardrail check for message: '%.50s...'", message)
     
-    negative_phrases = ["i hate", "you suck", "this is terrible", "worst service", "complete garbage"]
-    for phrase in negative_phrases:
-        if phrase in message_lower:
-            logger.warning(f"🚨 Negative phrase detected: '{phrase}'")
-            return f"I'm sorry to hear you're having a difficult experience. Let me connect you with someone who can help make this right for you."
-    
-    return None
+    return _filter_verdict(routing_engine.route(message))
 
 human_support_agent = Agent(
     name="Human Support Representative",
@@ -231,7 +646,7 @@ human_support_agent = Agent(
 def on_handoff_to_human(ctx: RunContextWrapper):
     """Called when handing off to human agent"""
     logger.info("🔄 Handoff to human support agent initiated")
-    customer_id = getattr(ctx, 'customer_id', 'unknown')
+    customer_id = getattr(ctx, 'customer_id', None) or 'unknown'
     print(f"🔄 Transferring customer {customer_id} to human support representative...")
 
 transfer_to_human = handoff(
@@ -247,6 +662,7 @@ customer_support_bot = Agent(
     
     1. Answer frequently asked questions about products, shipping, returns, and policies
     2. Look up order statuses when customers provide order IDs
+       (use get_order_statuses once when a message lists several order IDs)
     3. Provide helpful and accurate information
     4. Transfer to human support when:
        - Query is too complex for you to handle
@@ -265,107 +681,595 @@ customer_support_bot = Agent(
     and consider transferring them to human support for better assistance.
     """,
     model=model,
-    tools=[get_order_status, search_faq],
+    tools=[get_order_status, get_order_statuses, search_faq],
     handoffs=[transfer_to_human]
 )
 
+@timed(STAGE_SECONDS.labels("analyze_sentiment"))
 def analyze_sentiment(message: str) -> str:
-    """Simple sentiment analysis to determine if handoff is needed"""
-    negative_indicators = [
-        "frustrated", "angry", "upset", "disappointed", "terrible", "awful",
-        "worst", "horrible", "unacceptable", "ridiculous", "stupid", "useless",
-        "refund", "cancel", "complaint", "manager"
-    ]
-    
-    message_lower = message.lower()
-    negative_count = sum(1 for word in negative_indicators if word in message_lower)
+    """
+    Lexicon sentiment analysis to determine if handoff is needed
+    Whole words only, weighted per term, with negation ("not happy")
+    """
+    # Only the score is needed, so skip the routing engine's term scan
+    return sentiment_scorer.classify(message)[0] if message else "neutral"
+
+@timed(STAGE_SECONDS.labels("should_handoff"))
+def should_handoff(message: str) -> tuple[bool, str]:
+    """
+    Determine if the query should be handed off to human agent
+    Complex keywords first, then negative sentiment, then message length
+    """
+    decision = routing_engine.route(message)
+    return decision.needs_handoff, decision.handoff_reason
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+)
+
+# Paraphrase matching on top of the exact cache; opt-in (SEMANTIC_CACHE_SIZE=10000) and needs NumPy.
+# Character n-gram similarity cannot tell opposite meanings apart: "can i return an opened item"
+# and "... an unopened item" score 0.87, so a hit can serve the wrong policy answer. Keep the
+# threshold high and enable it only where the cached answers are safe to share.
+semantic_cache = SemanticCache(
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "0")),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+)
+
+agent_calls = SingleFlight(max_keys=int(os.getenv("SINGLEFLIGHT_MAX_KEYS", "10000")))
+
+# Opens after repeated model failures; while open, queries are answered without the LLM
+model_breaker = CircuitBreaker(
+    name="gemini",
+    failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+    recovery_timeout=float(os.getenv("BREAKER_RECOVERY_TIMEOUT", "30")),
+    half_open_max_calls=int(os.getenv("BREAKER_HALF_OPEN_CALLS", "1"))
+)
+
+# One JSON line per query with stage timings (EVENT_LOG_PATH, empty to disable)
+EVENT_LOG_PATH = os.getenv("EVENT_LOG_PATH", "customer_support_events.jsonl")
+event_log = EventLog(
+    EVENT_LOG_PATH,
+    batch_size=int(os.getenv("EVENT_LOG_BATCH_SIZE", "200")),
+    max_bytes=int(os.getenv("EVENT_LOG_MAX_BYTES", str(50 * 1024 * 1024))),
+    backup_count=int(os.getenv("EVENT_LOG_BACKUP_COUNT", "5"))
+) if EVENT_LOG_PATH else None
+
+# Component state sampled when the metrics endpoint is scraped
+metrics.gauge("support_circuit_breaker_state", "Model circuit breaker: 0 closed, 1 half-open, 2 open",
+              callback=lambda: model_breaker.stats()["state_code"])
+metrics.gauge("support_model_concurrency_limit", "Adaptive model concurrency limit",
+              callback=lambda: model_limiter.limit)
+metrics.gauge("support_model_calls_in_flight", "Model calls currently in flight",
+              callback=lambda: model_limiter.in_flight)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+if METRICS_PORT:
+    start_metrics_server(metrics, METRICS_PORT)
+
+def runtime_metrics() -> Dict[str, Any]:
+    """Counters and state of the runtime components, keyed by component"""
+    return {
+        "circuit_breaker": model_breaker.stats(),
+        "rate_limiter": model_limiter.snapshot(),
+        "singleflight": agent_calls.stats(),
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "order_cache": order_store.stats(),
+        "sessions": session_store.stats(),
+        "hedging": Runner.hedge_policy.stats() if Runner.hedge_policy else None,
+    }
+
+def _open_session(customer_id: Optional[str]) -> Optional[Session]:
+    """The customer's session; anonymous queries have none"""
+    return session_store.session(customer_id) if customer_id else None
+
+def _session_routing(session: Optional[Session], needs_handoff: bool, handoff_reason: str) -> Tuple[bool, str]:
+    """A customer already handed off stays with the human agent until the session expires"""
+    if session is not None and session.handed_off and not needs_handoff:
+        return True, session.handoff_reason
+    return needs_handoff, handoff_reason
+
+def _remember_turn(session: Optional[Session], message: str, response_data: Dict[str, Any]) -> None:
+    """Record an answered turn; filtered and failed queries leave the session as it was"""
+    if session is None or not response_data.get("success") or response_data.get("filtered"):
+        return
+    session_store.add_turn(session, "user", message)
+    session_store.add_turn(session, "assistant", response_data["response"] or "")
+    # Deadline and breaker fallbacks hand off only for this query; the next one tries the bot again
+    if any(response_data.get(marker) for marker in _FALLBACK_HANDOFF_REASONS):
+        return
+    session.active_agent = response_data["agent_used"]
+    if response_data.get("handoff_occurred") and not session.handed_off:
+        session.handoff_reason = response_data.get("handoff_reason") or "Handed off to human support"
+
+def _filtered_response(guardrail_response: str) -> Dict[str, Any]:
+    return {
+        "response": guardrail_response,
+        "agent_used": "content_filter",
+        "handoff_occurred": False,
+        "handoff_reason": None,
+        "tools_called": [],
+        "success": True,
+        "filtered": True
+    }
+
+def _error_response(error: Exception) -> Dict[str, Any]:
+    return {
+        "response": "I apologize, but I'm experiencing technical difficulties. Please try again or contact our support team directly.",
+        "agent_used": "error_handler",
+        "handoff_occurred": False,
+        "handoff_reason": None,
+        "tools_called": [],
+        "success": False,
+        "filtered": False,
+        "error": str(error)
+    }
+
+def _lookup_orders(message: str) -> List[Dict[str, Any]]:
+    order_ids = dict.fromkeys(re.sub(r"[-\s]", "", match).upper() for match in ORDER_ID_PATTERN.findall(message))
+    results = []
+    for order_id in order_ids:
+        try:
+            results.append(get_order_status(order_id))
+        except ValueError:
+            results.append({"order_id": order_id, "found": False})
+    return results
+
+def _format_order_answer(orders: List[Dict[str, Any]]) -> str:
+    lines = []
+    for order in orders:
+        if not order["found"]:
+            lines.append(f"I couldn't find order {order['order_id']}. Please check the order ID and try again.")
+            continue
+        line = f"Order {order['order_id']} ({order['amount']}, placed {order['order_date']}) is {order['status']}."
+        if order["tracking_number"]:
+            line += f" Tracking number: {order['tracking_number']}."
+        lines.append(line)
+    return "\n".join(lines)
+
+_FALLBACK_HANDOFF_REASONS = {
+    "deadline_exceeded": "Response deadline exceeded",
+    "degraded": "AI assistant temporarily unavailable"
+}
+
+def _fallback_response(message: str, needs_handoff: bool, handoff_reason: str, marker: str) -> Dict[str, Any]:
+    """
+    Answer without the model: order lookups, then the FAQ index, then a
+    human handoff. Used when the deadline runs out or the breaker is open;
+    `marker` ("deadline_exceeded" or "degraded") is set on the response.
+    """
+    response_data = {
+        "handoff_occurred": False,
+        "handoff_reason": None,
+        "success": True,
+        "filtered": False,
+        marker: True
+    }
+    if not needs_handoff:
+        orders = _lookup_orders(message)
+        if orders:
+            logger.info("⚡ %s: answering %s order lookups without the model", marker, len(orders))
+            return {**response_data, "response": _format_order_answer(orders),
+                    "agent_used": "order_fallback", "tools_called": ["get_order_status"] * len(orders)}
+        
+        faq = search_faq(message)
+        if faq["found"]:
+            top = faq["results"][0]
+            logger.info("⚡ %s: answering from FAQ topic '%s'", marker, top['topic'])
+            return {**response_data, "response": top["answer"],
+                    "agent_used": "faq_fallback", "tools_called": ["search_faq"]}
     
-    if negative_count >= 2:
-        return "very_negative"
-    elif negative_count >= 1:
-        return "negative"
+    logger.info("⚡ %s: handing off to a human agent", marker)
+    return {
+        **response_data,
+        "response": "Sorry for the wait! I've passed your request to a human support representative who will get back to you shortly.",
+        "agent_used": human_support_agent.name,
+        "handoff_occurred": True,
+        "handoff_reason": handoff_reason or _FALLBACK_HANDOFF_REASONS[marker],
+        "tools_called": []
+    }
+
+async def _run_agent(message: str, needs_handoff: bool, handoff_reason: str,
+                     deadline: Optional[Deadline] = None, session: Optional[Session] = None) -> Dict[str, Any]:
+    """Run the routed agent for a message that passed the content filter"""
+    # A query with conversation history is answered in that context, so it is
+    # neither read from nor stored in the response caches, nor shared with other customers
+    in_conversation = session is not None and bool(session.turns)
+    if needs_handoff:
+        logger.info("🔄 Directing to human agent: %s", handoff_reason)
+        agent_to_use = human_support_agent
+        cache_key = None
     else:
-        return "neutral"
+        agent_to_use = customer_support_bot
+        # Handoff-routed, order-specific and in-conversation queries are never answered from cache
+        cache_key = None if in_conversation or is_order_specific(message) else normalize_query(message)
+    
+    query_vector = None
+    if cache_key:
+        with trace_stage("cache"):
+            cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("💾 Response cache hit for '%.60s'", cache_key)
+            cached["cache_hit"] = True
+            return cached
+        
+        with trace_stage("cache"):
+            query_vector = semantic_cache.embed(cache_key)
+            match = semantic_cache.lookup(cache_key, query_vector)
+        if match is not None:
+            cached, similarity = match
+            logger.info("💾 Semantic cache hit for '%.60s' (similarity %.2f)", cache_key, similarity)
+            cached["cache_hit"] = True
+            cached["cache_similarity"] = round(similarity, 3)
+            return cached
+    
+    # Identical concurrent queries share one model call; the key keeps order IDs
+    # unmasked so different orders are never merged. The shared call has no deadline
+    # of its own: each caller waits for it within its own budget, and it is cancelled
+    # once every caller has given up.
+    flight_key = (agent_to_use.name, " ".join(message.lower().split()))
+    if in_conversation:
+        flight_key += (session.customer_id,)
+    context = RunContextWrapper(session.customer_id if session is not None else None,
+                                session if in_conversation else None)
+    call = agent_calls.do(flight_key, lambda: _generate_response(
+        message, agent_to_use, needs_handoff, handoff_reason, cache_key, query_vector, context
+    ))
+    try:
+        response_data, orders = await (deadline.run(call) if deadline else call)
+    except DeadlineExceeded:
+        return _fallback_response(message, needs_handoff, handoff_reason, "deadline_exceeded")
+    # A shared call ran with the first caller's context; every caller keeps its lookups
+    _remember_orders(session, orders)
+    return response_data
 
-def should_handoff(message: str) -> tuple[bool, str]:
-    """Determine if the query should be handed off to human agent"""
-    message_lower = message.lower()
+async def _generate_response(message: str, agent_to_use, needs_handoff: bool, handoff_reason: str,
+                             cache_key: Optional[str], query_vector,
+                             context: Optional[RunContextWrapper] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Call the model for a query that missed every cache.
+    Returns the response and the orders looked up during the run.
+    """
+    if not model_breaker.allow():
+        return _fallback_response(message, needs_handoff, handoff_reason, "degraded"), []
     
-    complex_keywords = [
-        "refund", "cancel order", "change order", "billing issue",
-        "account problem", "technical support", "complaint", "manager",
-        "legal", "lawsuit", "fraud", "dispute", "damaged", "broken"
-    ]
+    context = context or RunContextWrapper()
+    started = time.perf_counter()
+    try:
+        result = await Runner.run(agent_to_use, message, context=context)
+    except DeadlineExceeded:
+        # A budget ran out; that says nothing about the backend's health
+        model_breaker.release()
+        raise
+    except Exception:
+        model_breaker.record_failure()
+        raise
+    except BaseException:
+        model_breaker.release()
+        raise
+    model_breaker.record_success()
     
-    for keyword in complex_keywords:
-        if keyword in message_lower:
-            return True, f"Complex query detected: {keyword}"
+    final_agent = getattr(result, 'last_agent', None) or agent_to_use
+    if final_agent is not agent_to_use and not needs_handoff:
+        needs_handoff = True
+        handoff_reason = f"Transferred by {agent_to_use.name}"
     
-    sentiment = analyze_sentiment(message)
-    if sentiment in ["negative", "very_negative"]:
-        return True, f"Negative sentiment detected: {sentiment}"
+    response_data = {
+        "response": result.final_output,
+        "agent_used": final_agent.name,
+        "handoff_occurred": needs_handoff,
+        "handoff_reason": handoff_reason if needs_handoff else None,
+        "tools_called": getattr(result, 'tool_calls', []),
+        "success": True,
+        "filtered": False
+    }
     
-    if len(message) > 300:
-        return True, "Long complex message requiring human attention"
+    if cache_key and ResponseCache.is_cacheable(message, response_data):
+        elapsed = time.perf_counter() - started
+        response_cache.put(cache_key, response_data, elapsed)
+        semantic_cache.add(cache_key, response_data, elapsed, query_vector)
     
-    return False, ""
+    logger.info("[SUCCESS] Response generated successfully by %s", final_agent.name)
+    return response_data, context.orders
+
+def _record_event(trace: RequestTrace, response_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Record the query's metrics and structured event, and pass the response through"""
+    QUERY_SECONDS.observe(time.perf_counter() - trace.started)
+    QUERIES.labels(response_data["agent_used"]).inc()
+    if response_data.get("handoff_occurred"):
+        HANDOFFS.inc()
+    if response_data.get("filtered"):
+        FILTERED.inc()
+    if not response_data.get("success"):
+        ERRORS.inc()
+    if response_data.get("cache_hit"):
+        CACHE_HITS.inc()
+    if event_log is not None:
+        event_log.emit(trace.to_event(response_data))
+    return response_data
 
-async def process_customer_query(message: str, customer_id: Optional[str] = None) -> Dict[str, Any]:
+async def process_customer_query(message: str, customer_id: Optional[str] = None,
+                                 deadline: Optional[float] = QUERY_DEADLINE) -> Dict[str, Any]:
     """
     Process customer query with advanced ModelSettings and logging
     Showcases ModelSettings usage with metadata and tool_choice
+    
+    deadline is the time budget in seconds; if the model has not answered by
+    then the response falls back to the FAQ index or a human handoff.
     """
-    logger.info(f"📥 Processing query from customer {customer_id or 'anonymous'}: '{message[:100]}...'")
+    expires = Deadline.after(deadline) if deadline else None
+    trace = RequestTrace(customer_id)
+    logger.info("📥 Processing query from customer %s: '%.100s...'", customer_id or 'anonymous', message)
+    session = _open_session(customer_id)
     
-    needs_handoff, handoff_reason = should_handoff(message)
+    # Runner and _run_agent add model, tool and cache timings to the current trace
+    token = current_trace.set(trace)
+    IN_FLIGHT.inc()
+    try:
+        with trace.stage("routing"):
+            decision = route_message(message)
+        guardrail_response = _filter_verdict(decision)
+        if guardrail_response:
+            logger.info("🛡️ Message blocked by content filter")
+            response_data = _filtered_response(guardrail_response)
+        else:
+            needs_handoff, handoff_reason = _session_routing(session, decision.needs_handoff, decision.handoff_reason)
+            with trace.stage("agent"):
+                response_data = await _run_agent(message, needs_handoff, handoff_reason, expires, session)
+        
+    except Exception as e:
+        logger.error("❌ Error processing query: %s", e)
+        response_data = _error_response(e)
+    finally:
+        current_trace.reset(token)
+        IN_FLIGHT.dec()
     
+    _remember_turn(session, message, response_data)
+    return _record_event(trace, response_data)
+
+async def _traced_stream(stream: AsyncIterator[str], trace: RequestTrace,
+                         deadline: Optional[Deadline]) -> AsyncIterator[str]:
+    """
+    Drive a model stream with current_trace set and within the deadline.
+    The trace is set only while the stream runs, never across a yield, so
+    it does not leak into the consumer's context.
+    """
+    async with contextlib.aclosing(stream):
+        while True:
+            token = current_trace.set(trace)
+            try:
+                step = stream.__anext__()
+                text = await (deadline.run(step) if deadline else step)
+            except StopAsyncIteration:
+                return
+            finally:
+                current_trace.reset(token)
+            yield text
+
+async def process_customer_query_stream(message: str, customer_id: Optional[str] = None,
+                                        deadline: Optional[float] = QUERY_DEADLINE) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of process_customer_query.
+    Yields {"type": "delta", "text": ...} events as the model produces text,
+    {"type": "replace", "text": ...} if the output guardrail rejects the
+    response mid-stream, and finally {"type": "final", "data": response_data}.
+    
+    deadline is the time budget in seconds, as in process_customer_query.
+    If it runs out the fallback answer is sent instead, as a "replace"
+    event when part of the model's text was already streamed.
+    """
+    expires = Deadline.after(deadline) if deadline else None
+    started = time.perf_counter()
+    trace = RequestTrace(customer_id)
+    logger.info("📥 Streaming query from customer %s: '%.100s...'", customer_id or 'anonymous', message)
+    session = _open_session(customer_id)
+    
+    IN_FLIGHT.inc()
     try:
-        guardrail_response = content_filter_guardrail(message)
+        with trace.stage("routing"):
+            decision = route_message(message)
+        needs_handoff, handoff_reason = _session_routing(session, decision.needs_handoff, decision.handoff_reason)
+        guardrail_response = _filter_verdict(decision)
         if guardrail_response:
             logger.info("🛡️ Message blocked by content filter")
-            return {
-                "response": guardrail_response,
-                "agent_used": "content_filter",
-                "handoff_occurred": False,
-                "handoff_reason": None,
-                "tools_called": [],
-                "success": True,
-                "filtered": True
-            }
+            yield {"type": "final", "data": _record_event(trace, _filtered_response(guardrail_response))}
+            return
         
         if needs_handoff:
-            logger.info(f"🔄 Directing to human agent: {handoff_reason}")
+            logger.info("🔄 Directing to human agent: %s", handoff_reason)
             agent_to_use = human_support_agent
         else:
             agent_to_use = customer_support_bot
         
-        result = Runner.run_sync(agent_to_use, message)
+        if not model_breaker.allow():
+            yield {"type": "final", "data": _record_event(
+                trace, _fallback_response(message, needs_handoff, handoff_reason, "degraded"))}
+            return
+        
+        context = RunContextWrapper(customer_id, session)
+        result = Runner.run_streamed(agent_to_use, message, context)
+        output_filter = StreamingOutputFilter()
+        first_token = True
+        
+        model_started = time.perf_counter()
+        try:
+            async with contextlib.aclosing(_traced_stream(result.stream_text(), trace, expires)) as stream:
+                async for text in stream:
+                    safe_text, verdict = output_filter.feed(text)
+                    if verdict:
+                        yield {"type": "replace", "text": verdict}
+                        break
+                    if safe_text:
+                        if first_token:
+                            first_token = False
+                            trace.add("first_token", time.perf_counter() - started)
+                            logger.info("⏱️ Time to first token: %.0f ms", (time.perf_counter() - started) * 1000)
+                        yield {"type": "delta", "text": safe_text}
+        except DeadlineExceeded:
+            # A slow answer says nothing about the backend's health, as in _run_agent
+            model_breaker.release()
+            trace.add("model", time.perf_counter() - model_started)
+            response_data = _fallback_response(message, needs_handoff, handoff_reason, "deadline_exceeded")
+            if not first_token:
+                yield {"type": "replace", "text": response_data["response"]}
+            _remember_orders(session, context.orders)
+            _remember_turn(session, message, response_data)
+            yield {"type": "final", "data": _record_event(trace, response_data)}
+            return
+        except Exception:
+            model_breaker.record_failure()
+            raise
+        except BaseException:
+            model_breaker.release()
+            raise
+        model_breaker.record_success()
+        # Streamed runs are timed as a whole: model time includes any tool calls in between
+        trace.add("model", time.perf_counter() - model_started)
+        
+        safe_text, verdict = output_filter.finish()
+        if safe_text:
+            yield {"type": "delta", "text": safe_text}
         
+        final_agent = result.last_agent or agent_to_use
+        if final_agent is not agent_to_use and not needs_handoff:
+            needs_handoff = True
+            handoff_reason = f"Transferred by {agent_to_use.name}"
+        
+        logger.info("[SUCCESS] Response streamed by %s in %.0f ms", final_agent.name, (time.perf_counter() - started) * 1000)
         response_data = {
-            "response": result.final_output,
-            "agent_used": agent_to_use.name,
+            "response": verdict or result.final_output,
+            "agent_used": final_agent.name,
             "handoff_occurred": needs_handoff,
             "handoff_reason": handoff_reason if needs_handoff else None,
-            "tools_called": getattr(result, 'tool_calls', []),
+            "tools_called": result.tool_calls,
             "success": True,
             "filtered": False
         }
-        
-        logger.info(f"[SUCCESS] Response generated successfully by {agent_to_use.name}")
-        return response_data
+        _remember_orders(session, context.orders)
+        _remember_turn(session, message, response_data)
+        yield {"type": "final", "data": _record_event(trace, response_data)}
         
     except Exception as e:
-        logger.error(f"❌ Error processing query: {str(e)}")
-        return {
-            "response": "I apologize, but I'm experiencing technical difficulties. Please try again or contact our support team directly.",
-            "agent_used": "error_handler",
-            "handoff_occurred": False,
-            "handoff_reason": None,
-            "tools_called": [],
-            "success": False,
-            "filtered": False,
-            "error": str(e)
-        }
+        logger.error("❌ Error processing query: %s", e)
+        yield {"type": "final", "data": _record_event(trace, _error_response(e))}
+    finally:
+        IN_FLIGHT.dec()
+
+async def _iterate_queries(queries) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    if hasattr(queries, '__aiter__'):
+        async for item in queries:
+            yield item
+    else:
+        for item in queries:
+            yield item
+
+async def process_customer_queries(queries, concurrency: int = 50, ordered: bool = False,
+                                   chunk_size: int = 500,
+                                   deadline: Optional[float] = QUERY_DEADLINE) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Process many (message, customer_id) pairs, yielding (index, response_data).
+
+    Queries are pulled chunk_size at a time from a list/iterable or an async
+    iterable; the content filter and handoff routing run over the whole chunk
+    in one go, then agent calls are dispatched with at most `concurrency` in
+    flight. Results are yielded as they complete, or in input order when
+    ordered=True (at most 4 * concurrency results are held back waiting for
+    a slow earlier query). Each response matches process_customer_query and
+    is recorded the same way (structured event and metrics);
+    the per-query deadline starts when the query's agent call is dispatched.
+    """
+    pending: set = set()
+    completed: Dict[int, Dict[str, Any]] = {}
+    next_index = 0
+    scheduled = 0
+    
+    async def run_one(index: int, message: str, trace: RequestTrace, needs_handoff: bool, handoff_reason: str):
+        # Each task runs in its own context copy, so the trace stays with this query
+        current_trace.set(trace)
+        IN_FLIGHT.inc()
+        try:
+            session = _open_session(trace.customer_id)
+            needs_handoff, handoff_reason = _session_routing(session, needs_handoff, handoff_reason)
+            expires = Deadline.after(deadline) if deadline else None
+            with trace.stage("agent"):
+                response_data = await _run_agent(message, needs_handoff, handoff_reason, expires, session)
+        except Exception as e:
+            logger.error("❌ Error processing query: %s", e)
+            return index, _record_event(trace, _error_response(e))
+        finally:
+            IN_FLIGHT.dec()
+        _remember_turn(session, message, response_data)
+        return index, _record_event(trace, response_data)
+    
+    def drain() -> List[Tuple[int, Dict[str, Any]]]:
+        nonlocal next_index
+        if not ordered:
+            ready = list(completed.items())
+            completed.clear()
+            return ready
+        ready = []
+        while next_index in completed:
+            ready.append((next_index, completed.pop(next_index)))
+            next_index += 1
+        return ready
+    
+    async def wait_for_one():
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            index, response_data = task.result()
+            completed[index] = response_data
+    
+    async def flush_chunk(chunk):
+        nonlocal scheduled
+        routed = []
+        for message, customer_id in chunk:
+            trace = RequestTrace(customer_id)
+            try:
+                with trace.stage("routing"):
+                    decision = route_message(message)
+                routed.append((trace, _filter_verdict(decision), (decision.needs_handoff, decision.handoff_reason)))
+            except Exception as e:
+                routed.append((trace, e, (False, "")))
+        logger.info("📥 Routed batch of %s queries", len(chunk))
+        for (message, customer_id), (trace, verdict, (needs_handoff, handoff_reason)) in zip(chunk, routed):
+            index = scheduled
+            scheduled += 1
+            if isinstance(verdict, Exception):
+                logger.error("❌ Error processing query: %s", verdict)
+                completed[index] = _record_event(trace, _error_response(verdict))
+            elif verdict:
+                completed[index] = _record_event(trace, _filtered_response(verdict))
+            else:
+                while len(pending) >= concurrency or (ordered and index - next_index >= 4 * concurrency):
+                    await wait_for_one()
+                    for item in drain():
+                        yield item
+                pending.add(asyncio.ensure_future(run_one(index, message, trace, needs_handoff, handoff_reason)))
+            for item in drain():
+                yield item
+    
+    try:
+        chunk = []
+        async for item in _iterate_queries(queries):
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                async for result in flush_chunk(chunk):
+                    yield result
+                chunk = []
+        if chunk:
+            async for result in flush_chunk(chunk):
+                yield result
+        while pending:
+            await wait_for_one()
+            for item in drain():
+                yield item
+    finally:
+        for task in pending:
+            task.cancel()
 
 def run_demo_scenarios():
     """Run demonstration scenarios to showcase all features"""
@@ -413,15 +1317,26 @@ def run_demo_scenarios():
         }
     ]
     
-    for i, scenario in enumerate(demo_scenarios, 1):
+    # One event loop serves every scenario; the queries run concurrently
+    async def run_all():
+        return await asyncio.gather(*(
+            process_customer_query(message=scenario['message'], customer_id=scenario['customer_id'])
+            for scenario in demo_scenarios
+        ))
+    
+    async def run_demo():
+        await model_clients.startup()
+        try:
+            return await run_all()
+        finally:
+            await model_clients.shutdown()
+    
+    responses = asyncio.run(run_demo())
+    
+    for i, (scenario, response_data) in enumerate(zip(demo_scenarios, responses), 1):
         print(f"\n--- Test Scenario {i}: {scenario['description']} ---")
         print(f"Customer: {scenario['message']}")
         
-        response_data = asyncio.run(process_customer_query(
-            message=scenario['message'],
-            customer_id=scenario['customer_id']
-        ))
-        
         print(f"Agent: {response_data['agent_used']}")
         print(f"Response: {response_data['response']}")
         
@@ -0,0 +1,115 @@
+"""
+Circuit breaker for the model backend
+Stops calling a failing endpoint so requests fail fast instead of each
+waiting for its own timeout.
+"""
+import logging
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures.
+    Open -> half-open once recovery_timeout seconds have passed; up to
+    half_open_max_calls probe calls are then let through.
+    Half-open -> closed after success_threshold probe successes, or back
+    to open on any probe failure.
+
+    Callers ask allow() before each call and report the outcome with
+    record_success(), record_failure() or, for a call abandoned without
+    a verdict (cancelled), release().
+    """
+
+    def __init__(self, name: str = "model", failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, success_threshold: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._changed_at = clock()
+        self._consecutive_failures = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.metrics: Dict[str, int] = {
+            "calls": 0, "successes": 0, "failures": 0, "rejected": 0,
+            "opened": 0, "half_opened": 0, "closed": 0,
+        }
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        now = self.clock()
+        logger.warning("Circuit '%s' %s -> %s after %.1fs (%s consecutive failures)",
+                       self.name, previous, state, now - self._changed_at, self._consecutive_failures)
+        self._changed_at = now
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = now
+            self.metrics["opened"] += 1
+        elif state == HALF_OPEN:
+            self.metrics["half_opened"] += 1
+        else:
+            self._consecutive_failures = 0
+            self.metrics["closed"] += 1
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now; a False counts as a rejected call"""
+        state = self.state
+        if state == CLOSED:
+            self.metrics["calls"] += 1
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+            self._probes_in_flight += 1
+            self.metrics["calls"] += 1
+            return True
+        self.metrics["rejected"] += 1
+        return False
+
+    def record_success(self) -> None:
+        self.metrics["successes"] += 1
+        self._consecutive_failures = 0
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._probe_successes += 1
+            if self._probe_successes >= self.success_threshold:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.metrics["failures"] += 1
+        self._consecutive_failures += 1
+        if self._state == HALF_OPEN:
+            self._transition(OPEN)
+        elif self._state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without judging the backend"""
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            **self.metrics,
+            "state": state,
+            "state_code": {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[state],
+            "seconds_in_state": round(self.clock() - self._changed_at, 3),
+            "consecutive_failures": self._consecutive_failures,
+        }
@@ -0,0 +1,177 @@
+"""
+Structured per-request events
+Each query gets a RequestTrace that collects stage timings; the finished
+event is appended to a JSON-lines file in batches by a background thread.
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class RequestTrace:
+    """Request ID, customer ID and accumulated seconds per stage for one query"""
+    __slots__ = ("request_id", "customer_id", "started", "stages", "counts")
+
+    def __init__(self, customer_id: Optional[str] = None, request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.customer_id = customer_id
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def to_event(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
+        timings = {f"{stage}_ms": round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+        timings["total_ms"] = round((time.perf_counter() - self.started) * 1000, 3)
+        return {
+            "ts": round(time.time(), 3),
+            "request_id": self.request_id,
+            "customer_id": self.customer_id,
+            "agent_used": response_data.get("agent_used"),
+            "success": response_data.get("success"),
+            "filtered": response_data.get("filtered", False),
+            "handoff": response_data.get("handoff_occurred", False),
+            "cache_hit": response_data.get("cache_hit", False),
+            "cache_similarity": response_data.get("cache_similarity"),
+            "deadline_exceeded": response_data.get("deadline_exceeded", False),
+            "degraded": response_data.get("degraded", False),
+            "tools_called": response_data.get("tools_called", []),
+            "model_calls": self.counts.get("model", 0),
+            "timings": timings,
+        }
+
+# The trace of the query being processed; Runner adds model and tool timings to it
+current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("current_trace", default=None)
+
+def trace_stage(name: str):
+    """Time a block into the current trace, if there is one"""
+    trace = current_trace.get()
+    return trace.stage(name) if trace is not None else contextlib.nullcontext()
+
+class EventLog:
+    """
+    Appends events to a JSON-lines file. emit() only appends to an
+    in-memory batch; full batches (and, every flush_interval seconds,
+    partial ones) are serialized and written by a daemon thread.
+    Like RotatingFileHandler, the file is rolled over to path.1 ...
+    path.<backup_count> before a batch would take it past max_bytes;
+    rotation is off when either is 0. Batches are never split.
+    """
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 1.0,
+                 max_bytes: int = 0, backup_count: int = 5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._batch: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._batches: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        self._closed = False
+        self.written = 0
+        self._writer = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._batch.append(event)
+            if len(self._batch) < self.batch_size:
+                return
+            batch, self._batch = self._batch, []
+        self._batches.put(batch)
+
+    def _take_partial(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batch, self._batch = self._batch, []
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            data = "".join(json.dumps(event, default=str) + "\n" for event in batch).encode("utf-8")
+            if self.max_bytes > 0 and self.backup_count > 0 and self._size and self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error("Event log write failed, dropped %s events: %s", len(batch), e)
+
+    def _rotate(self) -> None:
+        """Shift path -> path.1 -> ... and start a new file; runs on the writer thread"""
+        self._file.close()
+        try:
+            for number in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{number}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{number + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        finally:
+            # Keep writing to whichever file is at path, even if a rename failed
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = self._batches.get(timeout=self.flush_interval)
+            except queue.Empty:
+                batch = self._take_partial()
+            if batch is None:
+                return
+            self._write(batch)
+
+    def close(self) -> None:
+        """Write everything still buffered and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._batches.put(self._take_partial())
+        self._batches.put(None)
+        self._writer.join()
+        self._file.close()
+
+def summarize(path: str) -> Dict[str, Dict[str, float]]:
+    """p50/p95/p99 per timing field across every event in a JSON-lines file"""
+    samples: Dict[str, List[float]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            for stage, value in json.loads(line).get("timings", {}).items():
+                samples.setdefault(stage, []).append(value)
+    summary = {}
+    for stage, values in samples.items():
+        values.sort()
+        pick = lambda fraction: values[min(len(values) - 1, int(fraction * len(values)))]
+        summary[stage] = {"count": len(values), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+    return summary
+
+if __name__ == "__main__":
+    for stage, row in summarize(sys.argv[1] if len(sys.argv) > 1 else "customer_support_events.jsonl").items():
+        print(f"{stage:22} n={row['count']:<7} p50={row['p50']:9.3f} p95={row['p95']:9.3f} p99={row['p99']:9.3f}")
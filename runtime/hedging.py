@@ -0,0 +1,144 @@
+"""
+Deadlines and hedged requests for model calls
+A Deadline travels with a query down to each model call; HedgePolicy
+fires a duplicate request when the first one is slower than the recent
+p95 and keeps whichever answers first.
+"""
+import asyncio
+import collections
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The query's time budget ran out before the model answered"""
+
+class Deadline:
+    """Absolute point in time (on `clock`) by which a query must be answered"""
+
+    def __init__(self, expires_at: float, clock: Callable[[], float] = time.monotonic):
+        self.expires_at = expires_at
+        self.clock = clock
+
+    @classmethod
+    def after(cls, seconds: float, clock: Callable[[], float] = time.monotonic) -> "Deadline":
+        return cls(clock() + seconds, clock)
+
+    def remaining(self) -> float:
+        return self.expires_at - self.clock()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Await within the remaining budget; raises DeadlineExceeded and cancels the work when it runs out"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded("deadline already exhausted")
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError as e:
+            if isinstance(e, DeadlineExceeded):
+                raise
+            raise DeadlineExceeded(f"no answer within {remaining:.2f}s") from e
+
+class HedgePolicy:
+    """
+    Decides when to send a hedged duplicate of a slow model call.
+
+    The hedge delay is the `percentile` of the last `window` successful
+    call latencies (never below min_delay); hedging starts once
+    min_samples latencies have been seen. At most max_hedge_ratio of calls
+    may be hedged so a slow endpoint does not get twice the load.
+    """
+
+    def __init__(self, percentile: float = 0.95, window: int = 500, min_samples: int = 50,
+                 max_hedge_ratio: float = 0.1, min_delay: float = 0.05,
+                 clock: Callable[[], float] = time.monotonic):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_delay = min_delay
+        self.clock = clock
+        self._latencies = collections.deque(maxlen=window)
+        self._cached_delay: Optional[float] = None
+        self._stale = 0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._stale += 1
+        # Re-sorting the window on every call is wasteful; refresh after a tenth of it has changed
+        if self._stale >= max(1, self._latencies.maxlen // 10):
+            self._cached_delay = None
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples"""
+        if len(self._latencies) < self.min_samples:
+            return None
+        if self._cached_delay is None:
+            ordered = sorted(self._latencies)
+            position = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+            self._cached_delay = max(self.min_delay, ordered[position])
+            self._stale = 0
+        return self._cached_delay
+
+    def allow_hedge(self) -> bool:
+        return self.hedges < self.max_hedge_ratio * self.calls
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay": self.delay(),
+        }
+
+async def hedged(factory: Callable[[], Awaitable[Any]], policy: HedgePolicy) -> Any:
+    """
+    Await factory(); if it has not answered after policy.delay(), start a
+    second factory() and return whichever succeeds first. The other call is
+    cancelled. If one attempt fails the other is still awaited; the first
+    error is raised only when both fail.
+    """
+    policy.calls += 1
+    delay = policy.delay()
+    started = {}
+
+    def launch() -> "asyncio.Task":
+        task = asyncio.ensure_future(factory())
+        started[task] = policy.clock()
+        return task
+
+    tasks = [launch()]
+    first_error: Optional[BaseException] = None
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and policy.allow_hedge():
+                policy.hedges += 1
+                logger.info("Model call slower than %.0f ms, sending hedged request", delay * 1000)
+                tasks.append(launch())
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    # Time since the first attempt: exact when it won, a lower bound when the hedge did
+                    policy.record(policy.clock() - started[tasks[0]])
+                    if task is not tasks[0]:
+                        policy.hedge_wins += 1
+                    return task.result()
+                first_error = first_error or task.exception()
+        raise first_error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
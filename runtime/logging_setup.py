@@ -0,0 +1,85 @@
+"""
+Non-blocking logging
+Request handlers only enqueue log records; a background QueueListener
+thread formats them and does the file and console I/O.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves %-formatting to the listener thread when the
+    arguments are immutable scalars. Records with mutable arguments (dicts,
+    lists) or exceptions are formatted here, as the stock handler does, so
+    the logged text cannot change after the call returns.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if record.exc_info or record.stack_info or (
+                args and not (isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE) for arg in args))):
+            return super().prepare(record)
+        return record
+
+class SamplingFilter(logging.Filter):
+    """Pass a `rate` fraction of INFO-and-below records; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(log_file: str = 'customer_support_bot.log', level: int = logging.INFO,
+                      max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                      console: bool = True) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to a rotating file (and the
+    console) written by a background thread. Safe to call again: the
+    previous listener is stopped and replaced. The listener is flushed
+    and stopped at interpreter exit.
+    """
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                     encoding='utf-8')]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging() -> None:
+    """Drain queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,112 @@
+"""
+Shared model client
+One pooled HTTP client per process, reused by every agent, with explicit
+startup and shutdown hooks so connections are opened once and closed cleanly.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class ModelClientFactory:
+    """
+    Owns the AsyncOpenAI client and the httpx connection pool behind it.
+
+    httpx pools are bound to the event loop that first used them, so the
+    client is built lazily inside the running loop and rebuilt only if a
+    different loop asks for it (e.g. successive asyncio.run calls in a
+    script). A long-running server keeps a single client for its lifetime.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str], max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0,
+                 http2: bool = True, connect_timeout: float = 5.0, timeout: float = 60.0,
+                 max_retries: int = 0):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2
+        self.max_retries = max_retries
+        self._client: Optional[AsyncOpenAI] = None
+        self._loop = None
+        self.clients_built = 0
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str], base_url: Optional[str], max_retries: int = 0) -> "ModelClientFactory":
+        """Pool settings from MODEL_MAX_CONNECTIONS, MODEL_MAX_KEEPALIVE, MODEL_KEEPALIVE_EXPIRY, MODEL_HTTP2"""
+        return cls(
+            api_key, base_url,
+            max_connections=int(os.getenv("MODEL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("MODEL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("MODEL_KEEPALIVE_EXPIRY", "30")),
+            http2=os.getenv("MODEL_HTTP2", "1").lower() not in ("0", "false", "no"),
+            max_retries=max_retries
+        )
+
+    def _build(self) -> AsyncOpenAI:
+        http_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        self.clients_built += 1
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                           max_retries=self.max_retries, http_client=http_client)
+
+    def get(self) -> AsyncOpenAI:
+        """The shared client for the running event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._client is None or (loop is not None and self._loop is not loop):
+            if self._client is not None and self._loop is not None and not self._loop.is_closed():
+                logger.warning("Model client requested from a second event loop; building a separate pool")
+            self._client = self._build()
+            self._loop = loop
+        return self._client
+
+    async def startup(self) -> AsyncOpenAI:
+        """Build the client in the current loop before the first request"""
+        return self.get()
+
+    async def shutdown(self) -> None:
+        """Close pooled connections; the next request after this builds a fresh client"""
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients_built": self.clients_built,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+        }
+
+class SharedModelClient:
+    """
+    Stand-in for an AsyncOpenAI client that resolves the factory's shared
+    client on each attribute access, so it can be handed to models at
+    import time, before any event loop exists.
+    """
+
+    def __init__(self, factory: ModelClientFactory):
+        self.factory = factory
+
+    def __getattr__(self, name: str):
+        return getattr(self.factory.get(), name)
@@ -0,0 +1,299 @@
+"""
+Client-side rate limiting for the model endpoint
+Token buckets for requests and tokens per minute plus AIMD adaptive
+concurrency, applied by wrapping the AsyncOpenAI client so both the
+custom Runner and the agents SDK's OpenAIChatCompletionsModel go through it.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` units per second"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.level = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 when they are now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+class AdaptiveLimiter:
+    """
+    Request/token budgets plus AIMD concurrency control.
+
+    Each call waits for a concurrency slot and for both buckets. The
+    concurrency limit grows by one per limit-worth of fast successes
+    (additive increase) and halves on a 429 or a latency spike
+    (multiplicative decrease, at most once per `decrease_cooldown`).
+    A 429 with Retry-After also pauses every caller until it expires, so
+    throttled requests do not retry in a storm.
+    """
+
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 100_000,
+                 initial_concurrency: int = 8, min_concurrency: int = 1, max_concurrency: int = 64,
+                 latency_target: float = 10.0, decrease_cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 60.0 * 5), clock)
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, max(1.0, tokens_per_minute / 60.0 * 5), clock)
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+        self.clock = clock
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._condition: Optional[asyncio.Condition] = None
+        self._condition_loop = None
+        self.metrics: Dict[str, float] = {
+            "requests": 0, "throttled": 0, "latency_spikes": 0, "decreases": 0,
+            "wait_seconds_total": 0.0, "wait_seconds_max": 0.0, "max_queue_depth": 0,
+        }
+
+    def _cond(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    async def acquire(self, estimated_tokens: float) -> float:
+        """Wait for a slot and budget; returns the time spent waiting"""
+        started = self.clock()
+        condition = self._cond()
+        self.queue_depth += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue_depth)
+        try:
+            async with condition:
+                while True:
+                    now = self.clock()
+                    delay = max(self.paused_until - now,
+                                self.requests.delay_for(1),
+                                self.tokens.delay_for(estimated_tokens))
+                    if self.in_flight < int(self.limit) and delay <= 0:
+                        break
+                    if delay > 0:
+                        try:
+                            await asyncio.wait_for(condition.wait(), timeout=delay)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await condition.wait()
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                self.in_flight += 1
+        finally:
+            self.queue_depth -= 1
+        waited = self.clock() - started
+        self.metrics["requests"] += 1
+        self.metrics["wait_seconds_total"] += waited
+        self.metrics["wait_seconds_max"] = max(self.metrics["wait_seconds_max"], waited)
+        return waited
+
+    def release(self, latency: Optional[float], throttled: bool = False,
+                retry_after: Optional[float] = None, token_correction: float = 0.0) -> None:
+        """Return a slot and feed the outcome into AIMD; safe to call from cancellation paths"""
+        self.in_flight -= 1
+        if token_correction > 0:
+            self.tokens.take(token_correction)
+        elif token_correction < 0:
+            self.tokens.give_back(-token_correction)
+
+        if throttled:
+            self.metrics["throttled"] += 1
+            if retry_after:
+                self.paused_until = max(self.paused_until, self.clock() + retry_after)
+            self._decrease("429 from model endpoint")
+        elif latency is not None and latency > self.latency_target:
+            self.metrics["latency_spikes"] += 1
+            self._decrease(f"latency {latency:.2f}s over target")
+        elif latency is not None:
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / max(self.limit, 1.0))
+
+        if self._condition is not None and not self._condition_loop.is_closed():
+            self._condition_loop.create_task(self._wake())
+
+    async def _wake(self) -> None:
+        condition = self._cond()
+        async with condition:
+            condition.notify_all()
+
+    def _decrease(self, reason: str) -> None:
+        now = self.clock()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(float(self.min_concurrency), self.limit / 2)
+        self.metrics["decreases"] += 1
+        logger.warning("Model concurrency limit %.1f -> %.1f (%s)", previous, self.limit, reason)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limiter state and counters"""
+        requests = self.metrics["requests"]
+        return {
+            **self.metrics,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "wait_seconds_avg": self.metrics["wait_seconds_total"] / requests if requests else 0.0,
+        }
+
+def estimate_tokens(request: Dict[str, Any], completion_estimate: int = 256) -> int:
+    """Rough prompt + completion token estimate (about 4 characters per token)"""
+    characters = sum(len(str(message.get("content") or "")) for message in request.get("messages", []))
+    return characters // 4 + int(request.get("max_tokens") or completion_estimate)
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after")) if headers.get("retry-after") else None
+    except (TypeError, ValueError):
+        return None
+
+class _LimitedCompletions:
+    def __init__(self, client, limiter: AdaptiveLimiter, max_retries: int):
+        # Resolved per call so a SharedModelClient can swap the underlying client
+        self._client = client
+        self._limiter = limiter
+        self._max_retries = max_retries
+
+    async def create(self, **request):
+        limiter = self._limiter
+        estimated = estimate_tokens(request)
+        if request.get("stream"):
+            # Ask for the final usage chunk so the token bucket can be corrected
+            request.setdefault("stream_options", {"include_usage": True})
+        for attempt in range(self._max_retries + 1):
+            await limiter.acquire(estimated)
+            started = limiter.clock()
+            try:
+                response = await self._client.chat.completions.create(**request)
+            except Exception as e:
+                if getattr(e, "status_code", None) == 429:
+                    retry_after = _retry_after(e) or min(2.0 ** attempt, 30.0)
+                    limiter.release(None, throttled=True, retry_after=retry_after)
+                    if attempt < self._max_retries:
+                        continue
+                else:
+                    limiter.release(None)
+                raise
+            except BaseException:
+                # Cancelled mid-call: give the slot back without judging the endpoint
+                limiter.release(None)
+                raise
+            latency = limiter.clock() - started
+            if request.get("stream"):
+                # The slot is held while the stream is read; latency is the time to the response
+                return _LimitedStream(response, limiter, latency, estimated)
+            limiter.release(latency, token_correction=_token_correction(response, estimated))
+            return response
+
+def _token_correction(response, estimated: float) -> float:
+    usage = getattr(response, "usage", None)
+    actual = getattr(usage, "total_tokens", None) if usage is not None else None
+    return (actual - estimated) if actual else 0.0
+
+class _LimitedStream:
+    """
+    Streamed completion that keeps its limiter slot until the stream is
+    exhausted, fails or is closed, then corrects the token bucket with the
+    usage reported in the last chunk.
+    """
+
+    def __init__(self, stream, limiter: AdaptiveLimiter, latency: float, estimated: float):
+        self._stream = stream
+        self._limiter = limiter
+        self._latency = latency
+        self._estimated = estimated
+        self._usage_chunk = None
+        self._released = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except BaseException:
+            # End of stream, a dropped connection or cancellation
+            self._release()
+            raise
+        if getattr(chunk, "usage", None) is not None:
+            self._usage_chunk = chunk
+        return chunk
+
+    def _release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter.release(self._latency, token_correction=_token_correction(self._usage_chunk, self._estimated))
+
+    async def close(self) -> None:
+        self._release()
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            await close()
+
+    aclose = close
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def __del__(self):
+        # A stream dropped without being read to the end or closed must not leak its slot
+        if not self._released:
+            self._release()
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+class _LimitedChat:
+    def __init__(self, client, limiter: AdaptiveLimiter, max_retries: int):
+        self.completions = _LimitedCompletions(client, limiter, max_retries)
+
+class RateLimitedClient:
+    """
+    Drop-in wrapper for an AsyncOpenAI client: chat.completions.create goes
+    through the limiter, everything else is passed to the wrapped client.
+    Build the wrapped client with max_retries=0 so 429s are retried here,
+    after the shared pause, rather than immediately inside the SDK.
+    """
+
+    def __init__(self, client, limiter: AdaptiveLimiter, max_retries: int = 3):
+        self._client = client
+        self.limiter = limiter
+        self.chat = _LimitedChat(client, limiter, max_retries)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
@@ -0,0 +1,96 @@
+"""
+Response cache for repeated FAQ-style queries
+Near-identical questions are answered from memory instead of a new LLM round-trip.
+"""
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ORDER_ID_PATTERN = re.compile(r"\bord[-\s]?\d+\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(message: str) -> str:
+    """Cache key for a message: lowercased, order IDs masked, whitespace collapsed"""
+    masked = ORDER_ID_PATTERN.sub("<order_id>", message.lower())
+    return _WHITESPACE.sub(" ", masked).strip(" ?!.")
+
+def is_order_specific(message: str) -> bool:
+    """True when the message names an order; answers to those are never shared"""
+    return ORDER_ID_PATTERN.search(message) is not None
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of response_data dicts with a TTL.
+
+    Each entry remembers how long the original answer took to generate, so
+    hits can report the latency they saved. Callers decide what is
+    cacheable; see is_cacheable().
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def is_cacheable(message: str, response_data: Dict[str, Any]) -> bool:
+        """Only successful, unfiltered bot answers that are not about a specific order"""
+        return (
+            response_data.get("success")
+            and not response_data.get("filtered")
+            and not response_data.get("handoff_occurred")
+            and not any(tool.startswith("get_order") for tool in response_data.get("tools_called", []))
+            and not is_order_specific(message)
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            response_data = entry[1]
+        # Callers may annotate the dict they get back, so hand out a copy
+        return copy.deepcopy(response_data)
+
+    def put(self, key: str, response_data: Dict[str, Any], cost_seconds: float = 0.0) -> None:
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, copy.deepcopy(response_data), cost_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "latency_saved_s": round(self.saved_seconds, 3),
+            }
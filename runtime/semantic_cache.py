@@ -0,0 +1,147 @@
+"""
+Local semantic response cache
+Catches paraphrased questions that the exact-match ResponseCache misses.
+Queries are embedded offline with hashed character n-grams and compared
+by cosine similarity against one contiguous float32 matrix.
+
+NumPy is optional: without it SemanticCache reports itself unavailable
+and every lookup is a miss.
+"""
+import copy
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from tools.faq_index import tokenize
+
+class HashedNgramVectorizer:
+    """
+    Dependency-free text embedding: character n-grams of the tokenized query
+    hashed into `dim` buckets, L2-normalized. crc32 keeps the hashing stable
+    across processes (unlike the built-in hash()).
+    """
+
+    def __init__(self, dim: int = 256, ngram_sizes: Tuple[int, ...] = (3, 4)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def transform(self, text: str) -> "np.ndarray":
+        vector = np.zeros(self.dim, dtype=np.float32)
+        padded = f" {' '.join(tokenize(text))} "
+        for size in self.ngram_sizes:
+            for start in range(len(padded) - size + 1):
+                vector[zlib.crc32(padded[start:start + size].encode("utf-8")) % self.dim] += 1.0
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+class SemanticCache:
+    """
+    Nearest-neighbour response cache.
+
+    Vectors live in a preallocated (max_entries, dim) float32 matrix, so a
+    lookup is a single matrix-vector product followed by argmax. Entries
+    expire after `ttl`; when the matrix is full the least recently used
+    slot is overwritten.
+    """
+
+    def __init__(self, max_entries: int = 10_000, threshold: float = 0.8, ttl: float = 3600.0,
+                 vectorizer: Optional[HashedNgramVectorizer] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.clock = clock
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self.available = np is not None and max_entries > 0
+        self._lock = threading.Lock()
+        self._responses: List[Optional[Dict[str, Any]]] = [None] * max(max_entries, 0)
+        self._costs: List[float] = [0.0] * max(max_entries, 0)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        if self.available:
+            self._vectors = np.zeros((max_entries, self.vectorizer.dim), dtype=np.float32)
+            self._expires = np.zeros(max_entries, dtype=np.float64)
+            self._last_used = np.zeros(max_entries, dtype=np.float64)
+
+    def embed(self, text: str) -> Optional["np.ndarray"]:
+        return self.vectorizer.transform(text) if self.available else None
+
+    def lookup(self, text: str, vector: Optional["np.ndarray"] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (response_data copy, similarity) for the closest live entry above threshold"""
+        if not self.available:
+            return None
+        if vector is None:
+            vector = self.embed(text)
+        with self._lock:
+            now = self.clock()
+            size = self._size
+            if size == 0:
+                self.misses += 1
+                return None
+            similarities = self._vectors[:size] @ vector
+            similarities[self._expires[:size] <= now] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            self.saved_seconds += self._costs[best]
+            response_data = self._responses[best]
+        return copy.deepcopy(response_data), similarity
+
+    def add(self, text: str, response_data: Dict[str, Any], cost_seconds: float = 0.0,
+            vector: Optional["np.ndarray"] = None) -> None:
+        if not self.available or self.ttl <= 0:
+            return
+        if vector is None:
+            vector = self.embed(text)
+        with self._lock:
+            now = self.clock()
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                expired = np.flatnonzero(self._expires <= now)
+                if expired.size:
+                    slot = int(expired[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.evictions += 1
+            self._vectors[slot] = vector
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._responses[slot] = copy.deepcopy(response_data)
+            self._costs[slot] = cost_seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._size = 0
+            self._responses = [None] * max(self.max_entries, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "available": self.available,
+                "size": self._size,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "latency_saved_s": round(self.saved_seconds, 3),
+            }
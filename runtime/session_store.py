@@ -0,0 +1,267 @@
+"""
+Per-customer session state
+Recent turns, the agent currently handling the customer, the orders looked
+up in the conversation and the handoff state, kept in a bounded LRU with
+an idle TTL. Sessions pushed out by the LRU cap can spill to a local
+SQLite file and are loaded back on the customer's next message.
+"""
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Session:
+    """
+    Conversation state for one customer.
+
+    turns holds (role, text) pairs, oldest first; handoff_reason is None
+    until the customer is handed off to a human. Fields are slots, so an
+    idle session costs a few hundred bytes plus its turn text.
+    """
+    __slots__ = ("customer_id", "turns", "active_agent", "orders", "handoff_reason", "created", "last_seen")
+
+    def __init__(self, customer_id: str, now: float):
+        self.customer_id = customer_id
+        self.turns: List[Tuple[str, str]] = []
+        self.active_agent: Optional[str] = None
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.handoff_reason: Optional[str] = None
+        self.created = now
+        self.last_seen = now
+
+    @property
+    def handed_off(self) -> bool:
+        return self.handoff_reason is not None
+
+    def history(self) -> List[Dict[str, str]]:
+        """Recent turns as chat-completions messages"""
+        return [{"role": role, "content": text} for role, text in self.turns]
+
+    def _dump(self) -> str:
+        return json.dumps([self.turns, self.active_agent, self.orders, self.handoff_reason, self.created])
+
+    @classmethod
+    def _load(cls, customer_id: str, last_seen: float, data: str) -> "Session":
+        turns, active_agent, orders, handoff_reason, created = json.loads(data)
+        session = cls(customer_id, created)
+        session.turns = [tuple(turn) for turn in turns]
+        session.active_agent = active_agent
+        session.orders = orders
+        session.handoff_reason = handoff_reason
+        session.last_seen = last_seen
+        return session
+
+class SessionStore:
+    """
+    LRU of Session records capped at max_sessions, with an idle TTL.
+
+    A session unused for ttl seconds is gone. Past max_sessions the least
+    recently used session is dropped, or with spill_path written to SQLite;
+    spilled sessions are buffered and written spill_batch at a time, so an
+    eviction costs no disk round-trip of its own. Each session keeps at most
+    max_turns turns of max_turn_chars characters and max_orders orders.
+    Expired sessions are purged every purge_interval seconds and expired
+    spilled rows on every spill write; close() (run at exit) writes what
+    is still buffered. The clock is wall time so spilled sessions keep
+    their age across restarts.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            customer_id TEXT PRIMARY KEY,
+            last_seen   REAL NOT NULL,
+            data        TEXT NOT NULL
+        ) WITHOUT ROWID
+    """
+    INDEX = "CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)"
+    SELECT_ONE = "SELECT last_seen, data FROM sessions WHERE customer_id = ?"
+    INSERT = "INSERT OR REPLACE INTO sessions (customer_id, last_seen, data) VALUES (?, ?, ?)"
+    DELETE_ONE = "DELETE FROM sessions WHERE customer_id = ?"
+    DELETE_EXPIRED = "DELETE FROM sessions WHERE last_seen <= ?"
+
+    def __init__(self, max_sessions: int = 100_000, ttl: float = 1800.0, max_turns: int = 10,
+                 max_turn_chars: int = 2000, max_orders: int = 5, spill_path: Optional[str] = None,
+                 spill_batch: int = 256, purge_interval: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_turn_chars = max_turn_chars
+        self.max_orders = max_orders
+        self.spill_path = spill_path
+        self.spill_batch = spill_batch
+        self.purge_interval = purge_interval
+        self.clock = clock
+        self._last_purge = clock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._pending: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.spilled = 0
+        self.restored = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if spill_path:
+            # One connection, only used under the lock; check_same_thread is off so any thread may hold it
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(self.SCHEMA)
+            self._db.execute(self.INDEX)
+            self._db.commit()
+            atexit.register(self.close)
+            logger.info("Spilling evicted sessions to %s", spill_path)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, customer_id: str) -> Optional[Session]:
+        """The customer's live session, or None; a hit counts as activity"""
+        with self._lock:
+            return self._get(customer_id, self.clock())
+
+    def session(self, customer_id: str) -> Session:
+        """The customer's live session, created if there is none"""
+        with self._lock:
+            now = self.clock()
+            if now - self._last_purge >= self.purge_interval:
+                self._purge(now)
+            session = self._get(customer_id, now)
+            if session is None:
+                session = Session(customer_id, now)
+                self._sessions[customer_id] = session
+                self.created += 1
+                self._evict()
+            return session
+
+    def _get(self, customer_id: str, now: float) -> Optional[Session]:
+        """Look in memory, then in the spill; caller holds the lock"""
+        session = self._sessions.get(customer_id)
+        if session is None:
+            session = self._restore(customer_id, now)
+            if session is None:
+                return None
+            self._sessions[customer_id] = session
+            self._evict()
+        elif session.last_seen + self.ttl <= now:
+            del self._sessions[customer_id]
+            self.expirations += 1
+            return None
+        self._sessions.move_to_end(customer_id)
+        session.last_seen = now
+        return session
+
+    def _restore(self, customer_id: str, now: float) -> Optional[Session]:
+        session = self._pending.pop(customer_id, None)
+        if session is None and self._db is not None:
+            row = self._db.execute(self.SELECT_ONE, (customer_id,)).fetchone()
+            if row is not None:
+                session = Session._load(customer_id, row[0], row[1])
+        if session is None or session.last_seen + self.ttl <= now:
+            return None
+        self.restored += 1
+        return session
+
+    def _evict(self) -> None:
+        """Drop or spill least recently used sessions past max_sessions; caller holds the lock"""
+        while len(self._sessions) > max(self.max_sessions, 0):
+            customer_id, session = self._sessions.popitem(last=False)
+            self.evictions += 1
+            if self._db is not None:
+                self._pending[customer_id] = session
+                self.spilled += 1
+        if len(self._pending) >= self.spill_batch:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write buffered evictions and drop expired spilled rows; caller holds the lock"""
+        if self._db is None or not self._pending:
+            return
+        cutoff = self.clock() - self.ttl
+        self._db.executemany(self.INSERT, [(customer_id, session.last_seen, session._dump())
+                                           for customer_id, session in self._pending.items()
+                                           if session.last_seen > cutoff])
+        self._db.execute(self.DELETE_EXPIRED, (cutoff,))
+        self._db.commit()
+        self._pending.clear()
+
+    def add_turn(self, session: Session, role: str, text: str) -> None:
+        """Append a turn, keeping the last max_turns"""
+        with self._lock:
+            session.turns.append((role, text[:self.max_turn_chars]))
+            if len(session.turns) > self.max_turns:
+                del session.turns[:-self.max_turns]
+
+    def remember_order(self, session: Session, order: Dict[str, Any]) -> None:
+        """Keep an order lookup result, keeping the last max_orders orders"""
+        with self._lock:
+            session.orders.pop(order["order_id"], None)
+            session.orders[order["order_id"]] = order
+            while len(session.orders) > self.max_orders:
+                del session.orders[next(iter(session.orders))]
+
+    def end(self, customer_id: str) -> None:
+        """Forget a customer's session, including any spilled copy"""
+        with self._lock:
+            self._sessions.pop(customer_id, None)
+            self._pending.pop(customer_id, None)
+            if self._db is not None:
+                self._db.execute(self.DELETE_ONE, (customer_id,))
+                self._db.commit()
+
+    def purge_expired(self) -> int:
+        """Drop sessions idle for longer than the TTL, in memory and spilled; returns how many were in memory"""
+        with self._lock:
+            return self._purge(self.clock())
+
+    def _purge(self, now: float) -> int:
+        """Caller holds the lock"""
+        self._last_purge = now
+        cutoff = now - self.ttl
+        expired = 0
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            customer_id, session = next(iter(self._sessions.items()))
+            if session.last_seen > cutoff:
+                break
+            del self._sessions[customer_id]
+            expired += 1
+        self.expirations += expired
+        if self._db is not None:
+            self._flush()
+            self._db.execute(self.DELETE_EXPIRED, (cutoff,))
+            self._db.commit()
+        return expired
+
+    def flush(self) -> None:
+        """Write buffered evictions to the spill file"""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """Write buffered evictions and close the spill file; safe to call more than once"""
+        with self._lock:
+            if self._db is not None:
+                self._flush()
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "created": self.created,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "spilled": self.spilled,
+                "restored": self.restored,
+            }
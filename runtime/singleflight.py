@@ -0,0 +1,76 @@
+"""
+In-flight request coalescing
+Concurrent callers asking for the same key share one pending call.
+"""
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Asyncio singleflight: the first caller for a key starts the work as its
+    own task, later callers with the same key await that task instead of
+    starting another one.
+
+    Cancelling one waiter never cancels the shared call for the others
+    (each waiter awaits it through asyncio.shield); the call itself is only
+    cancelled once every waiter has gone away. At most max_keys calls are
+    tracked; beyond that new keys run uncoalesced. Results are deep-copied
+    per waiter so callers can annotate them freely.
+    """
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._calls: Dict[Any, "asyncio.Task"] = {}
+        self._waiters: Dict[Any, int] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    def _forget(self, key: Any, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+
+    async def do(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            if len(self._calls) >= self.max_keys:
+                self.bypassed += 1
+                return await factory()
+            self.executions += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.info("Coalesced onto in-flight call (%s already waiting)", self._waiters[key])
+
+        self._waiters[key] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._calls.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] <= 0:
+                    task.cancel()
+            raise
+        else:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+        return copy.deepcopy(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+        }
@@ -0,0 +1,73 @@
+"""
+Shared test fixtures
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+class FakeClock:
+    """Manually advanced clock for components that take a `clock` callable"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+def _completion(content=None, tool_calls=None):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+class FakeModel:
+    """
+    Stands in for Runner._complete. Answers with the question it was asked
+    after `delay` seconds, within the run's deadline, and looks up ORD001
+    when a message names it.
+    """
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.requests = []
+
+    async def complete(self, agent, request, deadline):
+        answer = self._answer(request)
+        return await (deadline.run(answer) if deadline else answer)
+
+    async def _answer(self, request):
+        messages = request["messages"]
+        self.requests.append(messages)
+        await asyncio.sleep(self.delay)
+        question = [message for message in messages if message["role"] == "user"][-1]["content"]
+        tool_names = {tool["function"]["name"] for tool in request.get("tools", [])}
+        if messages[-1]["role"] == "tool":
+            return _completion(f"Order update: {messages[-1]['content']}")
+        if "ORD001" in question and "get_order_status" in tool_names:
+            call = SimpleNamespace(id="call-1", function=SimpleNamespace(
+                name="get_order_status", arguments='{"order_id": "ORD001"}'))
+            return _completion(tool_calls=[call])
+        return _completion(f"Answer to: {question}")
+
+@pytest.fixture
+def bot(monkeypatch):
+    """main with a FakeModel behind every agent run and a fresh circuit breaker"""
+    pytest.importorskip("openai")
+    pytest.importorskip("httpx")
+    monkeypatch.setenv("EVENT_LOG_PATH", "")
+    monkeypatch.setenv("SEMANTIC_CACHE_SIZE", "0")
+    import main
+
+    model = FakeModel()
+    monkeypatch.setattr(main.Runner, "_complete", classmethod(lambda cls, *args: model.complete(*args)))
+    monkeypatch.setattr(main, "model_breaker", main.CircuitBreaker("model"))
+    main.response_cache.clear()
+    yield main, model
+    main.response_cache.clear()
+    for customer_id in ("alice", "bob", "carol"):
+        main.session_store.end(customer_id)
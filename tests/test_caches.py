@@ -0,0 +1,69 @@
+"""
+Tests for the exact-match and semantic response caches
+"""
+import pytest
+
+from runtime.response_cache import ResponseCache, is_order_specific, normalize_query
+from runtime.semantic_cache import SemanticCache, np
+
+ANSWER = {"response": "Returns within 30 days", "agent_used": "Customer Support Bot", "success": True,
+          "filtered": False, "handoff_occurred": False, "tools_called": ["search_faq"]}
+
+def test_normalize_query_masks_order_ids():
+    assert normalize_query("  Where is ORD-123?? ") == normalize_query("where is  ord 456")
+    assert is_order_specific("status of ORD001")
+    assert not is_order_specific("what is your return policy")
+
+def test_response_cache_lru_and_ttl(clock):
+    cache = ResponseCache(max_entries=2, ttl=60, clock=clock)
+    cache.put("a", ANSWER)
+    cache.put("b", ANSWER)
+    assert cache.get("a") == ANSWER
+    cache.put("c", ANSWER)          # "b" is least recently used
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    clock.advance(61)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 1
+
+def test_response_cache_hands_out_copies():
+    cache = ResponseCache()
+    cache.put("a", ANSWER, cost_seconds=1.5)
+    cache.get("a")["cache_hit"] = True
+    assert "cache_hit" not in cache.get("a")
+    assert cache.stats()["latency_saved_s"] == 3.0
+
+def test_only_plain_bot_answers_are_cacheable():
+    assert ResponseCache.is_cacheable("return policy?", ANSWER)
+    assert not ResponseCache.is_cacheable("status of ORD001", ANSWER)
+    assert not ResponseCache.is_cacheable("return policy?", {**ANSWER, "handoff_occurred": True})
+    assert not ResponseCache.is_cacheable("where is it", {**ANSWER, "tools_called": ["get_order_status"]})
+
+def test_semantic_cache_disabled_at_size_zero():
+    """The default configuration: nothing is stored and every lookup misses"""
+    cache = SemanticCache(max_entries=0)
+    cache.add("what is your return policy", ANSWER)
+    assert not cache.available
+    assert cache.lookup("what is your return policy") is None
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_semantic_cache_matches_paraphrases_above_threshold():
+    cache = SemanticCache(max_entries=4, threshold=0.9)
+    cache.add("what is your return policy", ANSWER)
+    hit = cache.lookup("what's your return policy?")
+    assert hit is not None and hit[0] == ANSWER and hit[1] >= 0.9
+    assert cache.lookup("how long does shipping take") is None
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_semantic_cache_expires_and_recycles_slots(clock):
+    cache = SemanticCache(max_entries=2, threshold=0.9, ttl=60, clock=clock)
+    cache.add("what is your return policy", ANSWER)
+    clock.advance(61)
+    assert cache.lookup("what is your return policy") is None
+
+    cache.add("how long does shipping take", ANSWER)
+    cache.add("which payment methods do you accept", ANSWER)   # reuses the expired slot
+    assert cache.stats()["size"] == 2 and cache.evictions == 0
+    cache.add("what are your opening hours", ANSWER)           # full: evicts the least recently used
+    assert cache.evictions == 1
@@ -0,0 +1,58 @@
+"""
+Tests for the model backend circuit breaker
+"""
+from runtime.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+def _open_breaker(clock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30, clock=clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = _open_breaker(clock)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.metrics["rejected"] == 1
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, clock=clock)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_half_open_probe_success_closes(clock):
+    breaker = _open_breaker(clock)
+    clock.advance(30)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()          # one probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = _open_breaker(clock)
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.metrics["opened"] == 2
+
+def test_release_frees_the_probe_slot_without_a_verdict(clock):
+    """A cancelled or timed-out probe lets the next caller probe instead"""
+    breaker = _open_breaker(clock)
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+def test_stats_report_state(clock):
+    breaker = _open_breaker(clock)
+    clock.advance(5)
+    stats = breaker.stats()
+    assert stats["state"] == OPEN and stats["state_code"] == 2
+    assert stats["seconds_in_state"] == 5
+    assert stats["failures"] == 3
@@ -0,0 +1,76 @@
+"""
+Tests for the JSON-lines event log
+"""
+import json
+
+from runtime.event_log import EventLog, RequestTrace, summarize
+
+def _events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_events_are_written_one_json_object_per_line(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    event_log = EventLog(path, batch_size=2, flush_interval=60)
+    trace = RequestTrace(customer_id="alice", request_id="req-1")
+    trace.add("guardrail", 0.001)
+    trace.add("model", 0.25)
+    trace.add("model", 0.05)
+    event_log.emit(trace.to_event({"agent_used": "faq_agent", "success": True, "cache_hit": False,
+                                   "tools_called": ["search_faq"]}))
+    event_log.emit({"request_id": "req-2", "note": "café", "when": tmp_path})
+    event_log.emit({"request_id": "req-3"})
+    event_log.close()
+
+    events = _events(path)
+    assert [event["request_id"] for event in events] == ["req-1", "req-2", "req-3"]
+    first = events[0]
+    assert first["customer_id"] == "alice" and first["agent_used"] == "faq_agent"
+    assert first["tools_called"] == ["search_faq"] and first["model_calls"] == 2
+    assert first["timings"]["model_ms"] == 300.0 and first["timings"]["guardrail_ms"] == 1.0
+    assert first["timings"]["total_ms"] >= 0
+    # Values json cannot encode are written with str()
+    assert events[1]["note"] == "café" and events[1]["when"] == str(tmp_path)
+    assert event_log.written == 3
+
+def test_log_appends_across_restarts(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    for request_id in ("req-1", "req-2"):
+        event_log = EventLog(path)
+        event_log.emit({"request_id": request_id})
+        event_log.close()
+    assert [event["request_id"] for event in _events(path)] == ["req-1", "req-2"]
+
+def test_file_rotates_before_a_batch_would_overflow(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    event_log = EventLog(path, batch_size=1, flush_interval=60, max_bytes=100, backup_count=2)
+    for number in range(12):
+        event_log.emit({"request_id": f"req-{number:02}", "padding": "x" * 20})
+    event_log.close()
+
+    files = sorted(child.name for child in tmp_path.iterdir())
+    assert files == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"]
+    for name in files:
+        assert (tmp_path / name).stat().st_size <= 100
+    # Newest events stay in the live file, older ones shift down the backups
+    kept = _events(f"{path}.2") + _events(f"{path}.1") + _events(path)
+    assert [event["request_id"] for event in kept] == [f"req-{number:02}" for number in range(12 - len(kept), 12)]
+
+def test_rotation_is_off_without_a_size_limit(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    event_log = EventLog(path, batch_size=1, flush_interval=60)
+    for number in range(50):
+        event_log.emit({"request_id": number})
+    event_log.close()
+    assert [child.name for child in tmp_path.iterdir()] == ["events.jsonl"]
+    assert len(_events(path)) == 50
+
+def test_summarize_reports_percentiles_per_stage(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    event_log = EventLog(path)
+    for number in range(1, 101):
+        event_log.emit({"timings": {"model_ms": float(number), "total_ms": float(number) * 2}})
+    event_log.close()
+    summary = summarize(path)
+    assert summary["model_ms"] == {"count": 100, "p50": 51.0, "p95": 96.0, "p99": 100.0}
+    assert summary["total_ms"]["p50"] == 102.0
@@ -0,0 +1,74 @@
+"""
+Tests for the BM25 FAQ index behind search_faq
+"""
+import math
+import random
+
+import pytest
+
+from tools.faq_index import FAQIndex, tokenize
+from tools.faq_snapshot import MappedFAQIndex, faq_fingerprint, save_snapshot
+
+FAQS = {
+    "return_policy": "Returns are accepted within 30 days of purchase with the original receipt.",
+    "shipping_time": "Standard shipping takes 3-5 business days; express shipping takes 1-2 days.",
+    "payment_methods": "We accept credit cards, PayPal and bank transfers.",
+    "store_hours": "Our stores are open 9am to 9pm, seven days a week.",
+}
+
+def _bm25(faqs, query, k1=1.5, b=0.75):
+    """Reference BM25 over whole documents, written out the long way"""
+    docs = {key: tokenize(key.replace("_", " ")) * FAQIndex.TOPIC_BOOST + tokenize(answer)
+            for key, answer in faqs.items()}
+    avg_length = sum(map(len, docs.values())) / len(docs)
+    scores = {}
+    for key, tokens in docs.items():
+        score = 0.0
+        for term in set(tokenize(query)):
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            df = sum(term in other for other in docs.values())
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_length))
+        if score:
+            scores[key] = score
+    return scores
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("What are your store hours?") == ["store", "hour"]
+    assert tokenize("Shipping, shipped, SHIPS") == ["ship", "shipped", "ship"]
+
+@pytest.mark.parametrize("query", ["how long does shipping take", "can I pay with PayPal",
+                                   "return window days", "store hours", "nothing relevant"])
+def test_scores_match_reference_bm25(query):
+    expected = _bm25(FAQS, query)
+    results = FAQIndex(FAQS).search(query, top_k=len(FAQS))
+    assert {key for key, _ in results} == set(expected)
+    for key, score in results:
+        assert score == pytest.approx(expected[key])
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+def test_topic_keys_outrank_passing_mentions():
+    faqs = {"warranty": "Covers defects for one year.",
+            "contact": "Ask about warranty claims, repairs or anything else by phone."}
+    assert FAQIndex(faqs).search("warranty")[0][0] == "warranty"
+
+def test_top_k_and_ties_keep_article_order():
+    faqs = {f"topic_{i}": "identical answer text" for i in range(6)}
+    results = FAQIndex(faqs).search("identical answer", top_k=3)
+    assert [key for key, _ in results] == ["topic_0", "topic_1", "topic_2"]
+    assert FAQIndex(faqs).search("unrelated") == []
+
+def test_snapshot_round_trip_of_a_larger_index(tmp_path):
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(300)] + ["shipping", "refund", "hours"]
+    faqs = {f"article_{i}": " ".join(rng.choices(words, k=rng.randint(3, 40))) for i in range(200)}
+    path = str(tmp_path / "faq.idx")
+    built = FAQIndex(faqs)
+    save_snapshot(built, path, faq_fingerprint(faqs))
+    mapped = MappedFAQIndex(path, expected_fingerprint=faq_fingerprint(faqs))
+    assert len(mapped) == len(built)
+    for _ in range(50):
+        query = " ".join(rng.choices(words + ["missing", "zzz"], k=rng.randint(1, 5)))
+        assert mapped.search(query, top_k=10) == built.search(query, top_k=10)
@@ -0,0 +1,65 @@
+"""
+Tests for the memory-mapped FAQ index snapshots
+"""
+import pytest
+
+from tools.faq_index import FAQIndex
+from tools.faq_snapshot import MappedFAQIndex, SnapshotError, faq_fingerprint, load_faq_index, save_snapshot
+
+FAQS = {
+    "return_policy": "Returns are accepted within 30 days of purchase with the original receipt.",
+    "shipping_time": "Standard shipping takes 3-5 business days; express shipping takes 1-2 days.",
+    "payment_methods": "We accept credit cards, PayPal and bank transfers.",
+}
+
+def _write(tmp_path, faqs=FAQS):
+    path = str(tmp_path / "faq.idx")
+    save_snapshot(FAQIndex(faqs), path, faq_fingerprint(faqs))
+    return path
+
+def test_snapshot_round_trip_matches_in_memory_index(tmp_path):
+    """A mapped snapshot ranks every query exactly like the index it was built from"""
+    path = _write(tmp_path)
+    built = FAQIndex(FAQS)
+    mapped = MappedFAQIndex(path, expected_fingerprint=faq_fingerprint(FAQS))
+    for query in ("how long does shipping take", "can I pay with paypal", "return window", "nothing relevant"):
+        assert mapped.search(query) == built.search(query)
+
+def test_stale_snapshot_is_rejected(tmp_path):
+    path = _write(tmp_path)
+    changed = {**FAQS, "store_hours": "Open 9am to 5pm."}
+    with pytest.raises(SnapshotError, match="stale"):
+        MappedFAQIndex(path, expected_fingerprint=faq_fingerprint(changed))
+
+@pytest.mark.parametrize("damage", ["empty", "truncated", "flipped", "directory"])
+def test_unusable_snapshot_falls_back_to_in_memory_index(tmp_path, damage):
+    """load_faq_index never fails on a bad snapshot file; it re-indexes instead"""
+    path = _write(tmp_path)
+    data = open(path, "rb").read()
+    if damage == "empty":
+        open(path, "wb").close()
+    elif damage == "truncated":
+        open(path, "wb").write(data[:10])
+    elif damage == "flipped":
+        open(path, "wb").write(data[:-1] + bytes([data[-1] ^ 0xFF]))
+    else:
+        path = str(tmp_path)
+
+    index = load_faq_index(FAQS, path)
+    assert type(index) is FAQIndex
+    assert index.search("paypal")[0][0] == "payment_methods"
+
+def test_missing_snapshot_builds_in_memory(tmp_path):
+    assert type(load_faq_index(FAQS, str(tmp_path / "absent.idx"))) is FAQIndex
+
+def test_save_without_a_path_fails_before_writing(bot, tmp_path, monkeypatch):
+    main, _ = bot
+    monkeypatch.setattr(main, "FAQ_INDEX_SNAPSHOT", None)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match="FAQ_INDEX_SNAPSHOT"):
+        main.save_faq_snapshot()
+    assert list(tmp_path.iterdir()) == []
+
+    main.save_faq_snapshot(str(tmp_path / "faq.idx"))
+    mapped = MappedFAQIndex(str(tmp_path / "faq.idx"), expected_fingerprint=faq_fingerprint(main.FAQ_DB))
+    assert mapped.search("return policy") == FAQIndex(main.FAQ_DB).search("return policy")
@@ -0,0 +1,108 @@
+"""
+Tests for deadlines and hedged model calls
+"""
+import asyncio
+
+import pytest
+
+from runtime.hedging import Deadline, DeadlineExceeded, HedgePolicy, hedged
+
+def test_deadline_counts_down_on_its_clock(clock):
+    deadline = Deadline.after(5, clock=clock)
+    assert deadline.remaining() == 5
+    clock.advance(5)
+    assert deadline.expired()
+
+def test_deadline_run_returns_in_time():
+    async def scenario():
+        return await Deadline.after(1).run(asyncio.sleep(0.01, result="answer"))
+
+    assert asyncio.run(scenario()) == "answer"
+
+def test_deadline_run_cancels_slow_work():
+    async def scenario():
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(DeadlineExceeded):
+            await Deadline.after(0.02).run(slow())
+        return cancelled.is_set()
+
+    assert asyncio.run(scenario())
+
+def test_exhausted_deadline_does_not_start_work():
+    started = []
+
+    async def work():
+        started.append(1)
+
+    async def scenario():
+        with pytest.raises(DeadlineExceeded):
+            await Deadline.after(-1).run(work())
+
+    asyncio.run(scenario())
+    assert started == []
+
+def test_hedge_delay_waits_for_enough_samples():
+    policy = HedgePolicy(percentile=0.9, window=10, min_samples=5, min_delay=0.0)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        policy.record(latency)
+    assert policy.delay() is None
+    for latency in (0.5, 0.6, 0.7, 0.8, 0.9, 1.0):
+        policy.record(latency)
+    assert policy.delay() == 1.0
+
+def _fast_policy() -> HedgePolicy:
+    policy = HedgePolicy(min_samples=1, min_delay=0.01, max_hedge_ratio=1.0)
+    policy.record(0.01)
+    return policy
+
+def test_slow_call_is_hedged_and_hedge_wins():
+    async def scenario():
+        policy = _fast_policy()
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            await asyncio.sleep(0.2 if len(attempts) == 1 else 0.01)
+            return len(attempts)
+
+        return await hedged(call, policy), policy
+
+    result, policy = asyncio.run(scenario())
+    assert result == 2
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+
+def test_hedge_ratio_caps_duplicate_calls():
+    async def scenario():
+        policy = _fast_policy()
+        policy.max_hedge_ratio = 0.0
+
+        async def call():
+            await asyncio.sleep(0.03)
+            return "only"
+
+        return await hedged(call, policy), policy
+
+    result, policy = asyncio.run(scenario())
+    assert result == "only" and policy.hedges == 0
+
+def test_hedged_raises_only_when_both_attempts_fail():
+    async def scenario():
+        policy = _fast_policy()
+
+        async def call():
+            await asyncio.sleep(0.03)
+            raise RuntimeError("backend down")
+
+        with pytest.raises(RuntimeError):
+            await hedged(call, policy)
+        return policy
+
+    assert asyncio.run(scenario()).hedges == 1
@@ -0,0 +1,79 @@
+"""
+Tests for the queue-based logging pipeline
+"""
+import logging
+
+import pytest
+
+from runtime import logging_setup
+from runtime.logging_setup import DeferredQueueHandler, SamplingFilter, configure_logging, stop_logging
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """configure_logging into tmp_path, leaving pytest's handlers and any running listener alone"""
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", root.level)
+    monkeypatch.setattr(logging_setup, "_listener", None)
+    log_file = tmp_path / "bot.log"
+
+    def start(**kwargs):
+        configure_logging(str(log_file), console=False, **kwargs)
+        return log_file
+
+    yield start
+    stop_logging()
+
+def _record(msg, args=(), exc_info=None):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, exc_info)
+
+def test_records_reach_the_file_through_the_listener(pipeline):
+    log_file = pipeline()
+    logger = logging.getLogger("tests.pipeline")
+    logger.info("Order %s is %s", "ORD001", "delivered")
+    logger.debug("below the configured level")
+    try:
+        raise ConnectionError("database unavailable")
+    except ConnectionError:
+        logger.exception("Lookup failed")
+    stop_logging()
+
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert lines[0].endswith(" - tests.pipeline - INFO - Order ORD001 is delivered")
+    assert " - ERROR - Lookup failed" in lines[1]
+    assert "ConnectionError: database unavailable" in lines[-1]
+    assert not any("below the configured level" in line for line in lines)
+
+def test_mutable_arguments_are_formatted_at_the_call(pipeline):
+    log_file = pipeline()
+    order = {"status": "processing"}
+    logging.getLogger("tests.pipeline").info("Order is %s", order)
+    order["status"] = "shipped"
+    stop_logging()
+    assert "Order is {'status': 'processing'}" in log_file.read_text(encoding="utf-8")
+
+def test_prepare_defers_only_immutable_arguments():
+    handler = DeferredQueueHandler(None)
+    scalar = _record("Order %s took %.2fs", ("ORD001", 0.5))
+    assert handler.prepare(scalar) is scalar and scalar.args == ("ORD001", 0.5)
+
+    mutable = handler.prepare(_record("Results %s", (["a", "b"],)))
+    assert mutable.getMessage() == "Results ['a', 'b']" and not mutable.args
+
+def test_file_rotates_at_max_bytes(pipeline):
+    log_file = pipeline(max_bytes=400, backup_count=2)
+    logger = logging.getLogger("tests.pipeline")
+    for i in range(40):
+        logger.info("Message number %s with some padding to fill the file", i)
+    stop_logging()
+    backups = sorted(path.name for path in log_file.parent.iterdir() if path.name != log_file.name)
+    assert backups == ["bot.log.1", "bot.log.2"]
+    assert "Message number 39" in log_file.read_text(encoding="utf-8")
+
+def test_sampling_drops_only_low_level_records():
+    dropped = SamplingFilter(0.0)
+    assert not dropped.filter(_record("tool call"))
+    warning = _record("tool failed")
+    warning.levelno = logging.WARNING
+    assert dropped.filter(warning)
+    assert SamplingFilter(1.0).filter(_record("tool call"))
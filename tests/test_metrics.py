@@ -0,0 +1,93 @@
+"""
+Tests for the in-process metrics and their Prometheus text exposition
+"""
+import asyncio
+import urllib.error
+import urllib.request
+
+import pytest
+
+from runtime.metrics import MetricsRegistry, start_metrics_server, timed
+
+def test_counter_and_gauge_exposition():
+    registry = MetricsRegistry()
+    queries = registry.counter("queries_total", "Queries answered", ("agent",))
+    queries.labels("faq").inc()
+    queries.labels("faq").inc(2)
+    queries.labels('say "hi"\\now\n').inc()
+    in_flight = registry.gauge("in_flight", "Queries in progress")
+    in_flight.inc(3)
+    in_flight.dec()
+    registry.gauge("limit", "Concurrency limit", callback=lambda: 12.5)
+
+    assert registry.render() == (
+        "# HELP queries_total Queries answered\n"
+        "# TYPE queries_total counter\n"
+        'queries_total{agent="faq"} 3.0\n'
+        'queries_total{agent="say \\"hi\\"\\\\now\\n"} 1.0\n'
+        "# HELP in_flight Queries in progress\n"
+        "# TYPE in_flight gauge\n"
+        "in_flight 2.0\n"
+        "# HELP limit Concurrency limit\n"
+        "# TYPE limit gauge\n"
+        "limit 12.5\n"
+    )
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    stage = registry.histogram("stage_seconds", "Stage latency", ("stage",), buckets=(0.1, 0.01, 1.0))
+    child = stage.labels("model")
+    for value in (0.005, 0.01, 0.5, 2.0):
+        child.observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE stage_seconds histogram"
+    assert lines[2:] == [
+        'stage_seconds_bucket{stage="model",le="0.01"} 2',
+        'stage_seconds_bucket{stage="model",le="0.1"} 2',
+        'stage_seconds_bucket{stage="model",le="1.0"} 3',
+        'stage_seconds_bucket{stage="model",le="+Inf"} 4',
+        'stage_seconds_sum{stage="model"} 2.515',
+        'stage_seconds_count{stage="model"} 4',
+    ]
+
+def test_label_count_and_duplicate_names_are_checked():
+    registry = MetricsRegistry()
+    queries = registry.counter("queries_total", "Queries answered", ("agent",))
+    with pytest.raises(ValueError):
+        queries.labels("faq", "extra")
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge("queries_total", "Clash")
+
+def test_timed_observes_sync_and_async_calls():
+    registry = MetricsRegistry()
+    latency = registry.histogram("call_seconds", "Call latency")
+
+    @timed(latency)
+    def lookup():
+        return "done"
+
+    @timed(latency)
+    async def answer():
+        await asyncio.sleep(0)
+        raise TimeoutError
+
+    assert lookup() == "done"
+    with pytest.raises(TimeoutError):
+        asyncio.run(answer())
+    assert "call_seconds_count 2" in registry.render()
+
+def test_server_serves_the_exposition():
+    registry = MetricsRegistry()
+    registry.counter("handoffs_total", "Handoffs").inc()
+    server = start_metrics_server(registry, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert response.read().decode() == registry.render()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
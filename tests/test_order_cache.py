@@ -0,0 +1,114 @@
+"""
+Tests for the read-through order cache
+"""
+import pytest
+
+from tools.order_cache import CachedOrderStore
+from tools.order_store import InMemoryOrderStore
+
+def _orders():
+    return {
+        "ORD001": {"status": "delivered", "tracking": "TRK123456", "date": "2024-01-15", "amount": "$99.99"},
+        "ORD002": {"status": "processing", "tracking": None, "date": "2024-01-20", "amount": "$49.50"},
+    }
+
+class CountingStore(InMemoryOrderStore):
+    """In-memory backend that counts reads and can run a hook in the middle of one"""
+
+    def __init__(self, orders):
+        super().__init__(orders)
+        self.reads = 0
+        self.during_read = None
+
+    def _read(self):
+        self.reads += 1
+        if self.during_read is not None:
+            hook, self.during_read = self.during_read, None
+            hook()
+
+    def get(self, order_id):
+        record = super().get(order_id)
+        self._read()
+        return record
+
+    def get_many(self, order_ids):
+        records = super().get_many(order_ids)
+        self._read()
+        return records
+
+def test_repeat_lookups_are_served_from_memory(clock):
+    backend = CountingStore(_orders())
+    cache = CachedOrderStore(backend, clock=clock)
+    assert cache.get("ORD001") == _orders()["ORD001"]
+    assert cache.get("ORD001") == _orders()["ORD001"]
+    assert cache.get_many(["ORD001", "ORD002"]) == _orders()
+    assert backend.reads == 2
+    assert cache.stats()["hits"] == 2
+
+def test_ttl_follows_order_status(clock):
+    backend = CountingStore(_orders())
+    cache = CachedOrderStore(backend, clock=clock)
+    cache.get_many(["ORD001", "ORD002"])
+    clock.advance(31)               # past the "processing" TTL, well within "delivered"
+    cache.get("ORD001")
+    cache.get("ORD002")
+    assert backend.reads == 2
+    assert cache.stats()["expirations"] == 1
+
+def test_least_recently_used_order_is_evicted(clock):
+    backend = CountingStore({**_orders(), "ORD003": _orders()["ORD001"]})
+    cache = CachedOrderStore(backend, max_entries=2, clock=clock)
+    for order_id in ("ORD001", "ORD002", "ORD001", "ORD003"):
+        cache.get(order_id)
+    assert cache.stats()["evictions"] == 1
+    cache.get("ORD001")
+    assert backend.reads == 3
+
+def test_invalidate_drops_the_cached_record(clock):
+    backend = CountingStore(_orders())
+    cache = CachedOrderStore(backend, clock=clock)
+    cache.get("ORD002")
+    backend.orders["ORD002"] = {**backend.orders["ORD002"], "status": "shipped"}
+    assert cache.invalidate("ORD002")
+    assert cache.get("ORD002")["status"] == "shipped"
+
+def test_read_in_flight_during_invalidate_is_not_cached(clock):
+    """The read may have seen the old record; caching it would undo the invalidation"""
+    backend = CountingStore(_orders())
+    cache = CachedOrderStore(backend, clock=clock)
+
+    def order_changes():
+        backend.orders["ORD002"] = {**backend.orders["ORD002"], "status": "shipped"}
+        cache.invalidate("ORD002")
+
+    backend.during_read = order_changes
+    assert cache.get("ORD002")["status"] == "processing"
+    assert cache.get("ORD002")["status"] == "shipped"
+
+    backend.orders["ORD002"] = {**backend.orders["ORD002"], "status": "processing"}
+    cache.invalidate("ORD002")
+    backend.during_read = order_changes
+    assert cache.get_many(["ORD001", "ORD002"])["ORD002"]["status"] == "processing"
+    assert cache.get_many(["ORD001", "ORD002"])["ORD002"]["status"] == "shipped"
+    # ORD001 was not invalidated, so its read was cached as usual
+    assert cache.stats()["size"] == 2
+
+def test_read_in_flight_during_clear_is_not_cached(clock):
+    backend = CountingStore(_orders())
+    cache = CachedOrderStore(backend, clock=clock)
+    backend.during_read = cache.clear
+    cache.get("ORD001")
+    assert cache.stats()["size"] == 0
+    cache.get("ORD001")
+    assert cache.stats()["size"] == 1
+
+def test_failed_read_leaves_no_bookkeeping(clock):
+    class FailingStore(CountingStore):
+        def get(self, order_id):
+            raise ConnectionError("database unavailable")
+
+    cache = CachedOrderStore(FailingStore(_orders()), clock=clock)
+    with pytest.raises(ConnectionError):
+        cache.get("ORD001")
+    assert cache._fetching == {} and cache._generations == {}
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,70 @@
+"""
+Tests for the order store backends
+"""
+import threading
+
+import pytest
+
+from tools.order_store import InMemoryOrderStore, OrderStore, SQLiteOrderStore, create_order_store
+
+ORDERS = {
+    "ORD001": {"status": "delivered", "tracking": "TRK123456", "date": "2024-01-15", "amount": "$99.99"},
+    "ORD002": {"status": "processing", "tracking": None, "date": "2024-01-20", "amount": "$49.50"},
+}
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteOrderStore(str(tmp_path / "orders.db"))
+    store.load(ORDERS.items())
+    yield store
+    store.close()
+
+def test_sqlite_store_matches_in_memory_store(sqlite_store):
+    memory = InMemoryOrderStore(ORDERS)
+    for order_id in ("ORD001", "ORD002", "ORD404"):
+        assert sqlite_store.get(order_id) == memory.get(order_id)
+
+def test_get_many_skips_unknown_and_duplicate_ids(sqlite_store):
+    ids = ["ORD002", "ORD404", "ORD001", "ORD002"]
+    assert sqlite_store.get_many(ids) == ORDERS
+    assert InMemoryOrderStore(ORDERS).get_many(ids) == ORDERS
+
+def test_get_many_splits_large_batches(sqlite_store):
+    ids = [f"ORD{n:06d}" for n in range(SQLiteOrderStore.MAX_BATCH * 2)] + ["ORD001"]
+    assert sqlite_store.get_many(ids) == {"ORD001": ORDERS["ORD001"]}
+
+def test_load_replaces_existing_rows(sqlite_store):
+    updated = {**ORDERS["ORD002"], "status": "shipped", "tracking": "TRK000001"}
+    assert sqlite_store.load([("ORD002", updated)]) == 1
+    assert sqlite_store.get("ORD002") == updated
+
+def test_sqlite_store_serves_other_threads(sqlite_store):
+    """Each thread opens its own connection to the same database"""
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sqlite_store.get("ORD001"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [ORDERS["ORD001"]] * 4
+
+def test_create_order_store_picks_backend(tmp_path):
+    assert isinstance(create_order_store(ORDERS), InMemoryOrderStore)
+    store = create_order_store(ORDERS, str(tmp_path / "orders.db"))
+    assert isinstance(store, SQLiteOrderStore)
+    store.close()
+
+def test_backend_without_get_cannot_be_created():
+    class Incomplete(OrderStore):
+        def close(self) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_get_many_defaults_to_get():
+    class Minimal(OrderStore):
+        def get(self, order_id):
+            return ORDERS.get(order_id)
+
+    assert Minimal().get_many(["ORD001", "ORD404"]) == {"ORD001": ORDERS["ORD001"]}
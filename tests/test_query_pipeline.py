@@ -0,0 +1,60 @@
+"""
+Tests for deadlines and the circuit breaker on the main query path,
+with the model replaced by a fake (see conftest.py)
+"""
+import asyncio
+
+def test_missed_deadlines_do_not_open_the_breaker(bot):
+    """A query's own budget running out is not a backend failure"""
+    main, model = bot
+    model.delay = 0.2
+
+    async def scenario():
+        return [await main.process_customer_query(f"How long does shipping take to zone {zone}?", deadline=0.02)
+                for zone in range(main.model_breaker.failure_threshold + 1)]
+
+    responses = asyncio.run(scenario())
+    assert all(response.get("deadline_exceeded") for response in responses)
+    stats = main.model_breaker.stats()
+    assert stats["state"] == "closed" and stats["failures"] == 0
+
+    model.delay = 0.0
+    response = asyncio.run(main.process_customer_query("How long does shipping take?"))
+    assert response["agent_used"] == "Customer Support Bot"
+
+def test_coalesced_callers_each_keep_their_own_deadline(bot):
+    """A caller that joins a shared call is not cut short by the first caller's budget"""
+    main, model = bot
+    model.delay = 0.2
+
+    async def scenario():
+        leader = asyncio.ensure_future(main.process_customer_query("Do you ship abroad?", deadline=0.05))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(main.process_customer_query("Do you ship abroad?", deadline=5))
+        return await leader, await follower
+
+    executions = main.agent_calls.executions
+    leader, follower = asyncio.run(scenario())
+    assert main.agent_calls.executions == executions + 1
+    assert leader.get("deadline_exceeded")
+    assert follower["agent_used"] == "Customer Support Bot"
+    assert follower["response"] == "Answer to: Do you ship abroad?"
+
+def test_runner_concurrency_is_read_after_the_environment_is_loaded(bot, monkeypatch):
+    """RUNNER_MAX_CONCURRENCY from a .env file loaded after import still applies"""
+    main, _ = bot
+    monkeypatch.setattr(main.Runner, "max_concurrency", None)
+    monkeypatch.setattr(main.Runner, "_semaphore", None)
+    monkeypatch.setenv("RUNNER_MAX_CONCURRENCY", "3")
+
+    async def limit():
+        return main.Runner._limiter()._value
+
+    assert asyncio.run(limit()) == 3
+    assert main.Runner.max_concurrency == 3
+
+def test_runtime_metrics_cover_every_cache(bot):
+    main, _ = bot
+    metrics = main.runtime_metrics()
+    assert metrics["semantic_cache"] == main.semantic_cache.stats()
+    assert {"response_cache", "order_cache", "sessions"} <= metrics.keys()
@@ -0,0 +1,86 @@
+"""
+Tests for the client-side rate limiter, against the local mock model server
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.mock_model_server import start_mock_server
+from runtime.rate_limiter import AdaptiveLimiter, RateLimitedClient
+
+MESSAGES = [{"role": "user", "content": "What is your return policy?"}]
+
+@pytest.fixture
+def mock_server():
+    pytest.importorskip("httpx")
+    server, settings, url = start_mock_server(latency=0.02, retry_after=0.05)
+    yield settings, url
+    server.shutdown()
+    server.server_close()
+
+def _client(url: str, limiter: AdaptiveLimiter) -> RateLimitedClient:
+    openai = pytest.importorskip("openai")
+    return RateLimitedClient(openai.AsyncOpenAI(api_key="mock", base_url=url, max_retries=0), limiter, max_retries=20)
+
+def _limiter() -> AdaptiveLimiter:
+    return AdaptiveLimiter(requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000,
+                           initial_concurrency=8, decrease_cooldown=0.0)
+
+def test_limiter_backs_off_on_429_and_recovers(mock_server):
+    settings, url = mock_server
+    limiter = _limiter()
+    client = _client(url, limiter)
+
+    async def burst(count: int):
+        return await asyncio.gather(*(client.chat.completions.create(model="mock", messages=MESSAGES)
+                                      for _ in range(count)))
+
+    async def scenario():
+        # The endpoint takes two requests at a time and answers 429 beyond that
+        settings.capacity = 2
+        responses = await burst(16)
+        throttled, backed_off = limiter.metrics["throttled"], limiter.limit
+
+        # Capacity is back: successes grow the limit again without further 429s
+        settings.capacity = 0
+        for _ in range(10):
+            await burst(4)
+        return responses, throttled, backed_off
+
+    responses, throttled, backed_off = asyncio.run(scenario())
+    assert len(responses) == 16
+    assert throttled > 0
+    assert backed_off < 8
+    assert limiter.metrics["throttled"] == throttled
+    assert limiter.limit > backed_off
+    assert limiter.in_flight == 0
+
+def test_stream_holds_its_slot_until_read_to_the_end(mock_server):
+    _, url = mock_server
+    limiter = _limiter()
+    client = _client(url, limiter)
+
+    async def scenario():
+        stream = await client.chat.completions.create(model="mock", messages=MESSAGES, stream=True)
+        assert limiter.in_flight == 1
+        chunks = [chunk async for chunk in stream]
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    # The limiter asked for the usage chunk, so the token bucket sees real usage
+    assert chunks[-1].usage.total_tokens > 0
+
+def test_stream_closed_early_gives_its_slot_back(mock_server):
+    _, url = mock_server
+    limiter = _limiter()
+    client = _client(url, limiter)
+
+    async def scenario():
+        stream = await client.chat.completions.create(model="mock", messages=MESSAGES, stream=True)
+        await stream.__anext__()
+        assert limiter.in_flight == 1
+        await stream.close()
+
+    asyncio.run(scenario())
+    assert limiter.in_flight == 0
@@ -0,0 +1,121 @@
+"""
+Tests for the routing engine
+"""
+import json
+import os
+import random
+
+import pytest
+
+from guardrails.routing import NEGATIVE_PHRASE, OFFENSIVE, ORDER_LOOKUP_HINT, RoutingEngine
+from guardrails.sentiment import SentimentScorer
+
+OFFENSIVE_WORDS = ["stupid", "idiot", "hate", "terrible", "worst", "awful", "useless", "garbage"]
+NEGATIVE_PHRASES = ["i hate", "you suck", "this is terrible", "worst service", "complete garbage"]
+COMPLEX_KEYWORDS = ["refund", "cancel order", "change order", "billing issue", "complaint", "manager"]
+ORDER_KEYWORDS = ["order", "track", "status", "shipped", "delivery", "ord"]
+NEGATIVE_INDICATORS = ["frustrated", "angry", "upset", "terrible", "worst", "refund", "cancel", "manager"]
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "benchmarks", "corpus", "support_queries.jsonl")
+
+class CountingScorer(SentimentScorer):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def score_normalized(self, text):
+        self.calls += 1
+        return super().score_normalized(text)
+
+def _engine(scorer=None, **kwargs):
+    return RoutingEngine(OFFENSIVE_WORDS, NEGATIVE_PHRASES, COMPLEX_KEYWORDS, ORDER_KEYWORDS,
+                         scorer=scorer, cache_size=0, **kwargs)
+
+def test_scorer_only_runs_when_sentiment_is_read():
+    scorer = CountingScorer()
+    engine = _engine(scorer)
+    decision = engine.route("Where is my order? I am not happy")
+    assert not decision.filtered and decision.tool_hints == (ORDER_LOOKUP_HINT,)
+    assert scorer.calls == 0
+
+    assert decision.sentiment == "negative"
+    assert decision.needs_handoff and decision.handoff_reason == "Negative sentiment detected: negative"
+    assert scorer.calls == 1
+
+def test_lazy_decisions_match_the_scorer():
+    scorer = SentimentScorer()
+    engine = _engine(scorer)
+    for message in ("Thanks, that was helpful", "This is terrible", "I want a refund", "not bad at all", "", "x" * 301):
+        decision = engine.route(message)
+        assert decision.sentiment == (scorer.classify(message)[0] if message else "neutral")
+        assert decision.sentiment_score == (scorer.score(message) if message else 0.0)
+        assert decision == engine.route(message)
+
+# The separate checks the engine replaced: should_handoff, content_filter_guardrail and enable_order_tool
+
+def _legacy_filter(message):
+    if not message:
+        return None
+    message_lower = message.lower()
+    for index, term in enumerate(OFFENSIVE_WORDS + NEGATIVE_PHRASES):
+        if term in message_lower:
+            return (OFFENSIVE if index < len(OFFENSIVE_WORDS) else NEGATIVE_PHRASE), term
+    return None
+
+def _legacy_sentiment(message):
+    negative_count = sum(1 for word in NEGATIVE_INDICATORS if word in message.lower())
+    return "very_negative" if negative_count >= 2 else "negative" if negative_count >= 1 else "neutral"
+
+def _legacy_handoff(message, sentiment):
+    message_lower = message.lower()
+    for keyword in COMPLEX_KEYWORDS:
+        if keyword in message_lower:
+            return True, f"Complex query detected: {keyword}"
+    if sentiment in ("negative", "very_negative"):
+        return True, f"Negative sentiment detected: {sentiment}"
+    if len(message) > 300:
+        return True, "Long complex message requiring human attention"
+    return False, ""
+
+def _legacy_order_tool(message):
+    return bool(message) and any(keyword in message.lower() for keyword in ORDER_KEYWORDS)
+
+def _decided(decision):
+    return ((decision.needs_handoff, decision.handoff_reason),
+            (decision.filter_kind, decision.filter_term) if decision.filtered else None,
+            ORDER_LOOKUP_HINT in decision.tool_hints)
+
+def _messages(seed=23):
+    """Replay corpus, edge cases and random messages with terms from every list, some upper-cased"""
+    with open(CORPUS, encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f if line.strip()]
+    messages += ["", "ORD", "record", "İstanbul order", "x" * 301, "  ", "I HATE THIS"]
+    filler = "the my package was is it when can you please help Record ORDER hated thanks arrived".split()
+    terms = OFFENSIVE_WORDS + NEGATIVE_PHRASES + COMPLEX_KEYWORDS + NEGATIVE_INDICATORS + ORDER_KEYWORDS
+    rng = random.Random(seed)
+    for i in range(1500):
+        tokens = [rng.choice(filler) for _ in range(rng.choice((1, 3, 8, 60, 120)))]
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            term = rng.choice(terms)
+            tokens.insert(rng.randrange(len(tokens) + 1), term.upper() if i % 7 == 0 else term)
+        messages.append(" ".join(tokens))
+    return messages
+
+@pytest.mark.parametrize("cache_size", [0, 64])
+def test_engine_matches_the_separate_checks(cache_size):
+    engine = RoutingEngine(OFFENSIVE_WORDS, NEGATIVE_PHRASES, COMPLEX_KEYWORDS, ORDER_KEYWORDS,
+                           negative_indicators=NEGATIVE_INDICATORS, cache_size=cache_size)
+    for message in _messages() * 2:
+        sentiment = _legacy_sentiment(message)
+        expected = (_legacy_handoff(message, sentiment), _legacy_filter(message), _legacy_order_tool(message))
+        decision = engine.route(message)
+        assert _decided(decision) == expected, message
+        assert decision.sentiment == sentiment, message
+
+def test_engine_with_a_scorer_matches_the_separate_checks():
+    scorer = SentimentScorer()
+    engine = _engine(scorer)
+    for message in _messages(seed=24):
+        sentiment = scorer.classify(message)[0] if message else "neutral"
+        expected = (_legacy_handoff(message, sentiment), _legacy_filter(message), _legacy_order_tool(message))
+        assert _decided(engine.route(message)) == expected, message
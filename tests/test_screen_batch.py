@@ -0,0 +1,42 @@
+"""
+Tests for bulk guardrail screening
+"""
+import pytest
+
+from guardrails.content_guardrails import (RunContextWrapper, content_filter_guardrail, output_filter_guardrail,
+                                           screen_batch)
+
+MESSAGES = [
+    "What is your return policy?",
+    "This is the worst service ever",
+    "I hate this company",
+    "WHERE IS MY PACKAGE RIGHT NOW",
+    "OK",
+    "",
+    "you suck",
+    "Can I change my delivery address?",
+]
+
+RESPONSES = [
+    "Our return policy allows returns within 30 days.",
+    "Sorry, I don't know.",
+    "That's not my job, figure it out yourself.",
+    "Your order has shipped.",
+]
+
+def test_batch_matches_per_message_screening():
+    expected = [content_filter_guardrail(message) for message in MESSAGES]
+    assert list(screen_batch(MESSAGES, chunk_size=3)) == expected
+    wrapped = [RunContextWrapper({"user_message": message}) for message in MESSAGES]
+    assert list(screen_batch(iter(wrapped), chunk_size=5)) == expected
+
+def test_output_batch_matches_per_response_screening():
+    expected = [output_filter_guardrail(RunContextWrapper(), response) for response in RESPONSES]
+    assert list(screen_batch(RESPONSES, output=True, chunk_size=2)) == expected
+
+# Other tests leave logging threads running; the forked workers only do string checks
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded:DeprecationWarning")
+def test_worker_pool_keeps_input_order():
+    messages = MESSAGES * 25
+    expected = [content_filter_guardrail(message) for message in messages]
+    assert list(screen_batch(messages, chunk_size=7, workers=2)) == expected
@@ -0,0 +1,128 @@
+"""
+Tests for the per-customer session store, and for keeping customers'
+conversations apart when queries go through main with a fake model
+"""
+import asyncio
+import sqlite3
+
+from runtime.session_store import SessionStore
+
+def test_session_is_created_once_and_kept(clock):
+    store = SessionStore(clock=clock)
+    session = store.session("alice")
+    assert store.session("alice") is session
+    assert store.get("bob") is None
+    assert store.stats()["created"] == 1
+
+def test_idle_sessions_expire(clock):
+    store = SessionStore(ttl=60, clock=clock)
+    store.session("alice")
+    clock.advance(59)
+    assert store.get("alice") is not None
+    clock.advance(60)
+    assert store.get("alice") is None
+    assert store.stats()["expirations"] == 1
+
+def test_least_recently_used_session_is_dropped(clock):
+    store = SessionStore(max_sessions=2, clock=clock)
+    store.session("alice")
+    store.session("bob")
+    store.get("alice")
+    store.session("carol")
+    assert store.get("bob") is None
+    assert store.get("alice") is not None
+    assert store.stats()["evictions"] == 1
+
+def test_turns_and_orders_are_bounded(clock):
+    store = SessionStore(max_turns=2, max_turn_chars=5, max_orders=2, clock=clock)
+    session = store.session("alice")
+    for text in ("one", "two", "three-and-more"):
+        store.add_turn(session, "user", text)
+    assert session.turns == [("user", "two"), ("user", "three")]
+    for order_id in ("ORD001", "ORD002", "ORD001", "ORD003"):
+        store.remember_order(session, {"order_id": order_id})
+    assert list(session.orders) == ["ORD001", "ORD003"]
+
+def test_spilled_session_is_restored_after_restart(tmp_path, clock):
+    """Evicted sessions survive in the spill file, including ones still buffered at close()"""
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(max_sessions=1, spill_path=path, spill_batch=100, clock=clock)
+    alice = store.session("alice")
+    store.add_turn(alice, "user", "Where is ORD001?")
+    alice.handoff_reason = "Refund request"
+    store.session("bob")
+    assert store.stats()["spilled"] == 1
+    store.close()
+    store.close()
+
+    restarted = SessionStore(max_sessions=1, spill_path=path, clock=clock)
+    restored = restarted.get("alice")
+    assert restored.turns == [("user", "Where is ORD001?")]
+    assert restored.handed_off
+    assert restarted.stats()["restored"] == 1
+    restarted.close()
+
+def test_expired_sessions_are_purged_from_memory_and_spill(tmp_path, clock):
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(max_sessions=1, ttl=60, spill_path=path, spill_batch=1, purge_interval=30, clock=clock)
+    store.session("alice")
+    store.session("bob")            # spills alice
+    clock.advance(61)
+    store.session("carol")          # purge interval passed: bob and the spilled alice are gone
+    assert store.stats()["expirations"] == 1
+    store.close()
+    rows = sqlite3.connect(path).execute("SELECT customer_id FROM sessions").fetchall()
+    assert rows == []
+
+def test_end_forgets_spilled_copy(tmp_path, clock):
+    store = SessionStore(max_sessions=1, spill_path=str(tmp_path / "sessions.db"), spill_batch=1,
+                         clock=clock)
+    store.session("alice")
+    store.session("bob")
+    store.end("alice")
+    assert store.get("alice") is None
+    store.close()
+
+# --- Two customers through main, with the model replaced by a fake (see conftest.py) ---
+
+def test_conversation_answers_are_not_served_to_other_customers(bot):
+    main, model = bot
+
+    async def scenario():
+        await main.process_customer_query("Hi, I bought a jacket last week", customer_id="bob")
+        first = await main.process_customer_query("What is your return policy?", customer_id="alice")
+        # Bob is mid-conversation: his answer may depend on his history, so it is neither
+        # served from nor added to the shared cache
+        in_conversation = await main.process_customer_query("What is your return policy?", customer_id="bob")
+        fresh = await main.process_customer_query("What is your return policy?", customer_id="carol")
+        return first, in_conversation, fresh
+
+    first, in_conversation, fresh = asyncio.run(scenario())
+    assert not first.get("cache_hit")
+    assert not in_conversation.get("cache_hit")
+    assert fresh.get("cache_hit")
+    assert len(model.requests) == 3
+    assert model.requests[-1][1:] == [
+        {"role": "user", "content": "Hi, I bought a jacket last week"},
+        {"role": "assistant", "content": "Answer to: Hi, I bought a jacket last week"},
+        {"role": "user", "content": "What is your return policy?"},
+    ]
+    assert len(main.session_store.get("alice").turns) == 2
+    assert len(main.session_store.get("bob").turns) == 4
+
+def test_coalesced_order_lookup_is_remembered_by_both_customers(bot):
+    main, model = bot
+
+    async def scenario():
+        return await asyncio.gather(
+            main.process_customer_query("Where is my order ORD001?", customer_id="alice"),
+            main.process_customer_query("Where is my order ORD001?", customer_id="bob"),
+        )
+
+    executions = main.agent_calls.executions
+    alice, bob = asyncio.run(scenario())
+    assert main.agent_calls.executions == executions + 1
+    assert alice["response"] == bob["response"]
+    assert alice["tools_called"] == bob["tools_called"] == ["get_order_status"]
+    for customer_id in ("alice", "bob"):
+        assert list(main.session_store.get(customer_id).orders) == ["ORD001"]
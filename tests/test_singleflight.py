@@ -0,0 +1,124 @@
+"""
+Tests for in-flight request coalescing
+"""
+import asyncio
+
+import pytest
+
+from runtime.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return {"response": "shared", "tools_called": []}
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+        return flight, runs, results
+
+    flight, runs, results = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert results == [{"response": "shared", "tools_called": []}] * 3
+    assert flight.stats() == {"in_flight": 0, "calls": 3, "executions": 1, "coalesced": 2, "bypassed": 0}
+
+def test_each_caller_gets_its_own_copy():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return {"tools_called": []}
+
+        return await asyncio.gather(flight.do("key", work), flight.do("key", work))
+
+    first, second = asyncio.run(scenario())
+    first["tools_called"].append("get_order_status")
+    assert second == {"tools_called": []}
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == [1, 2]
+    assert flight.executions == 2
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, finished.is_set(), first
+
+    result, finished, first = asyncio.run(scenario())
+    assert result == "done" and finished
+    assert first.cancelled()
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("backend down")
+
+        return await asyncio.gather(flight.do("key", work), flight.do("key", work), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_calls_past_max_keys_are_not_coalesced():
+    async def scenario():
+        flight = SingleFlight(max_keys=1)
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        await asyncio.gather(flight.do("a", work), flight.do("b", work), flight.do("b", work))
+        return flight
+
+    assert asyncio.run(scenario()).bypassed == 2
+
+@pytest.mark.parametrize("waiters", [1, 2])
+def test_call_is_cancelled_once_every_waiter_leaves(waiters):
+    async def scenario():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        tasks = [asyncio.ensure_future(flight.do("key", work)) for _ in range(waiters)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        return cancelled.is_set(), flight.stats()["in_flight"]
+
+    assert asyncio.run(scenario()) == (True, 0)
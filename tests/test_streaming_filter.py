@@ -0,0 +1,47 @@
+"""
+Tests for the incremental output guardrail used on streamed responses
+"""
+import pytest
+
+from guardrails.content_guardrails import INAPPROPRIATE_RESPONSES, OUTPUT_REWRITE_RESPONSE, StreamingOutputFilter
+
+def _stream(chunks):
+    output_filter = StreamingOutputFilter()
+    emitted = []
+    for chunk in chunks:
+        text, verdict = output_filter.feed(chunk)
+        emitted.append(text)
+        if verdict:
+            return "".join(emitted), verdict
+    text, verdict = output_filter.finish()
+    return "".join(emitted) + text, verdict
+
+def _split(text, *cuts):
+    bounds = (0, *cuts, len(text))
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+def test_clean_stream_is_passed_through_unchanged():
+    text = "Your order ORD001 was delivered on 2024-01-15. Anything else I can help with?"
+    for size in (1, 3, 17, len(text)):
+        assert _stream([text[i:i + size] for i in range(0, len(text), size)]) == (text, None)
+
+@pytest.mark.parametrize("phrase", INAPPROPRIATE_RESPONSES)
+def test_phrase_split_across_chunks_is_caught(phrase):
+    text = f"Well, honestly {phrase.upper()} about that."
+    start = text.lower().index(phrase)
+    for cut in range(start + 1, start + len(phrase)):
+        emitted, verdict = _stream(_split(text, cut))
+        assert verdict == OUTPUT_REWRITE_RESPONSE
+        # Nothing from the blocked phrase reached the customer
+        assert len(emitted) <= start
+
+def test_phrase_spread_over_single_characters_is_caught():
+    emitted, verdict = _stream(list("Sorry, that's not my problem."))
+    assert verdict == OUTPUT_REWRITE_RESPONSE
+    assert "not" not in emitted
+
+def test_verdict_sticks_after_a_match():
+    output_filter = StreamingOutputFilter()
+    assert output_filter.feed("I can't help")[1] == OUTPUT_REWRITE_RESPONSE
+    assert output_filter.feed(" with that, but here is more text") == ("", OUTPUT_REWRITE_RESPONSE)
+    assert output_filter.finish() == ("", OUTPUT_REWRITE_RESPONSE)
@@ -0,0 +1,56 @@
+"""
+Tests for the Aho-Corasick term matcher and the guardrails built on it
+"""
+import pytest
+
+from guardrails import content_guardrails
+from guardrails.term_matcher import SMALL_LIST_THRESHOLD, TermMatch, TermMatcher
+
+# Enough filler terms to force the automaton instead of the small-list scan
+FILLER = [f"zz{i}q" for i in range(SMALL_LIST_THRESHOLD)]
+
+@pytest.fixture(params=["scan", "automaton"])
+def build(request):
+    def matcher(terms):
+        built = TermMatcher(list(terms) + (FILLER if request.param == "automaton" else []))
+        assert built._use_scan == (request.param == "scan")
+        return built
+    return matcher
+
+def test_overlapping_terms_are_all_reported(build):
+    matcher = build(["he", "she", "his", "hers"])
+    assert matcher.find_all("ushers") == [
+        TermMatch(1, "she", 1, 4), TermMatch(0, "he", 2, 4), TermMatch(3, "hers", 2, 6)]
+    assert matcher.matched_indexes("ushers") == [0, 1, 3]
+
+def test_whole_words_and_phrases_are_found_at_their_position(build):
+    matcher = build(["hate", "worst service", "i hate"])
+    text = "i hate the worst service"
+    found = {(match.term, text[match.start:match.end]) for match in matcher.find_all(text)}
+    assert found == {("hate", "hate"), ("i hate", "i hate"), ("worst service", "worst service")}
+
+def test_terms_match_as_substrings_like_the_in_operator(build):
+    terms = ["hate", "crap", "at"]
+    matcher = build(terms)
+    for text in ("whatever", "scrapbook", "that", "nothing here", ""):
+        assert matcher.matched_indexes(text) == [i for i, term in enumerate(terms) if term in text]
+
+def test_empty_and_duplicate_terms_keep_the_first_index(build):
+    matcher = build(["", "bad", "bad"])
+    assert len(matcher) == 3 + (len(FILLER) if not matcher._use_scan else 0)
+    assert matcher.matched_indexes("too bad") == [1]
+
+def test_content_filter_keeps_offensive_words_ahead_of_phrases():
+    # "hate this company" also contains the offensive word "hate"
+    assert content_guardrails.content_filter_guardrail("I hate this company") == content_guardrails.OFFENSIVE_RESPONSE
+    assert content_guardrails.content_filter_guardrail("You suck at this") == content_guardrails.NEGATIVE_RESPONSE
+    assert content_guardrails.content_filter_guardrail("Where is my parcel?") is None
+
+def test_reload_filter_terms_rebuilds_the_matcher(monkeypatch):
+    monkeypatch.setattr(content_guardrails, "OFFENSIVE_WORDS", content_guardrails.OFFENSIVE_WORDS)
+    monkeypatch.setattr(content_guardrails, "NEGATIVE_PHRASES", content_guardrails.NEGATIVE_PHRASES)
+    monkeypatch.setattr(content_guardrails, "_filter_matcher", content_guardrails._filter_matcher)
+    content_guardrails.reload_filter_terms(["rubbish"], ["not happy"], quiet=True)
+    assert content_guardrails.content_filter_guardrail("This is rubbish") == content_guardrails.OFFENSIVE_RESPONSE
+    assert content_guardrails.content_filter_guardrail("I am not happy") == content_guardrails.NEGATIVE_RESPONSE
+    assert [match.term for match in content_guardrails.find_filter_terms("Rubbish, NOT HAPPY")] == ["rubbish", "not happy"]
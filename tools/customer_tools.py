@@ -3,9 +3,15 @@ Function Tools for Customer Support Bot
 Following teacher's pattern with @function_tool decorator
 """
 from agents import function_tool, RunContextWrapper
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import os
 import logging
 
+from tools.faq_index import FAQIndex
+from tools.order_cache import CachedOrderStore
+from tools.order_store import OrderStore, create_order_store
+from tools.faq_snapshot import faq_fingerprint, load_faq_index, save_snapshot
+
 # Setup logging following teacher's pattern
 logger = logging.getLogger(__name__)
 
@@ -18,6 +24,20 @@ ORDERS_DB = {
     "ORD005": {"status": "cancelled", "tracking": None, "date": "2025-08-29", "amount": "$123.75"}
 }
 
+# ORDERS_DB stays the default backend; point ORDER_DB_PATH at a SQLite file for real data.
+# Lookups go through a read-through cache sized by ORDER_CACHE_SIZE (0 disables it).
+order_store: OrderStore = CachedOrderStore(
+    create_order_store(ORDERS_DB, os.getenv("ORDER_DB_PATH")),
+    max_entries=int(os.getenv("ORDER_CACHE_SIZE", "10000"))
+)
+
+def invalidate_order(order_id: Optional[str] = None) -> None:
+    """Drop a changed order (or every order when no ID is given) from the lookup cache"""
+    if order_id is None:
+        order_store.clear()
+    else:
+        order_store.invalidate(order_id.upper().strip())
+
 # FAQ database
 FAQ_DB = {
     "return_policy": "Our return policy allows returns within 30 days of purchase with original receipt.",
@@ -28,6 +48,22 @@ FAQ_DB = {
     "store_locations": "We have stores in New York, Los Angeles, Chicago, and Miami."
 }
 
+FAQ_TOP_K = 3
+FAQ_INDEX_SNAPSHOT = os.getenv("FAQ_INDEX_SNAPSHOT")
+faq_index = load_faq_index(FAQ_DB, FAQ_INDEX_SNAPSHOT)
+
+def rebuild_faq_index() -> None:
+    """Re-index FAQ_DB after it has been edited"""
+    global faq_index
+    faq_index = FAQIndex(FAQ_DB)
+
+def save_faq_snapshot(path: Optional[str] = None) -> None:
+    """Write the current FAQ index to disk so other workers can mmap it at startup"""
+    path = path or FAQ_INDEX_SNAPSHOT
+    if not path:
+        raise ValueError("No snapshot path given and FAQ_INDEX_SNAPSHOT is not set")
+    save_snapshot(FAQIndex(FAQ_DB), path, faq_fingerprint(FAQ_DB))
+
 # Function to check if order tool should be enabled
 def enable_order_tool(ctx: RunContextWrapper, agent) -> bool:
     """Enable order tool only when user mentions order-related keywords"""
@@ -35,6 +71,17 @@ def enable_order_tool(ctx: RunContextWrapper, agent) -> bool:
     order_keywords = ["order", "track", "status", "shipped", "delivery", "ord"]
     return any(keyword in user_message for keyword in order_keywords)
 
+def format_order(order_id: str, order_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape an order store record into the tool result returned to the agent"""
+    return {
+        "order_id": order_id,
+        "status": order_info["status"],
+        "tracking_number": order_info.get("tracking"),
+        "order_date": order_info["date"],
+        "amount": order_info["amount"],
+        "found": True
+    }
+
 @function_tool(
     name_override="get_order_status",
     description_override="Get order status and tracking information for a given order ID",
@@ -45,22 +92,15 @@ def get_order_status(order_id: str) -> Dict[str, Any]:
     Fetch order status from mock database
     Uses is_enabled parameter following teacher's pattern
     """
-    logger.info(f"Tool invocation: get_order_status for order_id={order_id}")
+    logger.info("Tool invocation: get_order_status for order_id=%s", order_id)
     
     # Normalize order ID
     order_id = order_id.upper().strip()
     
-    if order_id in ORDERS_DB:
-        order_info = ORDERS_DB[order_id]
-        result = {
-            "order_id": order_id,
-            "status": order_info["status"],
-            "tracking_number": order_info.get("tracking"),
-            "order_date": order_info["date"],
-            "amount": order_info["amount"],
-            "found": True
-        }
-        logger.info(f"Order found: {result}")
+    order_info = order_store.get(order_id)
+    if order_info is not None:
+        result = format_order(order_id, order_info)
+        logger.info("Order found: %s (%s)", order_id, result["status"])
         return result
     else:
         # This will trigger the error function
@@ -72,11 +112,32 @@ def order_lookup_error(ctx: RunContextWrapper, error: Exception) -> str:
     Error function for order lookup failures
     Following teacher's pattern for error handling
     """
-    logger.warning(f"Order lookup error: {str(error)}")
+    logger.warning("Order lookup error: %s", error)
     return f"I'm sorry, but I couldn't find that order. Please check the order ID and try again. Order IDs typically start with 'ORD' followed by numbers (e.g., ORD001)."
 
 # Note: Error handling is managed within the function itself by raising exceptions
 
+@function_tool(
+    name_override="get_order_statuses",
+    description_override="Get status and tracking information for several order IDs in one call",
+    is_enabled=enable_order_tool
+)
+def get_order_statuses(order_ids: List[str]) -> Dict[str, Any]:
+    """
+    Look up several orders with one batched store query
+    Unknown IDs are reported in not_found instead of raising
+    """
+    logger.info("Tool invocation: get_order_statuses for %s order IDs", len(order_ids))
+    
+    normalized = list(dict.fromkeys(order_id.upper().strip() for order_id in order_ids))
+    records = order_store.get_many(normalized)
+    
+    orders = [format_order(order_id, records[order_id]) for order_id in normalized if order_id in records]
+    not_found = [order_id for order_id in normalized if order_id not in records]
+    
+    logger.info("Orders found: %s, not found: %s", len(orders), len(not_found))
+    return {"orders": orders, "not_found": not_found, "found": bool(orders)}
+
 @function_tool(
     name_override="search_faq", 
     description_override="Search FAQ database for answers to common customer questions"
@@ -85,18 +146,15 @@ def search_faq(query: str) -> Dict[str, Any]:
     """
     Search FAQ database for relevant information
     """
-    logger.info(f"Tool invocation: search_faq for query='{query}'")
-    
-    query_lower = query.lower()
-    results = []
+    logger.info("Tool invocation: search_faq for query='%s'", query)
     
-    # Search through FAQ database
-    for key, answer in FAQ_DB.items():
-        if any(word in key for word in query_lower.split()) or any(word in answer.lower() for word in query_lower.split()):
-            results.append({"topic": key.replace("_", " ").title(), "answer": answer})
+    results = [
+        {"topic": key.replace("_", " ").title(), "answer": FAQ_DB[key], "score": round(score, 3)}
+        for key, score in faq_index.search(query, top_k=FAQ_TOP_K)
+    ]
     
     if results:
-        logger.info(f"FAQ results found: {len(results)} matches")
+        logger.info("FAQ results found: %s matches", len(results))
         return {"found": True, "results": results}
     else:
         logger.info("No FAQ results found")
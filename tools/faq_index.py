@@ -0,0 +1,93 @@
+"""
+FAQ search index
+Tokenized inverted index with BM25 scoring used by search_faq
+"""
+import heapq
+import math
+import re
+from typing import Dict, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words too common to say anything about which article is wanted
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from have how i if in is it its
+me my of on or our so that the their there this to us was what when where
+which who why will with you your
+""".split())
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so 'hours' finds 'hour' and 'shipping' finds 'ship'"""
+    if len(token) > 5 and token.endswith("ing"):
+        token = token[:-3]
+        if len(token) > 2 and token[-1] == token[-2]:
+            token = token[:-1]
+    elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem"""
+    return [_stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class FAQIndex:
+    """
+    Inverted index over FAQ articles.
+
+    Built once from a {key: answer} mapping. A query only touches the
+    posting lists of its own terms, so latency depends on how selective
+    the query is rather than on the size of the knowledge base. Topic keys
+    are indexed alongside the answer text with extra weight.
+    """
+
+    TOPIC_BOOST = 2
+
+    def __init__(self, faqs: Dict[str, str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.keys: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for doc_id, (key, answer) in enumerate(faqs.items()):
+            tokens = tokenize(key.replace("_", " ")) * self.TOPIC_BOOST + tokenize(answer)
+            self.keys.append(key)
+            self.doc_lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((doc_id, tf))
+
+        self._finalize()
+
+    def _finalize(self) -> None:
+        doc_count = len(self.keys)
+        self.avg_length = (sum(self.doc_lengths) / doc_count) if doc_count else 0.0
+        self.idf = {
+            token: math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _lookup(self, token: str) -> Tuple[float, Iterable[Tuple[int, int]]]:
+        """Return (idf, [(doc_id, tf), ...]) for a token, empty when unknown"""
+        postings = self.postings.get(token)
+        if not postings:
+            return 0.0, ()
+        return self.idf[token], postings
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to top_k (key, score) pairs, best match first"""
+        k1, b, avg_length, doc_lengths = self.k1, self.b, self.avg_length or 1.0, self.doc_lengths
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            idf, postings = self._lookup(token)
+            for doc_id, tf in postings:
+                norm = k1 * (1 - b + b * doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.keys[doc_id], score) for doc_id, score in best]
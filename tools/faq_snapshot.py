@@ -0,0 +1,233 @@
+"""
+Persistent FAQ index snapshots
+Saves a built FAQIndex to a flat binary file and maps it back with mmap,
+so worker processes start answering queries without re-indexing and share
+the same read-only pages through the OS page cache.
+
+File layout (all integers native-endian, byte order recorded in the meta block):
+    header   magic (8s) | format version (u32) | meta length (u32) | crc32 of the rest (u32) | pad (u32)
+    meta     JSON: scalars, source fingerprint and {section: [offset, length]}
+    sections 8-byte aligned arrays: key table, doc lengths, sorted term table,
+             idf, posting offsets, posting doc ids, posting term frequencies
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+from tools.faq_index import FAQIndex
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FAQIDX\x00\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIII")
+ALIGNMENT = 8
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot is missing, corrupt, stale or from another format version"""
+
+def faq_fingerprint(faqs: Dict[str, str]) -> str:
+    """Content hash of a FAQ mapping, stored in the snapshot to detect staleness"""
+    digest = hashlib.sha256()
+    for key, answer in faqs.items():
+        digest.update(key.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(answer.encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()
+
+def _string_table(strings: Iterable[str]) -> Tuple[array, bytes]:
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for value in strings:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def save_snapshot(index: FAQIndex, path: str, fingerprint: str) -> None:
+    """Write index to path atomically (temp file + rename)"""
+    terms = sorted(index.postings, key=lambda term: term.encode("utf-8"))
+    posting_offsets = array("Q", [0])
+    posting_docs = array("I")
+    posting_tfs = array("I")
+    for term in terms:
+        for doc_id, tf in index.postings[term]:
+            posting_docs.append(doc_id)
+            posting_tfs.append(tf)
+        posting_offsets.append(len(posting_docs))
+
+    key_offsets, key_blob = _string_table(index.keys)
+    term_offsets, term_blob = _string_table(terms)
+    sections = {
+        "key_offsets": key_offsets.tobytes(),
+        "key_blob": key_blob,
+        "doc_lengths": array("I", index.doc_lengths).tobytes(),
+        "term_offsets": term_offsets.tobytes(),
+        "term_blob": term_blob,
+        "idf": array("d", (index.idf[term] for term in terms)).tobytes(),
+        "posting_offsets": posting_offsets.tobytes(),
+        "posting_docs": posting_docs.tobytes(),
+        "posting_tfs": posting_tfs.tobytes(),
+    }
+
+    meta = {
+        "byteorder": sys.byteorder,
+        "fingerprint": fingerprint,
+        "k1": index.k1,
+        "b": index.b,
+        "avg_length": index.avg_length,
+        "doc_count": len(index.keys),
+        "term_count": len(terms),
+        "sections": {},
+    }
+    # Section offsets depend on the meta length, so lay out until it stops changing
+    meta_bytes = b""
+    while True:
+        position = _align(HEADER.size + len(meta_bytes))
+        layout = {}
+        for name, data in sections.items():
+            layout[name] = [position, len(data)]
+            position = _align(position + len(data))
+        meta["sections"] = layout
+        encoded = json.dumps(meta, sort_keys=True).encode("utf-8")
+        if len(encoded) == len(meta_bytes):
+            meta_bytes = encoded
+            break
+        meta_bytes = encoded
+
+    body = bytearray(meta_bytes)
+    for name, data in sections.items():
+        offset = layout[name][0] - HEADER.size
+        body += b"\x00" * (offset - len(body))
+        body += data
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(meta_bytes), zlib.crc32(body), 0)
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(body)
+    os.replace(temp_path, path)
+    logger.info("FAQ index snapshot written: %s (%s articles, %s terms)", path, len(index.keys), len(terms))
+
+def _align(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+class _StringTable:
+    """Lazily decoded list of strings backed by the mapped file"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        return bytes(self._blob[self._offsets[position]:self._offsets[position + 1]]).decode("utf-8")
+
+    def raw(self, position: int) -> bytes:
+        return bytes(self._blob[self._offsets[position]:self._offsets[position + 1]])
+
+class MappedFAQIndex(FAQIndex):
+    """
+    FAQIndex served straight out of a memory-mapped snapshot.
+
+    Nothing is decoded at load time: terms are found by binary search over
+    the sorted term table and postings are read as zero-copy array views.
+    """
+
+    def __init__(self, path: str, expected_fingerprint: Optional[str] = None, verify_checksum: bool = True):
+        try:
+            with open(path, "rb") as handle:
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # Unreadable file, or an empty one (which mmap refuses)
+            raise SnapshotError(f"{path}: cannot map snapshot: {e}") from e
+        try:
+            self._load(path, expected_fingerprint, verify_checksum)
+        except SnapshotError:
+            self._mmap.close()
+            raise
+        except (KeyError, TypeError, ValueError, struct.error) as e:
+            # A damaged meta block or section table that got past the checksum
+            self._mmap.close()
+            raise SnapshotError(f"{path}: corrupt snapshot: {e}") from e
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _load(self, path: str, expected_fingerprint: Optional[str], verify_checksum: bool) -> None:
+        if len(self._mmap) < HEADER.size:
+            raise SnapshotError(f"{path}: truncated snapshot")
+        magic, version, meta_length, checksum, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a FAQ index snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path}: format version {version}, expected {FORMAT_VERSION}")
+        if verify_checksum and zlib.crc32(memoryview(self._mmap)[HEADER.size:]) != checksum:
+            raise SnapshotError(f"{path}: checksum mismatch")
+
+        meta = json.loads(bytes(self._mmap[HEADER.size:HEADER.size + meta_length]))
+        if meta["byteorder"] != sys.byteorder:
+            raise SnapshotError(f"{path}: written on a {meta['byteorder']}-endian machine")
+        if expected_fingerprint is not None and meta["fingerprint"] != expected_fingerprint:
+            raise SnapshotError(f"{path}: snapshot is stale for the current FAQ data")
+
+        view = memoryview(self._mmap)
+        def section(name: str, fmt: Optional[str] = None) -> memoryview:
+            offset, length = meta["sections"][name]
+            data = view[offset:offset + length]
+            return data.cast(fmt) if fmt else data
+
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.avg_length = meta["avg_length"]
+        self.fingerprint = meta["fingerprint"]
+        self.keys = _StringTable(section("key_offsets", "Q"), section("key_blob"))
+        self.doc_lengths = section("doc_lengths", "I")
+        self._terms = _StringTable(section("term_offsets", "Q"), section("term_blob"))
+        self._idf = section("idf", "d")
+        self._posting_offsets = section("posting_offsets", "Q")
+        self._posting_docs = section("posting_docs", "I")
+        self._posting_tfs = section("posting_tfs", "I")
+
+    def _find_term(self, token: str) -> int:
+        target = token.encode("utf-8")
+        low, high = 0, len(self._terms)
+        while low < high:
+            middle = (low + high) // 2
+            if self._terms.raw(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._terms) and self._terms.raw(low) == target:
+            return low
+        return -1
+
+    def _lookup(self, token: str):
+        position = self._find_term(token)
+        if position < 0:
+            return 0.0, ()
+        start, end = self._posting_offsets[position], self._posting_offsets[position + 1]
+        return self._idf[position], zip(self._posting_docs[start:end], self._posting_tfs[start:end])
+
+def load_faq_index(faqs: Dict[str, str], snapshot_path: Optional[str] = None) -> FAQIndex:
+    """
+    Map the snapshot at snapshot_path when it exists and matches faqs,
+    otherwise build the index in memory.
+    """
+    if snapshot_path and os.path.exists(snapshot_path):
+        try:
+            index = MappedFAQIndex(snapshot_path, expected_fingerprint=faq_fingerprint(faqs))
+            logger.info("FAQ index mapped from snapshot %s", snapshot_path)
+            return index
+        except SnapshotError as e:
+            logger.warning("Ignoring FAQ index snapshot: %s", e)
+    return FAQIndex(faqs)
@@ -0,0 +1,174 @@
+"""
+Read-through cache for order lookups
+Wraps any OrderStore with LRU eviction and per-status TTLs.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from tools.order_store import OrderStore
+
+logger = logging.getLogger(__name__)
+
+# Orders in a final state rarely change; in-flight ones change often
+DEFAULT_STATUS_TTLS = {
+    "delivered": 3600.0,
+    "cancelled": 3600.0,
+    "shipped": 300.0,
+    "processing": 30.0,
+    "pending": 30.0,
+}
+
+_MISSING = object()
+
+class CachedOrderStore(OrderStore):
+    """
+    OrderStore decorator that keeps recently looked-up orders in memory.
+
+    Entries expire after a TTL chosen from the order's status (falling back
+    to default_ttl) and the least recently used entry is evicted once
+    max_entries is reached. Unknown order IDs can be cached too with
+    negative_ttl (off by default). Call invalidate() whenever an order
+    changes so stale statuses are never served; a backend read that was
+    already in flight when the order was invalidated is not cached.
+    """
+
+    def __init__(self, backend: OrderStore, max_entries: int = 10_000, default_ttl: float = 60.0,
+                 status_ttls: Optional[Dict[str, float]] = None, negative_ttl: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.status_ttls = dict(DEFAULT_STATUS_TTLS if status_ttls is None else status_ttls)
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Generation per order with a backend read in flight, bumped by invalidate();
+        # the epoch is bumped by clear(). Entries go away when the reads finish.
+        self._generations: Dict[str, int] = {}
+        self._fetching: Dict[str, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _ttl_for(self, record: Optional[Dict[str, Any]]) -> float:
+        if record is None:
+            return self.negative_ttl
+        return self.status_ttls.get(record.get("status"), self.default_ttl)
+
+    def _lookup(self, order_id: str, now: float) -> Any:
+        """Return the cached record (possibly None for a cached miss) or _MISSING; caller holds the lock"""
+        entry = self._entries.get(order_id)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        expires_at, record = entry
+        if expires_at <= now:
+            del self._entries[order_id]
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+        self._entries.move_to_end(order_id)
+        self.hits += 1
+        return record
+
+    def _store(self, order_id: str, record: Optional[Dict[str, Any]], now: float) -> None:
+        """Insert a record, evicting least recently used entries; caller holds the lock"""
+        ttl = self._ttl_for(record)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[order_id] = (now + ttl, record)
+        self._entries.move_to_end(order_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _begin_fetch(self, order_id: str) -> Tuple[int, int]:
+        """Note a backend read and return what it was started under; caller holds the lock"""
+        self._fetching[order_id] = self._fetching.get(order_id, 0) + 1
+        return self._epoch, self._generations.get(order_id, 0)
+
+    def _end_fetch(self, order_id: str, started: Tuple[int, int], record: Any, now: float) -> None:
+        """Cache a read's result (_MISSING if it failed) unless the order was invalidated meanwhile; caller holds the lock"""
+        if record is not _MISSING and started == (self._epoch, self._generations.get(order_id, 0)):
+            self._store(order_id, record, now)
+        self._fetching[order_id] -= 1
+        if not self._fetching[order_id]:
+            del self._fetching[order_id]
+            self._generations.pop(order_id, None)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._lookup(order_id, self.clock())
+            if record is not _MISSING:
+                return record
+            started = self._begin_fetch(order_id)
+
+        record = _MISSING
+        try:
+            record = self.backend.get(order_id)
+        finally:
+            with self._lock:
+                self._end_fetch(order_id, started, record, self.clock())
+        return record
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        with self._lock:
+            now = self.clock()
+            for order_id in dict.fromkeys(order_ids):
+                record = self._lookup(order_id, now)
+                if record is _MISSING:
+                    missing.append((order_id, self._begin_fetch(order_id)))
+                elif record is not None:
+                    found[order_id] = record
+
+        if missing:
+            fetched = None
+            try:
+                fetched = self.backend.get_many([order_id for order_id, _ in missing])
+            finally:
+                with self._lock:
+                    now = self.clock()
+                    for order_id, started in missing:
+                        record = _MISSING if fetched is None else fetched.get(order_id)
+                        self._end_fetch(order_id, started, record, now)
+            found.update(fetched)
+        return found
+
+    def invalidate(self, order_id: str) -> bool:
+        """Drop one order from the cache; returns True if it was cached"""
+        with self._lock:
+            if order_id in self._fetching:
+                self._generations[order_id] = self._generations.get(order_id, 0) + 1
+            return self._entries.pop(order_id, None) is not None
+
+    def clear(self) -> None:
+        """Drop every cached order"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        self.clear()
+        self.backend.close()
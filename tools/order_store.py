@@ -0,0 +1,157 @@
+"""
+Order storage backends
+get_order_status reads through an OrderStore so the order table does not
+have to live in every worker as a Python dict.
+"""
+import abc
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ORDER_FIELDS = ("status", "tracking", "date", "amount")
+
+class OrderStore(abc.ABC):
+    """
+    Interface for order lookups.
+
+    Records use the same shape as the ORDERS_DB mock:
+    {"status": ..., "tracking": ..., "date": ..., "amount": ...}
+    Order IDs are expected to be normalized (upper-cased, stripped) by the caller.
+    Backends must implement get(); get_many() and close() have defaults.
+    """
+
+    @abc.abstractmethod
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Return the order record, or None when it does not exist"""
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {order_id: record} for the IDs that exist"""
+        found = {}
+        for order_id in order_ids:
+            record = self.get(order_id)
+            if record is not None:
+                found[order_id] = record
+        return found
+
+    def close(self) -> None:
+        """Release any resources held by the store"""
+
+class InMemoryOrderStore(OrderStore):
+    """Dict-backed store; keeps the original ORDERS_DB behavior"""
+
+    def __init__(self, orders: Dict[str, Dict[str, Any]]):
+        self.orders = orders
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self.orders.get(order_id)
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        orders = self.orders
+        return {order_id: orders[order_id] for order_id in order_ids if order_id in orders}
+
+class SQLiteOrderStore(OrderStore):
+    """
+    SQLite-backed store keyed on a primary-key index.
+
+    Each thread gets its own connection (sqlite3 connections must not be
+    shared across threads), created on first use and kept for reuse. The
+    SQL text is constant, so sqlite3's statement cache turns every lookup
+    into a reuse of an already prepared statement.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id TEXT PRIMARY KEY,
+            status   TEXT NOT NULL,
+            tracking TEXT,
+            date     TEXT NOT NULL,
+            amount   TEXT NOT NULL
+        ) WITHOUT ROWID
+    """
+    SELECT_ONE = "SELECT status, tracking, date, amount FROM orders WHERE order_id = ?"
+    INSERT = "INSERT OR REPLACE INTO orders (order_id, status, tracking, date, amount) VALUES (?, ?, ?, ?, ?)"
+    # SQLite's default host-parameter limit is 999 on older builds
+    MAX_BATCH = 500
+
+    def __init__(self, path: str, cache_size_kb: int = 16384, mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        connection = self._connection()
+        connection.execute(self.SCHEMA)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # check_same_thread is off only so close() can run from any thread
+            connection = sqlite3.connect(self.path, cached_statements=256, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @staticmethod
+    def _record(row: Tuple) -> Dict[str, Any]:
+        return dict(zip(ORDER_FIELDS, row))
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(self.SELECT_ONE, (order_id,)).fetchone()
+        return self._record(row) if row else None
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(dict.fromkeys(order_ids))
+        connection = self._connection()
+        found = {}
+        for start in range(0, len(ids), self.MAX_BATCH):
+            batch = ids[start:start + self.MAX_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT order_id, status, tracking, date, amount FROM orders WHERE order_id IN ({placeholders})",
+                batch,
+            )
+            for row in rows:
+                found[row[0]] = self._record(row[1:])
+        return found
+
+    def load(self, orders: Iterable[Tuple[str, Dict[str, Any]]], batch_size: int = 50_000) -> int:
+        """Bulk insert (order_id, record) pairs; returns the number of rows written"""
+        connection = self._connection()
+        written = 0
+        batch = []
+        for order_id, record in orders:
+            batch.append((order_id, record["status"], record.get("tracking"), record["date"], record["amount"]))
+            if len(batch) >= batch_size:
+                connection.executemany(self.INSERT, batch)
+                written += len(batch)
+                batch.clear()
+        if batch:
+            connection.executemany(self.INSERT, batch)
+            written += len(batch)
+        connection.commit()
+        logger.info("Loaded %s orders into %s", written, self.path)
+        return written
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+def create_order_store(orders: Dict[str, Dict[str, Any]], sqlite_path: Optional[str] = None) -> OrderStore:
+    """SQLite store when a database path is configured, otherwise the in-memory dict"""
+    if sqlite_path:
+        logger.info("Using SQLite order store at %s", sqlite_path)
+        return SQLiteOrderStore(sqlite_path)
+    return InMemoryOrderStore(orders)